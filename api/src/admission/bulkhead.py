@@ -0,0 +1,43 @@
+import asyncio
+
+
+class Bulkhead:
+    """
+    Concurrency limit with a short bounded wait queue.
+
+    Up to `max_concurrency` holders run at once; up to `max_queue` more wait
+    at most `queue_timeout` seconds for a slot. Anything beyond is rejected
+    at once instead of queueing until the client times out.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int = 0, queue_timeout=0.5):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.waiting = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def active(self) -> int:
+        return self.max_concurrency - self._semaphore._value
+
+    async def acquire(self) -> bool:
+        """Return whether a slot was acquired; release it with `release()`."""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # free slot: returns at once
+            return True
+        if self.waiting >= self.max_queue:
+            return False
+
+        self.waiting += 1
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await self._semaphore.acquire()
+            return True
+        except TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self) -> None:
+        self._semaphore.release()
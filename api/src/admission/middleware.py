@@ -0,0 +1,85 @@
+from fastapi import status
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.admission.bulkhead import Bulkhead
+from src.auth.utils import hashing_executor
+from src.database import database
+from src.metrics.loop_lag import loop_lag_monitor
+from src.metrics.middleware import get_route_template
+from src.metrics.registry import registry
+
+ADMISSION_REJECTED = registry.counter(
+    "admission_rejected",
+    "Requests shed by admission control, by route and reason.",
+    ("route", "reason"),
+)
+
+
+class AdmissionControlMiddleware:
+    """
+    Shed load on the limited routes before it queues without bound.
+
+    Each route in `route_limits` gets its own bulkhead, so a burst on one
+    route cannot take the capacity of another. Requests to a limited route
+    are answered 503 with `Retry-After` when the process is already
+    overloaded (event loop lag, pending bcrypt jobs or DB pool wait above
+    their limit) or when the route bulkhead and its wait queue are full.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        route_limits: dict,
+        max_loop_lag: float,
+        max_hashing_queue_depth: int,
+        max_db_pool_wait: float,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.bulkheads = {
+            route: Bulkhead(limit.max_concurrency, limit.max_queue, limit.queue_timeout)
+            for route, limit in route_limits.items()
+        }
+        self.max_loop_lag = max_loop_lag
+        self.max_hashing_queue_depth = max_hashing_queue_depth
+        self.max_db_pool_wait = max_db_pool_wait
+        self.retry_after = retry_after
+
+    def _get_overload_reason(self) -> str | None:
+        if loop_lag_monitor.current_lag > self.max_loop_lag:
+            return "loop_lag"
+        if hashing_executor.queue_depth > self.max_hashing_queue_depth:
+            return "hashing_queue"
+        if database.acquire_wait > self.max_db_pool_wait:
+            return "db_pool_wait"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = get_route_template(scope)
+        bulkhead = self.bulkheads.get(route)
+        if bulkhead is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = self._get_overload_reason()
+        if reason is None and not await bulkhead.acquire():
+            reason = "concurrency"
+        if reason is not None:
+            ADMISSION_REJECTED.labels(route, reason).inc()
+            response = JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"detail": "The server is busy, please retry later."},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            bulkhead.release()
@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from src.admission.bulkhead import Bulkhead
+
+
+@pytest.mark.asyncio
+async def test_acquire_free_slots():
+    bulkhead = Bulkhead(max_concurrency=2)
+    assert await bulkhead.acquire()
+    assert await bulkhead.acquire()
+    assert bulkhead.active == 2
+
+
+@pytest.mark.asyncio
+async def test_acquire_full_without_queue_rejected():
+    bulkhead = Bulkhead(max_concurrency=1, max_queue=0)
+    assert await bulkhead.acquire()
+    assert not await bulkhead.acquire()
+
+
+@pytest.mark.asyncio
+async def test_acquire_waits_for_release():
+    bulkhead = Bulkhead(max_concurrency=1, max_queue=1, queue_timeout=1.0)
+    assert await bulkhead.acquire()
+
+    waiter = asyncio.create_task(bulkhead.acquire())
+    await asyncio.sleep(0)
+    assert bulkhead.waiting == 1
+    bulkhead.release()
+
+    assert await waiter
+    assert bulkhead.waiting == 0
+    assert bulkhead.active == 1
+
+
+@pytest.mark.asyncio
+async def test_acquire_queue_timeout():
+    bulkhead = Bulkhead(max_concurrency=1, max_queue=1, queue_timeout=0.01)
+    assert await bulkhead.acquire()
+    assert not await bulkhead.acquire()
+    assert bulkhead.waiting == 0
+    bulkhead.release()
+    assert bulkhead.active == 0
+
+
+@pytest.mark.asyncio
+async def test_acquire_queue_full_rejected():
+    bulkhead = Bulkhead(max_concurrency=1, max_queue=1, queue_timeout=1.0)
+    assert await bulkhead.acquire()
+    waiter = asyncio.create_task(bulkhead.acquire())
+    await asyncio.sleep(0)
+
+    assert not await bulkhead.acquire()
+
+    bulkhead.release()
+    assert await waiter
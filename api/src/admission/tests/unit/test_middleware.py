@@ -0,0 +1,94 @@
+import asyncio
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI, status
+
+from src.admission.middleware import AdmissionControlMiddleware
+from src.config import RouteAdmissionLimit
+
+
+@pytest.fixture
+def release():
+    return asyncio.Event()
+
+
+@pytest.fixture
+def admission_app(release):
+    app = FastAPI()
+
+    @app.post("/users/register")
+    async def register():
+        await release.wait()
+        return {}
+
+    @app.patch("/users/activate")
+    async def activate():
+        return {}
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        route_limits={
+            "/users/register": RouteAdmissionLimit(max_concurrency=1, max_queue=0),
+            "/users/activate": RouteAdmissionLimit(max_concurrency=1, max_queue=0),
+        },
+        max_loop_lag=0.5,
+        max_hashing_queue_depth=10,
+        max_db_pool_wait=0.5,
+        retry_after=2,
+    )
+    return app
+
+
+@pytest.fixture
+async def admission_client(admission_app):
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=admission_app),
+        base_url="http://test",
+    ) as client:
+        yield client
+
+
+def assert_shed(response):
+    assert response.status_code == status.HTTP_503_SERVICE_UNAVAILABLE
+    assert response.headers["retry-after"] == "2"
+    assert response.json() == {"detail": "The server is busy, please retry later."}
+
+
+@pytest.mark.asyncio
+async def test_route_bulkheads_are_separate(admission_client, release):
+    first = asyncio.create_task(admission_client.post("/users/register"))
+    await asyncio.sleep(0.01)
+
+    assert_shed(await admission_client.post("/users/register"))
+    response = await admission_client.patch("/users/activate")
+    assert response.status_code == status.HTTP_200_OK
+
+    release.set()
+    assert (await first).status_code == status.HTTP_200_OK
+    response = await admission_client.post("/users/register")
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.asyncio
+async def test_unlimited_route_not_shed(admission_client):
+    with patch("src.admission.middleware.loop_lag_monitor") as monitor:
+        monitor.current_lag = 10.0
+        response = await admission_client.get("/docs")
+    assert response.status_code == status.HTTP_200_OK
+
+
+@pytest.mark.parametrize(
+    "target, attribute, value",
+    [
+        ("src.admission.middleware.loop_lag_monitor", "current_lag", 1.0),
+        ("src.admission.middleware.hashing_executor", "queue_depth", 11),
+        ("src.admission.middleware.database", "acquire_wait", 1.0),
+    ],
+)
+@pytest.mark.asyncio
+async def test_overload_shed(admission_client, target, attribute, value):
+    with patch(target) as signal:
+        setattr(signal, attribute, value)
+        assert_shed(await admission_client.patch("/users/activate"))
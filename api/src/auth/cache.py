@@ -0,0 +1,107 @@
+import hashlib
+import hmac
+import secrets
+import sys
+import time
+from collections import OrderedDict
+
+from src.config import credentials_cache_settings
+
+# memory taken by each entry besides its key and value: the OrderedDict link
+# node and the entry's share of the hash table, measured with tracemalloc on
+# CPython 3.11 (up to about 120 bytes per entry as evictions fill the table
+# with deleted slots)
+ENTRY_OVERHEAD = 128
+
+
+class CredentialsCache:
+    """
+    In-process cache of recently verified HTTP Basic credentials.
+
+    Entries are keyed by an HMAC of the email, the clear password, the stored
+    password hash and the activation state, so a cached entry can only match
+    the exact user row it was verified against: a password change or a change
+    of `is_active` produces another key and the old entry is never hit again.
+    The clear password is never stored.
+
+    Entries expire after `ttl` seconds and the least recently used ones are
+    evicted once the cache holds more than `max_bytes`.
+    """
+
+    def __init__(self, ttl: float = 60.0, max_bytes: int = 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self._secret = secrets.token_bytes(32)
+        self._entries: OrderedDict[bytes, float] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _key(
+        self,
+        email: str,
+        password: str,
+        password_hash: str,
+        is_active: bool,
+    ) -> bytes:
+        message = "\0".join([email, password, password_hash, str(is_active)])
+        return hmac.new(self._secret, message.encode(), hashlib.sha256).digest()
+
+    @staticmethod
+    def _entry_size(key: bytes, expires_at: float) -> int:
+        return sys.getsizeof(key) + sys.getsizeof(expires_at) + ENTRY_OVERHEAD
+
+    def _remove(self, key: bytes) -> None:
+        expires_at = self._entries.pop(key)
+        self.size_bytes -= self._entry_size(key, expires_at)
+
+    def contains(
+        self,
+        email: str,
+        password: str,
+        password_hash: str,
+        is_active: bool,
+    ) -> bool:
+        key = self._key(email, password, password_hash, is_active)
+        expires_at = self._entries.get(key)
+        if expires_at is None:
+            self.misses += 1
+            return False
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return False
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True
+
+    def add(
+        self,
+        email: str,
+        password: str,
+        password_hash: str,
+        is_active: bool,
+    ) -> None:
+        key = self._key(email, password, password_hash, is_active)
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl
+        self._entries[key] = expires_at
+        self.size_bytes += self._entry_size(key, expires_at)
+        while self.size_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+
+credentials_cache = CredentialsCache(
+    ttl=credentials_cache_settings.CREDENTIALS_CACHE_TTL,
+    max_bytes=credentials_cache_settings.CREDENTIALS_CACHE_MAX_BYTES,
+)
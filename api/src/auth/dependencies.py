@@ -1,21 +1,42 @@
 from typing import Annotated
 
-from databases import Database
 from fastapi import Depends
 from fastapi.security import HTTPBasicCredentials, HTTPBasic
 
-from src.auth.utils import verify_password
+from src.auth.cache import credentials_cache
+from src.auth.utils import verify_password_async
+from src.config import credentials_cache_settings
+from src.database import Database
 from src.dependencies import get_db
 from src.user.crud import get_user_by_email
 from src.user.exceptions import (
     UserInvalidCredentialsError,
     UserNotActivatedError,
 )
-from src.user.schemas import UserPublic
+from src.user.schemas import UserFromDB, UserPublic
 
 security = HTTPBasic()
 
 
+async def _check_password(credentials: HTTPBasicCredentials, user: UserFromDB) -> bool:
+    if not credentials_cache_settings.CREDENTIALS_CACHE_ENABLED:
+        return await verify_password_async(credentials.password, user.password_hash)
+
+    cache_args = (
+        credentials.username,
+        credentials.password,
+        user.password_hash,
+        user.is_active,
+    )
+    if credentials_cache.contains(*cache_args):
+        return True
+
+    password_ok = await verify_password_async(credentials.password, user.password_hash)
+    if password_ok:
+        credentials_cache.add(*cache_args)
+    return password_ok
+
+
 async def get_current_user(
     db: Annotated[Database, Depends(get_db)],
     credentials: HTTPBasicCredentials = Depends(security),
@@ -24,11 +45,10 @@ async def get_current_user(
     if not user:
         raise UserInvalidCredentialsError
 
-    password_ok = verify_password(credentials.password, user.password_hash)
-    if not password_ok:
+    if not await _check_password(credentials, user):
         raise UserInvalidCredentialsError
 
-    return UserPublic(**user.model_dump())
+    return user.to_public()
 
 
 async def get_current_active_user(
@@ -0,0 +1,39 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from src.exceptions import ServiceBaseError
+
+
+# Service errors
+
+
+class AuthServiceBaseError(ServiceBaseError):
+    """Base class for service-level errors related to authentication."""
+
+    def __init__(self, message="A service error occurred during authentication."):
+        super().__init__(message)
+
+
+class PasswordHashingBusyError(AuthServiceBaseError):
+    """Raised when too many password hashing jobs are already pending."""
+
+    status_code = 503
+
+    def __init__(self, message="The server is busy, please retry later."):
+        super().__init__(message)
+
+
+# Handlers
+
+
+def register_service_exceptions_handlers(app: FastAPI) -> None:
+    @app.exception_handler(AuthServiceBaseError)
+    async def handle_service_generic_error(request, exception):
+        return JSONResponse(
+            status_code=exception.status_code,
+            content={"detail": str(exception)},
+        )
+
+
+def register_exceptions_handlers(app: FastAPI) -> None:
+    register_service_exceptions_handlers(app)
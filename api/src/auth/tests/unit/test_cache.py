@@ -0,0 +1,108 @@
+import tracemalloc
+from unittest.mock import patch
+
+import pytest
+from fastapi.security import HTTPBasicCredentials
+
+from src.auth.cache import CredentialsCache
+from src.auth.dependencies import get_current_user
+from src.user.schemas import UserFromDB
+
+EMAIL = "test@example.com"
+PASSWORD = "123Password?!"
+PASSWORD_HASH = "$2b$12$q1jZc9H7jm36Eu9TRn0uB.3Bmch9JasnMfhUD8IqdQsUR01afrWDm"
+OTHER_PASSWORD_HASH = "$2b$12$L7bTz3HcA9Rk0s2Hx1mZEuQ6b3n0Jd6yRrH0H7f8q1zY0bQ8cWw2e"
+
+
+def test_credentials_cache_hit_and_miss():
+    cache = CredentialsCache()
+
+    assert not cache.contains(EMAIL, PASSWORD, PASSWORD_HASH, False)
+    cache.add(EMAIL, PASSWORD, PASSWORD_HASH, False)
+    assert cache.contains(EMAIL, PASSWORD, PASSWORD_HASH, False)
+
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_credentials_cache_miss_on_changed_credentials():
+    cache = CredentialsCache()
+    cache.add(EMAIL, PASSWORD, PASSWORD_HASH, False)
+
+    assert not cache.contains(EMAIL, "wrong", PASSWORD_HASH, False)
+    assert not cache.contains(EMAIL, PASSWORD, OTHER_PASSWORD_HASH, False)
+    assert not cache.contains(EMAIL, PASSWORD, PASSWORD_HASH, True)
+    assert cache.misses == 3
+
+
+def test_credentials_cache_expired():
+    cache = CredentialsCache(ttl=60)
+
+    with patch("src.auth.cache.time.monotonic", return_value=1000.0):
+        cache.add(EMAIL, PASSWORD, PASSWORD_HASH, False)
+    with patch("src.auth.cache.time.monotonic", return_value=1061.0):
+        assert not cache.contains(EMAIL, PASSWORD, PASSWORD_HASH, False)
+
+    assert len(cache) == 0
+    assert cache.size_bytes == 0
+
+
+def test_credentials_cache_lru_eviction_by_size():
+    cache = CredentialsCache()
+    cache.add("a@example.com", PASSWORD, PASSWORD_HASH, False)
+    entry_size = cache.size_bytes
+    cache.max_bytes = 2 * entry_size
+    cache.add("b@example.com", PASSWORD, PASSWORD_HASH, False)
+
+    # "a" becomes the most recently used entry, so "b" is evicted next
+    assert cache.contains("a@example.com", PASSWORD, PASSWORD_HASH, False)
+    cache.add("c@example.com", PASSWORD, PASSWORD_HASH, False)
+
+    assert len(cache) == 2
+    assert cache.size_bytes <= cache.max_bytes
+    assert cache.contains("a@example.com", PASSWORD, PASSWORD_HASH, False)
+    assert not cache.contains("b@example.com", PASSWORD, PASSWORD_HASH, False)
+    assert cache.contains("c@example.com", PASSWORD, PASSWORD_HASH, False)
+
+
+def test_credentials_cache_memory_within_max_bytes():
+    cache = CredentialsCache(max_bytes=256 * 1024)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(10_000):
+            cache.add(f"{i}@example.com", PASSWORD, PASSWORD_HASH, False)
+        used = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+    assert cache.size_bytes <= cache.max_bytes
+    assert used <= cache.max_bytes
+
+
+@patch("src.auth.dependencies.credentials_cache", new_callable=CredentialsCache)
+@patch("src.auth.dependencies.credentials_cache_settings.CREDENTIALS_CACHE_ENABLED", True)
+@patch("src.auth.dependencies.verify_password_async", return_value=True)
+@patch("src.auth.dependencies.get_user_by_email")
+@pytest.mark.asyncio
+async def test_get_current_user_skips_bcrypt_on_cache_hit(
+    mock_crud_get_user_by_email,
+    mock_verify_password_async,
+    mock_credentials_cache,
+    mock_db,
+):
+    mock_crud_get_user_by_email.return_value = UserFromDB(
+        id=1,
+        email=EMAIL,
+        password_hash=PASSWORD_HASH,
+        is_active=False,
+    )
+    credentials = HTTPBasicCredentials(username=EMAIL, password=PASSWORD)
+
+    await get_current_user(mock_db, credentials)
+    await get_current_user(mock_db, credentials)
+
+    mock_verify_password_async.assert_called_once()
+    assert mock_credentials_cache.hits == 1
+    assert mock_credentials_cache.misses == 1
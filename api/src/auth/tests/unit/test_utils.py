@@ -1,6 +1,15 @@
+import asyncio
+
 import pytest
 
-from src.auth.utils import hash_password, verify_password
+from src.auth.exceptions import PasswordHashingBusyError
+from src.auth.utils import (
+    PasswordHashingExecutor,
+    hash_password,
+    hash_password_async,
+    verify_password,
+    verify_password_async,
+)
 
 DEFAULT_PASSWORD = "123Password?!"
 ANOTHER_PASSWORD = "!?Another*$PassWord"
@@ -25,3 +34,54 @@ def test_hash_and_verify_password_failure(password):
         assert not verify_password(ANOTHER_PASSWORD, hashed)
     elif password == ANOTHER_PASSWORD:
         assert not verify_password(DEFAULT_PASSWORD, hashed)
+
+
+@pytest.mark.parametrize("password", [DEFAULT_PASSWORD, ANOTHER_PASSWORD])
+@pytest.mark.asyncio
+async def test_hash_and_verify_password_async_success(password):
+    hashed = await hash_password_async(password)
+    assert password != hashed
+    assert hashed.startswith("$2")
+    assert await verify_password_async(password, hashed)
+    assert not await verify_password_async(password + "x", hashed)
+
+
+@pytest.mark.asyncio
+async def test_hashing_executor_runs_jobs_concurrently():
+    executor = PasswordHashingExecutor(max_workers=2, max_queue_size=2)
+    hashed = hash_password(DEFAULT_PASSWORD)
+
+    jobs = [
+        executor.run(verify_password, DEFAULT_PASSWORD, hashed),
+        executor.run(verify_password, DEFAULT_PASSWORD, hashed),
+    ]
+    assert await asyncio.gather(*jobs) == [True, True]
+    assert executor.queue_depth == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hashing_executor_failure_queue_full():
+    executor = PasswordHashingExecutor(max_workers=1, max_queue_size=1)
+    hashed = hash_password(DEFAULT_PASSWORD)
+
+    running = asyncio.create_task(
+        executor.run(verify_password, DEFAULT_PASSWORD, hashed)
+    )
+    await asyncio.sleep(0)
+    assert executor.queue_depth == 1
+
+    with pytest.raises(PasswordHashingBusyError):
+        await executor.run(verify_password, DEFAULT_PASSWORD, hashed)
+
+    assert await running
+    assert executor.queue_depth == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_hashing_executor_process_pool():
+    executor = PasswordHashingExecutor(kind="process", max_workers=1)
+    hashed = await executor.run(hash_password, DEFAULT_PASSWORD)
+    assert verify_password(DEFAULT_PASSWORD, hashed)
+    executor.shutdown()
@@ -1,5 +1,26 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
 import bcrypt
 
+from src.auth.exceptions import PasswordHashingBusyError
+from src.config import hashing_settings
+from src.metrics.registry import registry
+from src.tracing.tracer import tracer
+
+PASSWORD_HASHING_DURATION = registry.histogram(
+    "password_hashing_duration_seconds",
+    "Duration of bcrypt jobs, including the wait for a pool worker.",
+    ("operation",),
+)
+PASSWORD_HASHING_REJECTED = registry.counter(
+    "password_hashing_rejected",
+    "bcrypt jobs rejected because the hashing queue was full.",
+)
+
 
 def hash_password(password: str) -> str:
     salt = bcrypt.gensalt()
@@ -9,3 +30,98 @@ def hash_password(password: str) -> str:
 
 def verify_password(password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password.encode(), hashed_password.encode())
+
+
+# Executor
+
+
+class PasswordHashingExecutor:
+    """
+    Run bcrypt jobs in a thread or process pool, off the event loop.
+
+    At most `max_queue_size` jobs can be pending (running or waiting for a
+    worker) at once; further submissions are rejected with
+    `PasswordHashingBusyError` instead of queueing without limit.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: int | None = None,
+        max_queue_size: int = 64,
+    ):
+        self.kind = kind
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue_size = max_queue_size
+        self._executor: Executor | None = None
+        self._pending = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of submitted jobs that have not completed yet."""
+        return self._pending
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="password-hashing",
+                )
+        return self._executor
+
+    async def run(self, func, *args):
+        if self._pending >= self.max_queue_size:
+            PASSWORD_HASHING_REJECTED.inc()
+            raise PasswordHashingBusyError
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self._get_executor(), partial(func, *args)
+            )
+        finally:
+            self._pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_executor = PasswordHashingExecutor(
+    kind=hashing_settings.HASHING_EXECUTOR,
+    max_workers=hashing_settings.HASHING_MAX_WORKERS,
+    max_queue_size=hashing_settings.HASHING_MAX_QUEUE_SIZE,
+)
+
+registry.gauge(
+    "password_hashing_queue_depth",
+    "bcrypt jobs submitted and not completed yet.",
+    function=lambda: hashing_executor.queue_depth,
+)
+
+_hash_duration = PASSWORD_HASHING_DURATION.labels("hash")
+_verify_duration = PASSWORD_HASHING_DURATION.labels("verify")
+
+
+async def hash_password_async(password: str) -> str:
+    start = time.perf_counter()
+    try:
+        with tracer.start_span("hash_password"):
+            return await hashing_executor.run(hash_password, password)
+    finally:
+        _hash_duration.observe(time.perf_counter() - start)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    start = time.perf_counter()
+    try:
+        with tracer.start_span("verify_password"):
+            return await hashing_executor.run(
+                verify_password, password, hashed_password
+            )
+    finally:
+        _verify_duration.observe(time.perf_counter() - start)
@@ -0,0 +1,120 @@
+from contextlib import ExitStack
+from datetime import datetime
+from unittest.mock import AsyncMock, patch
+
+from src.database import database
+from src.dependencies import get_db
+
+DB_BACKENDS = ("mock", "postgres")
+CELERY_BACKENDS = ("stub", "broker")
+
+BENCHMARK_EMAIL_DOMAIN = "benchmark.example.com"
+
+
+class EnqueuedEmails:
+    """
+    Stubbed Celery: enqueuing returns at once and the verification codes are
+    kept, so the activation requests can use them.
+    """
+
+    def __init__(self):
+        self.codes: dict[str, str] = {}
+        self.confirmations = 0
+
+    def send_verification_email(self, args: tuple, kwargs=None, **options):
+        email, code = args
+        self.codes[email] = code
+
+    def send_confirmation_email(self, email: str):
+        self.confirmations += 1
+
+
+def _mock_db_fetch_one(password_hash: str):
+    """
+    Answer the user queries like the database would for a fresh user.
+    """
+
+    async def fetch_one(query: str, values: dict | None = None, read_only=False):
+        values = values or {}
+        if "INSERT INTO user_data" in query:
+            return {
+                "id": 1,
+                "user_id": 1,
+                "email": values["email"],
+                "password_hash": values["password_hash"],
+                "is_active": False,
+                "verification_id": 1,
+                "code": values.get("code"),
+                "created_at": datetime.now(),
+            }
+        if "UPDATE user_data" in query:
+            return {
+                "id": values["user_id"],
+                "email": f"user@{BENCHMARK_EMAIL_DOMAIN}",
+                "password_hash": password_hash,
+                "is_active": True,
+                "was_active": False,
+            }
+        if "FROM user_data" in query:
+            return {
+                "id": 1,
+                "email": values["email"],
+                "password_hash": password_hash,
+                "is_active": False,
+            }
+        return None
+
+    return fetch_one
+
+
+def setup_mock_db(stack: ExitStack, app, mock_db, password_hash: str):
+    """
+    Serve the requests from `mock_db` and skip the database connection.
+    `password_hash` is the hash of the password used by the benchmark users.
+    """
+    mock_db.fetch_one = AsyncMock(side_effect=_mock_db_fetch_one(password_hash))
+    mock_db.fetch_all = AsyncMock(return_value=[])
+    mock_db.execute = AsyncMock(return_value="")
+    mock_db.connect = AsyncMock()
+    mock_db.disconnect = AsyncMock()
+    stack.enter_context(patch("src.main.database", mock_db))
+    app.dependency_overrides[get_db] = lambda: mock_db
+
+
+def setup_celery_stub(stack: ExitStack) -> EnqueuedEmails:
+    emails = EnqueuedEmails()
+    stack.enter_context(
+        patch(
+            "src.user.service.send_verification_email.apply_async",
+            emails.send_verification_email,
+        )
+    )
+    stack.enter_context(
+        patch(
+            "src.user.service.send_confirmation_email.delay",
+            emails.send_confirmation_email,
+        )
+    )
+    return emails
+
+
+async def get_postgres_verification_code(email: str) -> str | None:
+    query = """
+        SELECT code
+        FROM user_verification
+        WHERE user_id = (SELECT id FROM user_data WHERE email = :email)
+        ORDER BY created_at DESC
+        LIMIT 1;
+    """
+    row = await database.fetch_one(query, {"email": email})
+    return row["code"] if row else None
+
+
+async def delete_postgres_users(email_prefix: str):
+    query = """
+        DELETE FROM user_data
+        WHERE email LIKE :pattern;
+    """
+    await database.execute(
+        query, {"pattern": f"{email_prefix}%@{BENCHMARK_EMAIL_DOMAIN}"}
+    )
@@ -0,0 +1,138 @@
+"""
+Load benchmark of the user endpoints, run by `python -m src.benchmarks.load`.
+
+It is collected by pytest only when given explicitly, so it reuses the
+`conftest.py` fixtures (app, client, mock_db, fake user) without being part
+of the test suite.
+"""
+
+import asyncio
+import time
+from contextlib import ExitStack
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from fastapi import status
+
+from src.auth.utils import hash_password
+from src.benchmarks import backends, phases
+from src.benchmarks.stats import summarize
+from src.config import task_publisher_settings
+from src.ratelimit.limiter import rate_limiter
+from src.user.tests.conftest import fake_user_password
+from src.user.tests.utils import post_activate_user, post_register_user
+from src.workers.publisher import task_publisher
+
+__all__ = ["fake_user_password"]  # reused fixture
+
+
+@pytest.fixture
+def email_prefix():
+    return f"bench-{uuid4().hex[:8]}-"
+
+
+@pytest.fixture
+def backend(bench_config, app, mock_db, fake_user_password):
+    """
+    Patch the configured backends in before the `client` fixture starts the app.
+    Yield the stubbed Celery, or None when using the broker.
+    """
+    with ExitStack() as stack:
+        # every request comes from the same client IP
+        stack.enter_context(patch.object(rate_limiter, "enabled", False))
+        if bench_config.db == "mock":
+            password_hash = hash_password(fake_user_password)
+            backends.setup_mock_db(stack, app, mock_db, password_hash)
+        emails = None
+        if bench_config.celery == "stub":
+            emails = backends.setup_celery_stub(stack)
+        else:
+            # the app fixture disables the task publisher for mocked tasks
+            stack.enter_context(
+                patch.object(
+                    task_publisher,
+                    "enabled",
+                    task_publisher_settings.TASK_PUBLISHER_ENABLED,
+                )
+            )
+        phases.instrument(stack)
+        yield emails
+
+
+async def run_route(send, indexes: range, concurrency: int, expected_status: int):
+    """
+    Send one request per index with `concurrency` requests in flight.
+    Return the route results.
+    """
+    durations = []
+    request_phases = []
+    status_codes: dict[str, int] = {}
+    pending = iter(indexes)
+
+    async def worker():
+        for index in pending:
+            recorded = phases.start_request()
+            start = time.perf_counter()
+            response = await send(index)
+            durations.append(time.perf_counter() - start)
+            request_phases.append(recorded)
+            code = str(response.status_code)
+            status_codes[code] = status_codes.get(code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": len(durations),
+        "errors": len(durations) - status_codes.get(str(expected_status), 0),
+        "status_codes": status_codes,
+        "rps": len(durations) / elapsed if elapsed else 0.0,
+        "latency_ms": summarize(durations),
+        "phases": {
+            phase: summarize([recorded[phase] for recorded in request_phases])
+            for phase in phases.PHASE_TARGETS
+        },
+    }
+
+
+@pytest.mark.asyncio
+async def test_user_endpoints(
+    bench_config,
+    backend,
+    client,
+    email_prefix,
+    fake_user_password,
+):
+    def email(index: int) -> str:
+        return f"{email_prefix}{index}@{backends.BENCHMARK_EMAIL_DOMAIN}"
+
+    async def register(index: int):
+        return await post_register_user(client, email(index), fake_user_password)
+
+    async def activate(index: int):
+        code = "1234"
+        if bench_config.db == "postgres":
+            if backend is not None:
+                code = backend.codes.get(email(index), "")
+            else:
+                code = await backends.get_postgres_verification_code(email(index))
+        return await post_activate_user(client, email(index), fake_user_password, code)
+
+    # warmup requests use their own users and are not measured
+    warmup = range(bench_config.requests, bench_config.requests + bench_config.warmup)
+    measured = range(bench_config.requests)
+    routes = [
+        ("POST /users/register", register, status.HTTP_201_CREATED),
+        ("PATCH /users/activate", activate, status.HTTP_200_OK),
+    ]
+    try:
+        for route, send, expected_status in routes:
+            await run_route(send, warmup, bench_config.concurrency, expected_status)
+            bench_config.results[route] = await run_route(
+                send, measured, bench_config.concurrency, expected_status
+            )
+    finally:
+        if bench_config.db == "postgres":
+            await backends.delete_postgres_users(email_prefix)
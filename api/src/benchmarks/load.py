@@ -0,0 +1,150 @@
+"""
+In-process load benchmark of the user endpoints.
+
+Drives the FastAPI app through `httpx.ASGITransport` and reports, for
+`POST /users/register` and `PATCH /users/activate`, the requests per second,
+the p50/p95/p99 latencies and the time spent in the bcrypt, DB and enqueue
+phases of each request.
+
+Backends:
+- `--db mock`: the `mock_db` fixture answers the queries.
+- `--db postgres`: the database configured by `DATABASE_URL`.
+- `--celery stub`: enqueuing tasks is stubbed out.
+- `--celery broker`: tasks are sent to the configured broker.
+
+Usage:
+    python -m src.benchmarks.load --db mock --output results.json
+    python -m src.benchmarks.load --baseline results.json --max-p99-regression 10
+"""
+
+import argparse
+import json
+import platform
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.benchmarks import backends
+from src.benchmarks.stats import find_p99_regressions
+from src.config import hashing_settings
+
+BENCHMARK_FILE = Path(__file__).parent / "bench_user.py"
+
+
+class BenchmarkConfig:
+    def __init__(
+        self,
+        db: str = "mock",
+        celery: str = "stub",
+        requests: int = 200,
+        concurrency: int = 16,
+        warmup: int = 10,
+    ):
+        self.db = db
+        self.celery = celery
+        self.requests = requests
+        self.concurrency = concurrency
+        self.warmup = warmup
+        self.results: dict[str, dict] = {}
+
+
+class BenchmarkPlugin:
+    """
+    Hand the configuration to the benchmark and collect its results.
+    """
+
+    def __init__(self, config: BenchmarkConfig):
+        self.config = config
+
+    @pytest.fixture
+    def bench_config(self) -> BenchmarkConfig:
+        return self.config
+
+
+def run(config: BenchmarkConfig) -> dict:
+    exit_code = pytest.main(
+        ["-q", "-p", "no:cacheprovider", str(BENCHMARK_FILE)],
+        plugins=[BenchmarkPlugin(config)],
+    )
+    if exit_code != pytest.ExitCode.OK:
+        raise RuntimeError(f"Benchmark run failed with exit code {exit_code}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "db": config.db,
+            "celery": config.celery,
+            "requests": config.requests,
+            "concurrency": config.concurrency,
+            "warmup": config.warmup,
+            "hashing_executor": hashing_settings.HASHING_EXECUTOR,
+        },
+        "routes": config.results,
+    }
+
+
+def print_results(results: dict):
+    for route, result in results["routes"].items():
+        latency = result["latency_ms"]
+        print(
+            f"{route}: {result['requests']} requests, {result['errors']} errors "
+            f"{result['status_codes']}, {result['rps']:.1f} req/s"
+        )
+        print(
+            f"  {'total':<8} p50 {latency['p50']:8.2f}ms  "
+            f"p95 {latency['p95']:8.2f}ms  p99 {latency['p99']:8.2f}ms"
+        )
+        for phase, phase_latency in result["phases"].items():
+            print(
+                f"  {phase:<8} p50 {phase_latency['p50']:8.2f}ms  "
+                f"p95 {phase_latency['p95']:8.2f}ms  p99 {phase_latency['p99']:8.2f}ms"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="User endpoints load benchmark.")
+    parser.add_argument("--db", choices=backends.DB_BACKENDS, default="mock")
+    parser.add_argument("--celery", choices=backends.CELERY_BACKENDS, default="stub")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--output", type=Path, help="save the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="results of a previous run")
+    parser.add_argument(
+        "--max-p99-regression",
+        type=float,
+        default=10.0,
+        help="fail when a route p99 is this many percent above the baseline",
+    )
+    args = parser.parse_args()
+
+    results = run(
+        BenchmarkConfig(
+            db=args.db,
+            celery=args.celery,
+            requests=args.requests,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+        )
+    )
+    print_results(results)
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = find_p99_regressions(
+            results, baseline, args.max_p99_regression
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import inspect
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from pkgutil import resolve_name
+from unittest.mock import patch
+
+# Callables timed for each phase of a request. Service modules call CRUD
+# functions and tasks through their module, so patching them there is enough.
+PHASE_TARGETS = {
+    "bcrypt": [
+        "src.user.service.hash_password_async",
+        "src.auth.dependencies.verify_password_async",
+    ],
+    "db": [
+        "src.user.crud.create_user_with_verification",
+        "src.user.crud.activate_user_with_code",
+        "src.user.crud.create_user_if_not_registered",
+        "src.user.crud.create_user_verification",
+        "src.user.crud.get_valid_user_verification",
+        "src.user.crud.activate_user",
+        "src.user.crud.delete_user_verification",
+        "src.auth.dependencies.get_user_by_email",
+    ],
+    "enqueue": [
+        "src.user.service.delay",
+        "src.outbox.crud.create_outbox_task",
+    ],
+}
+
+# phase -> seconds spent in it by the request being served
+_request_phases: ContextVar[dict[str, float] | None] = ContextVar(
+    "benchmark_request_phases", default=None
+)
+
+
+def _add(phase: str, start: float):
+    phases = _request_phases.get()
+    if phases is not None:
+        phases[phase] = phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+def timed(phase: str, func):
+    """
+    Wrap `func` so the time spent in it is added to the current request phase.
+    """
+    if inspect.iscoroutinefunction(func):
+
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                _add(phase, start)
+
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _add(phase, start)
+
+    return wrapper
+
+
+def instrument(stack: ExitStack):
+    """
+    Time every phase target until `stack` is closed.
+    Must be entered after the backends are patched, so their stubs get timed.
+    """
+    for phase, targets in PHASE_TARGETS.items():
+        for target in targets:
+            stack.enter_context(patch(target, timed(phase, resolve_name(target))))
+
+
+def start_request() -> dict[str, float]:
+    """
+    Start recording the phases of a request served by the current task.
+    """
+    phases = {phase: 0.0 for phase in PHASE_TARGETS}
+    _request_phases.set(phases)
+    return phases
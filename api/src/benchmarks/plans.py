@@ -0,0 +1,134 @@
+"""
+Check that the user queries keep the plans the schema in `db/init.sql` was
+designed for, e.g. the login lookup answered by an index-only scan on the
+covering email index.
+
+Test databases hold a handful of rows, on which the planner prefers
+sequential scans whatever the indexes: the checks disable them, so they
+assert that an index can serve the query, not that it is the cheapest plan
+for the current data.
+
+Usage: python -m src.benchmarks.plans
+Exits with status 1 if a plan does not hold.
+"""
+
+import asyncio
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Iterator
+
+import src.user.crud as user_crud
+from src.database import Database, database
+
+
+class QueryRecorder:
+    """
+    Stands in for the database to capture the query of a CRUD function.
+    """
+
+    def __init__(self):
+        self.query: str | None = None
+        self.values: dict = {}
+
+    async def fetch_one(self, query: str, values: dict | None = None, **kwargs):
+        self.query, self.values = query, values or {}
+        return None
+
+    async def fetch_all(self, query: str, values: dict | None = None, **kwargs):
+        self.query, self.values = query, values or {}
+        return []
+
+
+async def capture_query(func, *args) -> tuple[str, dict]:
+    recorder = QueryRecorder()
+    await func(recorder, *args)
+    return recorder.query, recorder.values
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    query: str
+    values: dict = field(default_factory=dict)
+    node_type: str = "Index Only Scan"
+    index_name: str | None = None
+
+
+async def get_plan_checks() -> list[PlanCheck]:
+    query, values = await capture_query(
+        user_crud.get_user_by_email, "user@example.com"
+    )
+    return [
+        PlanCheck(
+            "login lookup",
+            query,
+            values,
+            node_type="Index Only Scan",
+            index_name="user_data_email_key",
+        ),
+        PlanCheck(
+            "inactive users",
+            "SELECT id FROM user_data WHERE is_active = FALSE;",
+            node_type="Index Only Scan",
+            index_name="idx_user_data_inactive",
+        ),
+    ]
+
+
+def plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def plan_matches(plan: dict, check: PlanCheck) -> bool:
+    return any(
+        node["Node Type"] == check.node_type
+        and (check.index_name is None or node.get("Index Name") == check.index_name)
+        for node in plan_nodes(plan)
+    )
+
+
+async def explain(db: Database, query: str, values: dict) -> dict:
+    async with db.transaction():
+        await db.execute("SET LOCAL enable_seqscan = off")
+        await db.execute("SET LOCAL enable_bitmapscan = off")
+        row = await db.fetch_one(f"EXPLAIN (FORMAT JSON) {query}", values)
+    return json.loads(row[0])[0]["Plan"]
+
+
+async def check_plans(db: Database) -> list[str]:
+    """
+    Return a description of each check whose plan does not hold.
+    """
+    failures = []
+    for check in await get_plan_checks():
+        plan = await explain(db, check.query, check.values)
+        if not plan_matches(plan, check):
+            failures.append(
+                f"{check.name}: expected {check.node_type} on {check.index_name}, "
+                f"got {json.dumps(plan)}"
+            )
+    return failures
+
+
+async def run() -> list[str]:
+    await database.connect()
+    try:
+        return await check_plans(database)
+    finally:
+        await database.disconnect()
+
+
+def main():
+    failures = asyncio.run(run())
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+    print("All plans hold.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of the model work done per request on DB rows.
+
+Compares the validated construction (`Model(**row)` then
+`UserPublic(**user.model_dump())`) with the trusted one (`Model.from_row(row)`
+then `user.to_public()`) for the rows handled by register, login and
+activate.
+
+Usage: python -m src.benchmarks.schemas [--number N]
+"""
+
+import argparse
+import timeit
+from datetime import datetime
+
+from src.user.schemas import UserFromDB, UserPublic, UserVerificationFromDB
+
+USER_ROW = {
+    "id": 1,
+    "email": "test@example.com",
+    "password_hash": "$2b$12$q1jZc9H7jm36Eu9TRn0uB.3Bmch9JasnMfhUD8IqdQsUR01afrWDm",
+    "is_active": False,
+}
+VERIFICATION_ROW = {
+    "id": 1,
+    "user_id": 1,
+    "code": "1234",
+    "created_at": datetime.now(),
+}
+
+
+def validated_login():
+    user = UserFromDB(**USER_ROW)
+    return UserPublic(**user.model_dump())
+
+
+def trusted_login():
+    return UserFromDB.from_row(USER_ROW).to_public()
+
+
+def validated_register():
+    user = UserFromDB(**USER_ROW)
+    UserVerificationFromDB(**VERIFICATION_ROW)
+    return UserPublic(**user.model_dump())
+
+
+def trusted_register():
+    user = UserFromDB.from_row(USER_ROW)
+    UserVerificationFromDB.from_row(VERIFICATION_ROW)
+    return user.to_public()
+
+
+def validated_activate():
+    # the authenticated user (login) then the activated user row
+    validated_login()
+    user = UserFromDB(**{**USER_ROW, "is_active": True})
+    return UserPublic(**user.model_dump())
+
+
+def trusted_activate():
+    trusted_login()
+    return UserFromDB.from_row({**USER_ROW, "is_active": True}).to_public()
+
+
+SCENARIOS = {
+    "register": (validated_register, trusted_register),
+    "login": (validated_login, trusted_login),
+    "activate": (validated_activate, trusted_activate),
+}
+
+
+def run(number: int) -> dict[str, dict[str, float]]:
+    """Return the per-request cost in microseconds of each scenario."""
+    results = {}
+    for name, (validated, trusted) in SCENARIOS.items():
+        validated_us = min(timeit.repeat(validated, number=number, repeat=5))
+        trusted_us = min(timeit.repeat(trusted, number=number, repeat=5))
+        results[name] = {
+            "validated_us": validated_us / number * 1e6,
+            "trusted_us": trusted_us / number * 1e6,
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<10} {'validated':>12} {'trusted':>12} {'saved':>12}")
+    for name, result in run(args.number).items():
+        saved = result["validated_us"] - result["trusted_us"]
+        print(
+            f"{name:<10} {result['validated_us']:>10.2f}us "
+            f"{result['trusted_us']:>10.2f}us {saved:>10.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
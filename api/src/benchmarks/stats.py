@@ -0,0 +1,55 @@
+import math
+
+
+def percentile(values: list[float], q: float) -> float:
+    """
+    Nearest-rank percentile of `values` (`q` between 0 and 100).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(durations: list[float]) -> dict[str, float]:
+    """
+    Summarize durations in seconds as milliseconds.
+    """
+    if not durations:
+        return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "mean": sum(durations) / len(durations) * 1000,
+        "p50": percentile(durations, 50) * 1000,
+        "p95": percentile(durations, 95) * 1000,
+        "p99": percentile(durations, 99) * 1000,
+        "max": max(durations) * 1000,
+    }
+
+
+def find_p99_regressions(
+    results: dict,
+    baseline: dict,
+    max_regression: float,
+) -> list[str]:
+    """
+    Compare the p99 latency of each route with the baseline run.
+    Return a description of each route whose p99 grew by more than
+    `max_regression` percent.
+    """
+    regressions = []
+    for route, result in results["routes"].items():
+        baseline_route = baseline.get("routes", {}).get(route)
+        if not baseline_route:
+            continue
+        before = baseline_route["latency_ms"]["p99"]
+        after = result["latency_ms"]["p99"]
+        if before <= 0:
+            continue
+        change = (after - before) / before * 100
+        if change > max_regression:
+            regressions.append(
+                f"{route}: p99 {before:.2f}ms -> {after:.2f}ms "
+                f"(+{change:.1f}% > {max_regression:.1f}%)"
+            )
+    return regressions
@@ -0,0 +1,30 @@
+import pytest
+
+import src.user.crud as user_crud
+from src.benchmarks.plans import PlanCheck, capture_query, plan_matches
+
+
+@pytest.mark.asyncio
+async def test_capture_query_records_crud_query():
+    query, values = await capture_query(
+        user_crud.get_user_by_email, "a@example.com"
+    )
+
+    assert "FROM user_data" in query
+    assert values == {"email": "a@example.com"}
+
+
+def test_plan_matches_nested_node():
+    def check(node_type, index_name):
+        return PlanCheck("login", "", node_type=node_type, index_name=index_name)
+
+    plan = {
+        "Node Type": "Limit",
+        "Plans": [
+            {"Node Type": "Index Only Scan", "Index Name": "user_data_email_key"},
+        ],
+    }
+
+    assert plan_matches(plan, check("Index Only Scan", "user_data_email_key"))
+    assert not plan_matches(plan, check("Index Only Scan", "user_data_pkey"))
+    assert not plan_matches(plan, check("Index Scan", "user_data_email_key"))
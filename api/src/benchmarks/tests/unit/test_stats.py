@@ -0,0 +1,43 @@
+from src.benchmarks.stats import find_p99_regressions, percentile, summarize
+
+
+def results_with_p99(p99: float) -> dict:
+    return {"routes": {"POST /users/register": {"latency_ms": {"p99": p99}}}}
+
+
+def test_percentile_nearest_rank():
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile(values, 100) == 100.0
+
+
+def test_percentile_empty():
+    assert percentile([], 99) == 0.0
+
+
+def test_summarize_in_milliseconds():
+    summary = summarize([0.001, 0.002, 0.003])
+    assert summary["p50"] == 2.0
+    assert summary["max"] == 3.0
+    assert round(summary["mean"], 6) == 2.0
+
+
+def test_find_p99_regressions_above_threshold():
+    regressions = find_p99_regressions(
+        results_with_p99(115.0), results_with_p99(100.0), max_regression=10.0
+    )
+    assert len(regressions) == 1
+    assert regressions[0].startswith("POST /users/register")
+
+
+def test_find_p99_regressions_within_threshold():
+    assert not find_p99_regressions(
+        results_with_p99(105.0), results_with_p99(100.0), max_regression=10.0
+    )
+
+
+def test_find_p99_regressions_ignores_new_routes():
+    assert not find_p99_regressions(
+        results_with_p99(105.0), {"routes": {}}, max_regression=10.0
+    )
@@ -0,0 +1,57 @@
+"""
+Summarize spans exported by the file exporter (`TRACING_EXPORTER=file`).
+
+Prints the p50/p95/p99 duration of each span name, and the end-to-end
+duration of the traces, from the start of their first span to the end of
+their last one (e.g. from the signup request to the SMTP send).
+
+Usage: python -m src.benchmarks.traces traces.jsonl
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from src.benchmarks.stats import summarize
+
+
+def load_spans(path: Path) -> list[dict]:
+    with path.open() as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def summarize_spans(spans: list[dict]) -> dict[str, dict[str, float]]:
+    durations = defaultdict(list)
+    traces = defaultdict(list)
+    for span in spans:
+        durations[span["name"]].append(span["duration_ms"] / 1000)
+        traces[span["trace_id"]].append(span)
+
+    summary = {name: summarize(values) for name, values in durations.items()}
+    summary["trace (end-to-end)"] = summarize(
+        [
+            max(span["start_time"] + span["duration_ms"] / 1000 for span in trace)
+            - min(span["start_time"] for span in trace)
+            for trace in traces.values()
+        ]
+    )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Span duration percentiles.")
+    parser.add_argument("path", type=Path)
+    args = parser.parse_args()
+
+    summary = summarize_spans(load_spans(args.path))
+    print(f"{'span':<45} {'p50':>10} {'p95':>10} {'p99':>10}")
+    for name, durations in sorted(summary.items(), key=lambda item: -item[1]["p99"]):
+        print(
+            f"{name:<45} {durations['p50']:>8.2f}ms "
+            f"{durations['p95']:>8.2f}ms {durations['p99']:>8.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
-from pydantic_settings import BaseSettings
+from typing import Literal
+
+from pydantic import BaseModel
+from pydantic_settings import BaseSettings as _BaseSettings
+from pydantic_settings import SettingsConfigDict
+
+
+class BaseSettings(_BaseSettings):
+    # validators are built on the first instantiation: never for the settings
+    # of subsystems a process does not use
+    model_config = SettingsConfigDict(defer_build=True)
 
 
 class ProjectSettings(BaseSettings):
@@ -13,6 +23,32 @@ class DBSettings(BaseSettings):
     POSTGRES_USER: str
     POSTGRES_PASS: str
     DATABASE_URL: str
+    DB_POOL_MIN_SIZE: int = 5
+    DB_POOL_MAX_SIZE: int = 20
+    DB_POOL_MAX_QUERIES: int = 50000  # queries before a connection is replaced
+    DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME: float = 300.0  # seconds
+    DB_COMMAND_TIMEOUT: float | None = 10.0  # seconds
+    DB_STATEMENT_CACHE_SIZE: int = 100  # prepared statements kept per connection
+    DB_PGBOUNCER_MODE: bool = False  # disables prepared statement caching
+    DATABASE_REPLICA_URLS: list[str] = []  # JSON list, read-only lookups go there
+    DB_REPLICA_MAX_LAG: float = 1.0  # seconds, lagging replicas fall back to primary
+    DB_REPLICA_LAG_CHECK_INTERVAL: float = 1.0  # seconds
+    DB_READ_YOUR_WRITES: bool = True  # keep a request on primary after it writes
+    DB_CONNECTION_BUDGET: int | None = None  # per server, for all API workers together
+
+
+class ServerSettings(BaseSettings):
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 80
+    SERVER_WORKERS: int | None = None  # defaults to the CPUs of the cgroup quota
+
+
+class MigrationSettings(BaseSettings):
+    MIGRATIONS_DIR: str = "/migrations"  # db/migrations, mounted in the containers
+    MIGRATIONS_RUN_ON_STARTUP: bool = False  # apply pending migrations in lifespan
+    MIGRATIONS_LOCK_TIMEOUT: float = 2.0  # seconds a statement waits for its locks
+    MIGRATIONS_LOCK_RETRIES: int = 5
+    MIGRATIONS_BATCH_PAUSE: float = 0.1  # seconds between backfill batches
 
 
 class SMTPSettings(BaseSettings):
@@ -22,6 +58,32 @@ class SMTPSettings(BaseSettings):
     SMTP_USER: str
     SMTP_PASS: str
     SMTP_SENDER: str
+    SMTP_POOL_SIZE: int = 4  # connections kept open per worker process
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_NOOP_AFTER: float = 10.0  # idle seconds before a NOOP liveness check
+    SMTP_BREAKER_FAILURE_THRESHOLD: int = 5  # failures pausing the email queues
+    SMTP_BREAKER_RESET_TIMEOUT: float = 30.0  # seconds before the server is tried again
+    SMTP_RETRY_BACKOFF_BASE: float = 2.0  # seconds, first retry delay (upper bound)
+    SMTP_RETRY_BACKOFF_MAX: float = 300.0  # seconds, cap of the retry delays
+
+
+class EmailBatchSettings(BaseSettings):
+    EMAIL_BATCH_ENABLED: bool = False
+    EMAIL_BATCH_SIZE: int = 100  # flush once this many emails are buffered
+    EMAIL_BATCH_FLUSH_INTERVAL: float = 0.3  # seconds, flush a partial batch
+    EMAIL_BATCH_CONCURRENCY: int = 4  # emails of a batch being sent at once
+
+
+class EmailOutboxSettings(BaseSettings):
+    EMAIL_OUTBOX_ENABLED: bool = False
+    EMAIL_OUTBOX_BATCH_SIZE: int = 500  # tasks published per relay transaction
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 0.5  # seconds between polls when idle
+
+
+class EmailBrownoutSettings(BaseSettings):
+    EMAIL_BROWNOUT_ENABLED: bool = True
+    EMAIL_BROWNOUT_LATENCY_TARGET: float = 15.0  # seconds from code to email sent
+    EMAIL_BROWNOUT_HOLD: float = 30.0  # seconds confirmation emails are deferred
 
 
 class BrokerSettings(BaseSettings):
@@ -35,8 +97,129 @@ class WorkerSettings(BaseSettings):
     CELERY_RESULT_BACKEND: str
 
 
-project_settings = ProjectSettings()
-db_settings = DBSettings()
-smtp_settings = SMTPSettings()
-broker_settings = BrokerSettings()
-worker_settings = WorkerSettings()
+class TaskPublisherSettings(BaseSettings):
+    TASK_PUBLISHER_ENABLED: bool = True  # publish tasks off the event loop
+    TASK_PUBLISHER_BUFFER_SIZE: int = 10_000  # tasks buffered before rejecting
+    TASK_PUBLISHER_BATCH_SIZE: int = 100  # tasks per hand-off to the publisher thread
+    TASK_PUBLISHER_CONFIRM: bool = True  # wait for the broker acknowledgement
+    TASK_PUBLISHER_FAILURE_THRESHOLD: int = 3  # broker errors opening the circuit
+    TASK_PUBLISHER_RESET_TIMEOUT: float = 5.0  # seconds before retrying the broker
+    TASK_PUBLISHER_SHUTDOWN_TIMEOUT: float = 5.0  # seconds to flush at shutdown
+
+
+class HashingSettings(BaseSettings):
+    HASHING_EXECUTOR: Literal["thread", "process"] = "thread"
+    HASHING_MAX_WORKERS: int | None = None  # defaults to the number of CPUs
+    HASHING_MAX_QUEUE_SIZE: int = 64  # pending hash/verify jobs before rejecting
+
+
+class CredentialsCacheSettings(BaseSettings):
+    CREDENTIALS_CACHE_ENABLED: bool = False
+    CREDENTIALS_CACHE_TTL: float = 60.0  # seconds
+    CREDENTIALS_CACHE_MAX_BYTES: int = 1024 * 1024
+
+
+class MetricsSettings(BaseSettings):
+    METRICS_ENABLED: bool = True  # expose /metrics and time HTTP requests
+    METRICS_MULTIPROCESS_INTERVAL: float = 1.0  # seconds, see src/server.py
+
+
+class LoopMonitorSettings(BaseSettings):
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1  # seconds between lag measurements
+    LOOP_LAG_THRESHOLD: float = 0.1  # seconds, lag reported as a blocking call
+    LOOP_BLOCKED_LOG_INTERVAL: float = 60.0  # seconds, at most one stack log
+
+
+class RouteAdmissionLimit(BaseModel):
+    max_concurrency: int  # requests served at once
+    max_queue: int = 0  # requests waiting for a slot, beyond are rejected
+    queue_timeout: float = 0.5  # seconds a request may wait for a slot
+
+
+class AdmissionSettings(BaseSettings):
+    ADMISSION_CONTROL_ENABLED: bool = True
+    # JSON object of route template -> limit
+    ADMISSION_ROUTE_LIMITS: dict[str, RouteAdmissionLimit] = {
+        "/users/register": RouteAdmissionLimit(max_concurrency=16, max_queue=32),
+        "/users/activate": RouteAdmissionLimit(max_concurrency=16, max_queue=32),
+    }
+    ADMISSION_MAX_LOOP_LAG: float = 0.5  # seconds
+    ADMISSION_MAX_HASHING_QUEUE_DEPTH: int = 48  # pending bcrypt jobs
+    ADMISSION_MAX_DB_POOL_WAIT: float = 0.5  # seconds, recent average
+    ADMISSION_RETRY_AFTER: int = 1  # seconds, sent in Retry-After
+
+
+class TokenBucketLimit(BaseModel):
+    capacity: int  # burst size
+    refill_per_second: float  # sustained rate
+
+
+class RateLimitSettings(BaseSettings):
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: Literal["memory", "redis"] = "memory"
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_MEMORY_SHARDS: int = 16
+    RATE_LIMIT_MEMORY_MAX_KEYS: int = 100_000  # least recently used evicted first
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False  # behind a trusted proxy only
+    RATE_LIMIT_TRUSTED_PROXY_HOPS: int = 1  # proxies appending to X-Forwarded-For
+    # JSON objects: {"capacity": ..., "refill_per_second": ...}
+    RATE_LIMIT_REGISTER_PER_IP: TokenBucketLimit = TokenBucketLimit(
+        capacity=10, refill_per_second=10 / 60
+    )
+    RATE_LIMIT_REGISTER_PER_EMAIL: TokenBucketLimit = TokenBucketLimit(
+        capacity=3, refill_per_second=3 / 600
+    )
+    RATE_LIMIT_ACTIVATE_PER_IP: TokenBucketLimit = TokenBucketLimit(
+        capacity=20, refill_per_second=20 / 60
+    )
+    RATE_LIMIT_ACTIVATE_PER_EMAIL: TokenBucketLimit = TokenBucketLimit(
+        capacity=5, refill_per_second=5 / 60
+    )
+
+
+class VerificationSettings(BaseSettings):
+    VERIFICATION_STORE: Literal["postgres", "redis", "memory"] = "postgres"
+    VERIFICATION_REDIS_URL: str = "redis://localhost:6379/0"
+
+
+class TracingSettings(BaseSettings):
+    TRACING_ENABLED: bool = False
+    TRACING_SAMPLE_RATIO: float = 0.1  # share of the traces recorded, 0 to 1
+    TRACING_EXPORTER: Literal["memory", "file"] = "memory"
+    TRACING_FILE_PATH: str = "traces.jsonl"  # JSON lines, one span per line
+    TRACING_MEMORY_MAX_SPANS: int = 10000  # oldest spans are dropped first
+
+
+# Settings are read from the environment on first import, e.g.
+# `from src.config import smtp_settings`: a process only loads (and requires
+# the variables of) the subsystems it uses.
+_SETTINGS_CLASSES = {
+    "project_settings": ProjectSettings,
+    "db_settings": DBSettings,
+    "server_settings": ServerSettings,
+    "migration_settings": MigrationSettings,
+    "smtp_settings": SMTPSettings,
+    "email_batch_settings": EmailBatchSettings,
+    "email_outbox_settings": EmailOutboxSettings,
+    "email_brownout_settings": EmailBrownoutSettings,
+    "broker_settings": BrokerSettings,
+    "worker_settings": WorkerSettings,
+    "task_publisher_settings": TaskPublisherSettings,
+    "hashing_settings": HashingSettings,
+    "credentials_cache_settings": CredentialsCacheSettings,
+    "metrics_settings": MetricsSettings,
+    "loop_monitor_settings": LoopMonitorSettings,
+    "admission_settings": AdmissionSettings,
+    "rate_limit_settings": RateLimitSettings,
+    "verification_settings": VerificationSettings,
+    "tracing_settings": TracingSettings,
+}
+
+
+def __getattr__(name: str):
+    settings_class = _SETTINGS_CLASSES.get(name)
+    if settings_class is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    settings = globals()[name] = settings_class()
+    return settings
@@ -1,16 +1,21 @@
-from unittest.mock import MagicMock, AsyncMock
+from unittest.mock import MagicMock, AsyncMock, patch
 
 import httpx
 import pytest
 from asgi_lifespan import LifespanManager
 
 from src.main import app as fastapi_app
+from src.ratelimit.limiter import rate_limiter
+from src.workers.publisher import task_publisher
 
 
 @pytest.fixture(autouse=True)
 def app():
     fastapi_app.dependency_overrides.clear()
-    yield fastapi_app
+    rate_limiter.store.clear()
+    # tasks go through `.delay()`, which the tests mock
+    with patch.object(task_publisher, "enabled", False):
+        yield fastapi_app
     fastapi_app.dependency_overrides.clear()
 
 
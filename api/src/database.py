@@ -1,5 +1,380 @@
-from databases import Database
+import asyncio
+import itertools
+import re
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from functools import lru_cache, wraps
+
+import asyncpg
 
 from src.config import db_settings as settings
+from src.logging import get_logger
+from src.metrics.registry import registry
+from src.tracing.tracer import tracer
+
+logger = get_logger(__name__)
+
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds",
+    "Duration of the CRUD functions, including their queries.",
+    ("function",),
+)
+DB_POOL_ACQUIRE_WAIT = registry.histogram(
+    "db_pool_acquire_wait_seconds",
+    "Time spent waiting for a pooled connection.",
+    ("pool",),
+)
+
+_NAMED_PARAM = re.compile(r"(?<![:\w]):(\w+)")
+
+# 0 when the replica has replayed everything it received, so an idle primary
+# is not mistaken for replication lag
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM NOW() - pg_last_xact_replay_timestamp()), 0)
+    END
+    ;
+"""
+
+
+@lru_cache(maxsize=256)
+def compile_query(query: str) -> tuple[str, tuple[str, ...]]:
+    """
+    Convert `:name` placeholders to asyncpg `$n` ones.
+    Return the converted query and the parameter names in `$n` order.
+    """
+    names: list[str] = []
+
+    def replace(match: re.Match) -> str:
+        name = match.group(1)
+        if name not in names:
+            names.append(name)
+        return f"${names.index(name) + 1}"
+
+    return _NAMED_PARAM.sub(replace, query), tuple(names)
+
+ACQUIRE_WAIT_SMOOTHING = 0.2  # weight of the last wait in the moving average
+ACQUIRE_WAIT_TTL = 1.0  # seconds
+
+
+def timed_query(func):
+    """
+    Record the duration of a CRUD function, labelled with its name,
+    and trace it in a span named after its module and name.
+    """
+    histogram = DB_QUERY_DURATION.labels(func.__name__)
+    span_name = f"{func.__module__}.{func.__name__}"
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            with tracer.start_span(span_name):
+                return await func(*args, **kwargs)
+        finally:
+            histogram.observe(time.perf_counter() - start)
+
+    return wrapper
+
+
+class Replica:
+    def __init__(self, url: str):
+        self.url = url
+        self.pool: asyncpg.Pool | None = None
+        self.lag: float | None = None  # seconds, None until checked or when down
+        self.connect_failed = False  # last pool creation failed
+
+
+class Database:
+    """
+    Thin layer over an asyncpg pool.
+
+    Queries use `:name` placeholders and a dict of values. Statements are
+    prepared once per connection by the asyncpg statement cache (disabled in
+    PgBouncer mode, where server-side prepared statements cannot be shared
+    between transactions). Rows are returned as `asyncpg.Record`, which can be
+    unpacked with `**row` without copying into a dict.
+
+    Inside `transaction()`, every query of the current task runs on the
+    connection holding the transaction.
+
+    Queries flagged `read_only=True` go to a replica when replicas are
+    configured and their lag is below `replica_max_lag`, otherwise to the
+    primary. With `read_your_writes`, once a request has written (any query
+    not flagged read-only), its following reads stay on the primary.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        min_size: int = 5,
+        max_size: int = 20,
+        max_queries: int = 50000,
+        max_inactive_connection_lifetime: float = 300.0,
+        command_timeout: float | None = None,
+        statement_cache_size: int = 100,
+        pgbouncer_mode: bool = False,
+        replica_urls: list[str] | None = None,
+        replica_max_lag: float = 1.0,
+        replica_lag_check_interval: float = 1.0,
+        read_your_writes: bool = True,
+    ):
+        self.url = url
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_queries = max_queries
+        self.max_inactive_connection_lifetime = max_inactive_connection_lifetime
+        self.command_timeout = command_timeout
+        self.statement_cache_size = 0 if pgbouncer_mode else statement_cache_size
+        self.pgbouncer_mode = pgbouncer_mode
+        self.replicas = [Replica(replica_url) for replica_url in replica_urls or []]
+        self.replica_max_lag = replica_max_lag
+        self.replica_lag_check_interval = replica_lag_check_interval
+        self.read_your_writes = read_your_writes
+        self._pool: asyncpg.Pool | None = None
+        self._replica_cycle = itertools.cycle(self.replicas)
+        self._lag_monitor: asyncio.Task | None = None
+        self._connection: ContextVar[asyncpg.Connection | None] = ContextVar(
+            f"database_connection_{id(self)}", default=None
+        )
+        self._acquire_wait = 0.0
+        self._acquire_wait_at = 0.0
+        self._acquire_waiters = 0
+        self._wrote: ContextVar[bool] = ContextVar(
+            f"database_wrote_{id(self)}", default=False
+        )
+
+    @property
+    def is_connected(self) -> bool:
+        return self._pool is not None
+
+    @property
+    def pool_size(self) -> int:
+        return self._pool.get_size() if self._pool is not None else 0
+
+    @property
+    def pool_idle_size(self) -> int:
+        return self._pool.get_idle_size() if self._pool is not None else 0
+
+    async def _create_pool(self, url: str, **kwargs) -> asyncpg.Pool:
+        return await asyncpg.create_pool(
+            url,
+            **kwargs,
+            min_size=self.min_size,
+            max_size=self.max_size,
+            max_queries=self.max_queries,
+            max_inactive_connection_lifetime=self.max_inactive_connection_lifetime,
+            command_timeout=self.command_timeout,
+            statement_cache_size=self.statement_cache_size,
+        )
+
+    async def connect(self) -> None:
+        if self._pool is not None:
+            return
+        self._pool = await self._create_pool(self.url)
+        if self.replicas:
+            await self.connect_replicas()
+            await self.check_replicas_lag()
+            self._lag_monitor = asyncio.create_task(self._monitor_replicas_lag())
+
+    async def disconnect(self) -> None:
+        if self._pool is None:
+            return
+        if self._lag_monitor is not None:
+            self._lag_monitor.cancel()
+            self._lag_monitor = None
+        for replica in self.replicas:
+            if replica.pool is not None:
+                await replica.pool.close()
+                replica.pool = None
+        await self._pool.close()
+        self._pool = None
+
+    # Replicas
+
+    async def connect_replicas(self) -> None:
+        """
+        Create the pools of the replicas that have none, e.g. that were down
+        at startup. Retried by the lag monitor, so a replica joins the read
+        routing once it is reachable.
+        """
+        for replica in self.replicas:
+            if replica.pool is not None:
+                continue
+            try:
+                # bounded, not to delay the lag checks of the other replicas
+                replica.pool = await self._create_pool(
+                    replica.url, timeout=max(self.replica_lag_check_interval, 1.0)
+                )
+            except Exception as e:  # must not end the lag monitor
+                if not replica.connect_failed:
+                    logger.warning(f"Replica {replica.url} unavailable: {e}")
+                replica.connect_failed = True
+                continue
+            if replica.connect_failed:
+                logger.info(f"Replica {replica.url} connected.")
+            replica.connect_failed = False
+
+    async def check_replicas_lag(self) -> None:
+        for replica in self.replicas:
+            if replica.pool is None:
+                continue
+            try:
+                replica.lag = float(await replica.pool.fetchval(REPLICA_LAG_QUERY))
+            except Exception as e:
+                logger.warning(f"Replica {replica.url} lag check failed: {e}")
+                replica.lag = None
+
+    async def _monitor_replicas_lag(self) -> None:
+        while True:
+            await asyncio.sleep(self.replica_lag_check_interval)
+            await self.connect_replicas()
+            await self.check_replicas_lag()
+
+    def _get_replica_pool(self) -> asyncpg.Pool | None:
+        for _ in range(len(self.replicas)):
+            replica = next(self._replica_cycle)
+            if (
+                replica.pool is not None
+                and replica.lag is not None
+                and replica.lag <= self.replica_max_lag
+            ):
+                return replica.pool
+        return None
+
+    # Connections
+
+    @asynccontextmanager
+    async def _acquire(self, pool: asyncpg.Pool, pool_name: str):
+        primary = pool is self._pool
+        waiting = primary
+        if waiting:
+            self._acquire_waiters += 1
+        start = time.perf_counter()
+        try:
+            async with pool.acquire() as connection:
+                wait = time.perf_counter() - start
+                DB_POOL_ACQUIRE_WAIT.labels(pool_name).observe(wait)
+                if primary:
+                    self._acquire_waiters -= 1
+                    waiting = False
+                    self._acquire_wait += ACQUIRE_WAIT_SMOOTHING * (
+                        wait - self._acquire_wait
+                    )
+                    self._acquire_wait_at = time.monotonic()
+                yield connection
+        finally:
+            if waiting:
+                self._acquire_waiters -= 1
+
+    @property
+    def acquire_wait(self) -> float:
+        """
+        Recent wait for a primary pool connection (seconds, moving average).
+        Reset once no acquisition has happened for `ACQUIRE_WAIT_TTL` and
+        none is pending, so a past burst does not look like a current one.
+        """
+        if (
+            self._acquire_waiters == 0
+            and time.monotonic() - self._acquire_wait_at > ACQUIRE_WAIT_TTL
+        ):
+            return 0.0
+        return self._acquire_wait
+
+    @asynccontextmanager
+    async def connection(self, read_only: bool = False):
+        connection = self._connection.get()
+        if connection is not None:
+            yield connection
+            return
+
+        pool = None
+        if read_only and not self._wrote.get():
+            pool = self._get_replica_pool()
+        elif self.read_your_writes:
+            self._wrote.set(True)
+
+        if pool is not None:
+            async with self._acquire(pool, "replica") as connection:
+                yield connection
+        else:
+            async with self._acquire(self._pool, "primary") as connection:
+                yield connection
+
+    @asynccontextmanager
+    async def transaction(self):
+        connection = self._connection.get()
+        if connection is not None:
+            async with connection.transaction():  # nested: savepoint
+                yield self
+            return
+
+        if self.read_your_writes:
+            self._wrote.set(True)
+        async with self._acquire(self._pool, "primary") as connection:
+            async with connection.transaction():
+                token = self._connection.set(connection)
+                try:
+                    yield self
+                finally:
+                    self._connection.reset(token)
+
+    async def fetch_one(
+        self,
+        query: str,
+        values: dict | None = None,
+        read_only: bool = False,
+    ):
+        sql, args = self._prepare_args(query, values)
+        async with self.connection(read_only) as connection:
+            return await connection.fetchrow(sql, *args)
+
+    async def fetch_all(
+        self,
+        query: str,
+        values: dict | None = None,
+        read_only: bool = False,
+    ) -> list:
+        sql, args = self._prepare_args(query, values)
+        async with self.connection(read_only) as connection:
+            return await connection.fetch(sql, *args)
+
+    async def execute(self, query: str, values: dict | None = None) -> str:
+        sql, args = self._prepare_args(query, values)
+        async with self.connection() as connection:
+            return await connection.execute(sql, *args)
+
+    @staticmethod
+    def _prepare_args(query: str, values: dict | None) -> tuple[str, list]:
+        sql, names = compile_query(query)
+        values = values or {}
+        return sql, [values[name] for name in names]
+
+
+database = Database(
+    settings.DATABASE_URL,
+    min_size=settings.DB_POOL_MIN_SIZE,
+    max_size=settings.DB_POOL_MAX_SIZE,
+    max_queries=settings.DB_POOL_MAX_QUERIES,
+    max_inactive_connection_lifetime=settings.DB_POOL_MAX_INACTIVE_CONNECTION_LIFETIME,
+    command_timeout=settings.DB_COMMAND_TIMEOUT,
+    statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+    pgbouncer_mode=settings.DB_PGBOUNCER_MODE,
+    replica_urls=settings.DATABASE_REPLICA_URLS,
+    replica_max_lag=settings.DB_REPLICA_MAX_LAG,
+    replica_lag_check_interval=settings.DB_REPLICA_LAG_CHECK_INTERVAL,
+    read_your_writes=settings.DB_READ_YOUR_WRITES,
+)
 
-database = Database(settings.DATABASE_URL)
+registry.gauge(
+    "db_pool_size",
+    "Connections open in the primary pool.",
+    function=lambda: database.pool_size,
+)
+registry.gauge(
+    "db_pool_idle",
+    "Idle connections in the primary pool.",
+    function=lambda: database.pool_idle_size,
+)
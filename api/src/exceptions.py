@@ -41,20 +41,42 @@ def register_service_base_exceptions_handlers(app: FastAPI) -> None:
         )
 
 
-def register_all_exception_handlers(app: FastAPI):
-    # static imports
-    register_db_base_exceptions_handlers(app)
-    register_service_base_exceptions_handlers(app)
-
-    # dynamic imports
+# Modules defining `register_exceptions_handlers(app)`. Listed rather than
+# discovered at startup, which would import every package on each boot.
+EXCEPTION_HANDLER_MODULES = (
+    "src.auth.exceptions",
+    "src.outbox.exceptions",
+    "src.ratelimit.exceptions",
+    "src.user.exceptions",
+)
+
+
+def find_exception_handler_modules() -> list[str]:
+    """
+    Walk the packages of `src` for exception handler modules, to check that
+    `EXCEPTION_HANDLER_MODULES` is complete.
+    """
     ignore = ["tests"]
     base_path = Path(__file__).resolve().parents[0]
-    for module_path in base_path.iterdir():
-        if not module_path.is_dir() or module_path in ignore:
+    modules = []
+    for module_path in sorted(base_path.iterdir()):
+        if not module_path.is_dir() or module_path.name in ignore:
             continue
         try:
             dotted = f"src.{module_path.name}.exceptions"
             mod = importlib.import_module(dotted)
-            getattr(mod, "register_exceptions_handlers")(app)
-        except (ModuleNotFoundError, AttributeError):
-            continue  # TODO: log as a warning when not found
+        except ModuleNotFoundError:
+            continue
+        if hasattr(mod, "register_exceptions_handlers"):
+            modules.append(dotted)
+    return modules
+
+
+def register_all_exception_handlers(app: FastAPI):
+    # base handlers
+    register_db_base_exceptions_handlers(app)
+    register_service_base_exceptions_handlers(app)
+
+    # handlers of the packages
+    for dotted in EXCEPTION_HANDLER_MODULES:
+        importlib.import_module(dotted).register_exceptions_handlers(app)
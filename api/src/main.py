@@ -2,18 +2,48 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-from src.config import project_settings
+from src.admission.middleware import AdmissionControlMiddleware
+from src.auth.utils import hashing_executor
+from src.config import (
+    admission_settings,
+    loop_monitor_settings,
+    metrics_settings,
+    migration_settings,
+    project_settings,
+    tracing_settings,
+)
 from src.database import database
 from src.exceptions import register_all_exception_handlers
 from src.logging import setup_logging
+from src.metrics.loop_lag import loop_lag_monitor
+from src.metrics.middleware import MetricsMiddleware
+from src.metrics.multiprocess import multiprocess_metrics
+from src.metrics.router import router as metrics_router
+from src.migrations.runner import run_migrations
+from src.ratelimit.limiter import rate_limiter
+from src.tracing.middleware import TracingMiddleware
 from src.user.router import router as user_router
+from src.user.verification import verification_store
+from src.workers.publisher import task_publisher
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    if migration_settings.MIGRATIONS_RUN_ON_STARTUP:
+        await run_migrations()
     await database.connect()
+    if loop_monitor_settings.LOOP_MONITOR_ENABLED:
+        await loop_lag_monitor.start()
+    await task_publisher.start()
+    await multiprocess_metrics.start()
     yield
+    await multiprocess_metrics.stop()
+    await task_publisher.stop()
+    await loop_lag_monitor.stop()
+    await rate_limiter.close()
+    await verification_store.close()
     await database.disconnect()
+    hashing_executor.shutdown()
 
 
 setup_logging()
@@ -36,4 +66,23 @@ User registration API in Python with FastAPI.
 
 app.include_router(user_router)
 
-register_all_exception_handlers(app)  # automatically load handlers from modules
+# the last middleware added runs first: requests shed by admission control
+# are still traced and counted in the HTTP metrics
+if admission_settings.ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        route_limits=admission_settings.ADMISSION_ROUTE_LIMITS,
+        max_loop_lag=admission_settings.ADMISSION_MAX_LOOP_LAG,
+        max_hashing_queue_depth=admission_settings.ADMISSION_MAX_HASHING_QUEUE_DEPTH,
+        max_db_pool_wait=admission_settings.ADMISSION_MAX_DB_POOL_WAIT,
+        retry_after=admission_settings.ADMISSION_RETRY_AFTER,
+    )
+
+if tracing_settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+
+if metrics_settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics_router)
+
+register_all_exception_handlers(app)  # handlers of EXCEPTION_HANDLER_MODULES
@@ -0,0 +1,138 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+
+from src.config import loop_monitor_settings as settings
+from src.logging import get_logger
+from src.metrics.registry import registry
+
+logger = get_logger(__name__)
+
+EVENT_LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop in running a scheduled callback.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_BLOCKED = registry.counter(
+    "event_loop_blocked",
+    "Times the event loop was blocked for longer than the lag threshold.",
+)
+
+
+class EventLoopLagMonitor:
+    """
+    Measure the event loop lag and report what blocks the loop.
+
+    A task sleeps for `interval` and records how late it wakes up. A watchdog
+    thread checks the heartbeat of that task: when it is older than
+    `interval + threshold`, the loop is blocked right now, so the thread
+    captures the stack of the loop thread and the running task and logs it,
+    at most once per `log_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.1,
+        threshold: float = 0.1,
+        log_interval: float = 60.0,
+        stack_limit: int = 30,
+    ):
+        self.interval = interval
+        self.threshold = threshold
+        self.log_interval = log_interval
+        self.stack_limit = stack_limit
+        self.lag = 0.0  # seconds, last measured lag
+        self._heartbeat = 0.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        self._last_log: float | None = None
+        self._suppressed = 0
+
+    @property
+    def current_lag(self) -> float:
+        """
+        Last measured lag, or how long the loop has been blocked if longer.
+        """
+        if self._task is None:
+            return self.lag
+        return max(self.lag, time.monotonic() - self._heartbeat - self.interval)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="event-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join()
+        self._watchdog = None
+
+    async def _measure(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.lag = max(0.0, now - start - self.interval)
+            self._heartbeat = now
+            EVENT_LOOP_LAG.observe(self.lag)
+
+    def _watch(self) -> None:
+        reported_heartbeat = None
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat  # one report per blocking episode
+            EVENT_LOOP_BLOCKED.inc()
+            self._report(blocked_for)
+
+    def _report(self, blocked_for: float) -> None:
+        now = time.monotonic()
+        if self._last_log is not None and now - self._last_log < self.log_interval:
+            self._suppressed += 1
+            return
+        self._last_log = now
+        suppressed, self._suppressed = self._suppressed, 0
+
+        task = asyncio.current_task(self._loop)
+        task_name = task.get_coro().__qualname__ if task is not None else None
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = (
+            "".join(traceback.format_stack(frame, limit=self.stack_limit))
+            if frame is not None
+            else "(stack unavailable)\n"
+        )
+        logger.warning(
+            f"Event loop blocked for {blocked_for * 1000:.0f}ms "
+            f"(threshold {self.threshold * 1000:.0f}ms, {suppressed} reports "
+            f"suppressed) in task {task_name}:\n{stack}"
+        )
+
+
+loop_lag_monitor = EventLoopLagMonitor(
+    interval=settings.LOOP_MONITOR_INTERVAL,
+    threshold=settings.LOOP_LAG_THRESHOLD,
+    log_interval=settings.LOOP_BLOCKED_LOG_INTERVAL,
+)
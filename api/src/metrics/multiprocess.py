@@ -0,0 +1,98 @@
+"""
+/metrics of all the worker processes of `src.server`.
+
+Each worker writes its metrics, labelled with its `worker` slot, to a file of
+a directory shared by the workers, every `interval` seconds. The worker
+serving a scrape renders its own metrics and the last ones written by the
+others, so every scrape sees all the workers: their counters only reset when
+a worker is restarted, and are summed in queries, e.g.
+`sum without (worker) (rate(http_requests_total[5m]))`.
+
+In a single process (no directory configured), /metrics renders the registry
+alone, without the `worker` label.
+"""
+
+import asyncio
+import json
+import os
+from pathlib import Path
+
+from src.config import metrics_settings as settings
+from src.logging import get_logger
+from src.metrics.registry import MetricsRegistry, registry
+
+logger = get_logger(__name__)
+
+
+class MultiprocessMetrics:
+    def __init__(self, registry: MetricsRegistry, interval: float = 1.0):
+        self.registry = registry
+        self.interval = interval
+        # set by src.server: the directory before forking, the slot in workers
+        self.directory: Path | None = None
+        self.worker: int | None = None
+        self._task: asyncio.Task | None = None
+
+    def _collect(self) -> dict[str, list[str]]:
+        return self.registry.collect({"worker": str(self.worker)})
+
+    def write(self) -> None:
+        path = self.directory / f"{self.worker}.json"
+        tmp_path = self.directory / f".{self.worker}.json.tmp"
+        tmp_path.write_text(json.dumps(self._collect()))
+        os.replace(tmp_path, path)  # readers never see a partial file
+
+    def _read_others(self) -> list[dict[str, list[str]]]:
+        snapshots = []
+        for path in sorted(self.directory.glob("*.json")):
+            if path.stem == str(self.worker):
+                continue
+            try:
+                snapshots.append(json.loads(path.read_text()))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Failed to read the metrics of {path.name}: {e}")
+        return snapshots
+
+    def render(self) -> str:
+        if self.directory is None:
+            return self.registry.render()
+
+        # a metric family is rendered once, with the samples of every worker
+        families: dict[str, list[str]] = {}
+        for snapshot in [self._collect(), *self._read_others()]:
+            for name, lines in snapshot.items():
+                if name in families:
+                    families[name].extend(lines[2:])  # without HELP and TYPE
+                else:
+                    families[name] = list(lines)
+        lines = [line for family in families.values() for line in family]
+        return "\n".join(lines) + "\n"
+
+    async def start(self) -> None:
+        if self.directory is None or self._task is not None:
+            return
+        self.write()
+        self._task = asyncio.create_task(self._write_periodically())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _write_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Failed to write the metrics: {e}")
+
+
+multiprocess_metrics = MultiprocessMetrics(
+    registry, interval=settings.METRICS_MULTIPROCESS_INTERVAL
+)
@@ -0,0 +1,20 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.metrics.multiprocess import multiprocess_metrics
+
+router = APIRouter(
+    tags=["metrics"],
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    """
+    Expose the metrics in the Prometheus text format, of all the workers when
+    served by several processes.
+    """
+    return PlainTextResponse(
+        multiprocess_metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
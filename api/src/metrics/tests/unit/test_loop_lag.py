@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+
+import pytest
+
+from src.metrics.loop_lag import EVENT_LOOP_LAG, EventLoopLagMonitor
+
+
+def block_the_loop(seconds: float):
+    time.sleep(seconds)
+
+
+@pytest.fixture
+async def monitor():
+    monitor = EventLoopLagMonitor(interval=0.01, threshold=0.05, log_interval=60.0)
+    await monitor.start()
+    yield monitor
+    await monitor.stop()
+
+
+@pytest.mark.asyncio
+async def test_lag_measured(monitor):
+    await asyncio.sleep(0.05)
+    lag_sum = EVENT_LOOP_LAG.labels().sum
+    block_the_loop(0.1)
+    await asyncio.sleep(0.05)
+    assert EVENT_LOOP_LAG.labels().sum - lag_sum >= 0.09
+    assert monitor.current_lag < 0.05  # measured again after the block
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_stack_logged(monitor, caplog):
+    caplog.set_level(logging.WARNING, logger="src.metrics.loop_lag")
+    await asyncio.sleep(0.05)
+    block_the_loop(0.2)
+    await asyncio.sleep(0.05)
+
+    (record,) = caplog.records
+    assert "Event loop blocked" in record.message
+    assert "block_the_loop" in record.message
+    assert "test_blocking_call_stack_logged" in record.message
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_logs_rate_limited(monitor, caplog):
+    caplog.set_level(logging.WARNING, logger="src.metrics.loop_lag")
+    for _ in range(3):
+        await asyncio.sleep(0.05)
+        block_the_loop(0.2)
+    await asyncio.sleep(0.05)
+
+    assert len(caplog.records) == 1
+    assert monitor._suppressed == 2
+
+
+@pytest.mark.asyncio
+async def test_current_lag_while_blocked(monitor):
+    await asyncio.sleep(0.05)
+    start = time.monotonic()
+    while time.monotonic() - start < 0.1:
+        pass
+    assert monitor.current_lag >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_stop():
+    monitor = EventLoopLagMonitor(interval=0.01)
+    await monitor.start()
+    await monitor.stop()
+    assert monitor._task is None
+    assert monitor._watchdog is None
@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from src.metrics.multiprocess import MultiprocessMetrics
+from src.metrics.registry import MetricsRegistry
+
+
+def new_worker(directory, slot: int, requests: int) -> MultiprocessMetrics:
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests.", ("route",)).labels("/a").inc(requests)
+    registry.gauge("in_flight", "In flight.").set(slot)
+    metrics = MultiprocessMetrics(registry)
+    metrics.directory = directory
+    metrics.worker = slot
+    return metrics
+
+
+def test_single_process_renders_registry():
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests.").inc()
+
+    assert MultiprocessMetrics(registry).render() == registry.render()
+
+
+def test_render_all_workers(tmp_path):
+    worker_0 = new_worker(tmp_path, 0, requests=3)
+    worker_1 = new_worker(tmp_path, 1, requests=5)
+    worker_0.write()  # stale: worker 0 renders its current values
+    worker_0.registry.counter("other", "Other.")
+    worker_1.write()
+
+    lines = worker_0.render().splitlines()
+
+    assert lines.count("# TYPE requests counter") == 1
+    assert lines.count("# TYPE in_flight gauge") == 1
+    assert 'requests_total{worker="0",route="/a"} 3.0' in lines
+    assert 'requests_total{worker="1",route="/a"} 5.0' in lines
+    assert 'in_flight{worker="0"} 0' in lines
+    assert 'in_flight{worker="1"} 1' in lines
+    assert "# TYPE other counter" in lines
+    # the samples of a metric follow its TYPE line
+    type_index = lines.index("# TYPE requests counter")
+    assert set(lines[type_index + 1 : type_index + 3]) == {
+        'requests_total{worker="0",route="/a"} 3.0',
+        'requests_total{worker="1",route="/a"} 5.0',
+    }
+
+
+def test_render_skips_unreadable_worker(tmp_path):
+    worker_0 = new_worker(tmp_path, 0, requests=3)
+    (tmp_path / "1.json").write_text("{not json")
+
+    lines = worker_0.render().splitlines()
+
+    assert 'requests_total{worker="0",route="/a"} 3.0' in lines
+    assert not any('worker="1"' in line for line in lines)
+
+
+@pytest.mark.asyncio
+async def test_start_writes_periodically(tmp_path):
+    metrics = new_worker(tmp_path, 2, requests=1)
+    metrics.interval = 0.01
+
+    await metrics.start()
+    assert (tmp_path / "2.json").exists()
+    metrics.registry.counter("later", "Later.")
+    await asyncio.sleep(0.05)
+    await metrics.stop()
+
+    assert "later" in (tmp_path / "2.json").read_text()
+    assert not list(tmp_path.glob(".*.tmp"))
+
+
+@pytest.mark.asyncio
+async def test_start_without_directory(tmp_path):
+    metrics = MultiprocessMetrics(MetricsRegistry())
+
+    await metrics.start()
+    await metrics.stop()
+
+    assert metrics._task is None
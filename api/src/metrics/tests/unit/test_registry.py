@@ -0,0 +1,74 @@
+import pytest
+
+from src.metrics.registry import MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_counter_render(registry):
+    counter = registry.counter("jobs", "Jobs done.", ("kind",))
+    counter.labels("a").inc()
+    counter.labels("a").inc(2)
+    assert registry.render() == (
+        "# HELP jobs Jobs done.\n# TYPE jobs counter\n" 'jobs_total{kind="a"} 3.0\n'
+    )
+
+
+def test_labels_child_reused(registry):
+    counter = registry.counter("jobs", "Jobs done.", ("kind",))
+    assert counter.labels("a") is counter.labels("a")
+
+
+def test_labels_wrong_count(registry):
+    counter = registry.counter("jobs", "Jobs done.", ("kind",))
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+
+
+def test_gauge_inc_dec(registry):
+    gauge = registry.gauge("in_flight", "In flight.")
+    gauge.inc()
+    gauge.inc()
+    gauge.dec()
+    assert "in_flight 1.0" in registry.render()
+
+
+def test_gauge_function(registry):
+    registry.gauge("depth", "Depth.", function=lambda: 7)
+    assert "depth 7.0" in registry.render()
+
+
+def test_histogram_cumulative_buckets(registry):
+    histogram = registry.histogram("latency", "Latency.", buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.1)  # upper bounds are inclusive
+    histogram.observe(0.5)
+    histogram.observe(5.0)
+    lines = registry.render().splitlines()
+    assert 'latency_bucket{le="0.1"} 2' in lines
+    assert 'latency_bucket{le="1.0"} 3' in lines
+    assert 'latency_bucket{le="+Inf"} 4' in lines
+    assert "latency_sum 5.65" in lines
+    assert "latency_count 4" in lines
+
+
+def test_histogram_time(registry):
+    histogram = registry.histogram("latency", "Latency.")
+    with histogram.time():
+        pass
+    assert "latency_count 1" in registry.render()
+
+
+def test_register_duplicate(registry):
+    registry.counter("jobs", "Jobs done.")
+    with pytest.raises(ValueError):
+        registry.counter("jobs", "Jobs done.")
+
+
+def test_label_values_escaped(registry):
+    counter = registry.counter("jobs", "Jobs done.", ("kind",))
+    counter.labels('a"b').inc()
+    assert 'jobs_total{kind="a\\"b"} 1.0' in registry.render()
@@ -0,0 +1,75 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi import status
+
+from src.user.tests.mocks.crud import side_effect_crud_create_user_with_verification
+
+
+def get_sample(body: str, prefix: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+@pytest.mark.asyncio
+async def test_get_metrics(client):
+    response = await client.get("/metrics")
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
+    assert "# TYPE db_pool_acquire_wait_seconds histogram" in response.text
+
+
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.create_user_with_verification")
+@patch("src.user.service.hash_password_async")
+@pytest.mark.asyncio
+async def test_metrics_record_request_and_enqueue_failure(
+    mock_hash_password_async,
+    mock_create_user_with_verification,
+    mock_send_verification_email,
+    client,
+):
+    mock_hash_password_async.return_value = (
+        "$2b$12$q1jZc9H7jm36Eu9TRn0uB.3Bmch9JasnMfhUD8IqdQsUR01afrWDm"
+    )
+    mock_create_user_with_verification.side_effect = (
+        side_effect_crud_create_user_with_verification
+    )
+    mock_send_verification_email.side_effect = ConnectionError("broker down")
+    request_count = (
+        'http_request_duration_seconds_count{method="POST",'
+        'route="/users/register",status="201"}'
+    )
+    failures = (
+        "celery_task_enqueue_failures_total"
+        '{task="src.user.tasks.email.send_verification_email"}'
+    )
+    before = (await client.get("/metrics")).text
+
+    response = await client.post(
+        "/users/register",
+        json={"email": "test@example.com", "password": "Password123!?"},
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+    after = (await client.get("/metrics")).text
+    assert get_sample(after, request_count) == get_sample(before, request_count) + 1
+    assert get_sample(after, failures) == get_sample(before, failures) + 1
+    assert (
+        'http_requests_in_progress{method="POST",route="/users/register"} 0.0'
+        in after
+    )
+
+
+@pytest.mark.asyncio
+async def test_metrics_group_non_standard_methods(client):
+    for method in ("FOO", "BAR"):
+        await client.request(method, "/users/register")
+
+    after = (await client.get("/metrics")).text
+    assert 'http_requests_in_progress{method="other",route="unmatched"}' in after
+    assert 'method="FOO"' not in after
+    assert 'method="BAR"' not in after
@@ -0,0 +1,341 @@
+"""
+Versioned schema migrations for the databases created from `db/init.sql`.
+
+Migrations are pairs of SQL files in the migrations directory, applied in
+version order and recorded in the `schema_migrations` table:
+
+    0001_some_change.up.sql
+    0001_some_change.down.sql
+
+A migration runs in a single transaction, unless its file contains the
+`-- migrate:no-transaction` directive: its statements then run one by one,
+outside any transaction, as `CREATE INDEX CONCURRENTLY` requires. It should
+be written to be re-run safely (`IF NOT EXISTS`...) since a failure leaves
+the statements before it applied.
+
+A statement preceded by `-- migrate:batch` is a batched backfill: it is run
+again, each time in its own short transaction, until it affects no rows. It
+must limit the rows it updates, e.g. `WHERE id IN (SELECT ... LIMIT 1000)`.
+
+Statements wait at most `lock_timeout` for their locks, so a migration never
+queues the application traffic behind it for long, and are retried a few
+times when the lock is not obtained. An advisory lock keeps two runners (e.g.
+API replicas starting together) from migrating at the same time: it is
+waited for without a timeout, as long as the other runner migrates.
+
+Usage:
+    python -m src.migrations.runner status
+    python -m src.migrations.runner up [--target VERSION]
+    python -m src.migrations.runner down [--steps N]
+"""
+
+import argparse
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import asyncpg
+
+from src.config import db_settings, migration_settings as settings
+from src.logging import get_logger, setup_logging
+
+logger = get_logger(__name__)
+
+NO_TRANSACTION_DIRECTIVE = "-- migrate:no-transaction"
+BATCH_DIRECTIVE = "-- migrate:batch"
+ADVISORY_LOCK_ID = 7_310_020  # any constant shared by all the runners
+
+_FILE_NAME = re.compile(r"^(\d+)_(\w+)\.(up|down)\.sql$")
+_DOLLAR_QUOTE = re.compile(r"\$(\w*)\$")
+_ROW_COUNT = re.compile(r"(\d+)$")
+
+HISTORY_TABLE_QUERY = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version TEXT PRIMARY KEY,
+        name TEXT NOT NULL,
+        applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+    );
+"""
+
+
+@dataclass
+class Migration:
+    version: str
+    name: str
+    up_path: Path
+    down_path: Path | None
+
+
+def load_migrations(directory: Path) -> list[Migration]:
+    """
+    Return the migrations of `directory` in version order.
+    """
+    files: dict[str, dict[str, Path]] = {}
+    names: dict[str, str] = {}
+    for path in directory.glob("*.sql"):
+        match = _FILE_NAME.match(path.name)
+        if not match:
+            raise ValueError(f"Invalid migration file name: {path.name}")
+        version, name, direction = match.groups()
+        if names.setdefault(version, name) != name:
+            raise ValueError(f"Duplicate migration version: {version}")
+        files.setdefault(version, {})[direction] = path
+
+    migrations = []
+    for version, paths in files.items():
+        if "up" not in paths:
+            raise ValueError(f"Migration {version} has no up file")
+        migrations.append(
+            Migration(version, names[version], paths["up"], paths.get("down"))
+        )
+    return sorted(migrations, key=lambda migration: int(migration.version))
+
+
+def split_statements(sql: str) -> list[str]:
+    """
+    Split a SQL script on the `;` ending its statements. Quoted strings,
+    identifiers, dollar-quoted bodies and comments are kept whole. The
+    comments preceding a statement are part of it.
+    """
+    statements = []
+    start = 0
+    i = 0
+    while i < len(sql):
+        char = sql[i]
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = len(sql) if end == -1 else end + 1
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = len(sql) if end == -1 else end + 2
+        elif char in ("'", '"'):
+            end = sql.find(char, i + 1)
+            while end != -1 and sql.startswith(char, end + 1):  # doubled quote
+                end = sql.find(char, end + 2)
+            i = len(sql) if end == -1 else end + 1
+        elif char == "$" and (match := _DOLLAR_QUOTE.match(sql, i)):
+            end = sql.find(match.group(0), match.end())
+            i = len(sql) if end == -1 else end + len(match.group(0))
+        elif char == ";":
+            statements.append(sql[start : i + 1].strip())
+            start = i + 1
+            i += 1
+        else:
+            i += 1
+
+    rest = sql[start:].strip()
+    if rest and any(
+        line.strip() and not line.strip().startswith("--")
+        for line in rest.splitlines()
+    ):
+        statements.append(rest)
+    return statements
+
+
+def affected_rows(status: str) -> int:
+    """
+    Rows affected according to a command status, e.g. "UPDATE 1000".
+    """
+    match = _ROW_COUNT.search(status)
+    return int(match.group(1)) if match else 0
+
+
+class MigrationRunner:
+    def __init__(
+        self,
+        connection: asyncpg.Connection,
+        migrations: list[Migration],
+        lock_timeout: float = 2.0,
+        lock_retries: int = 5,
+        batch_pause: float = 0.1,
+    ):
+        # Postgres reads a lock_timeout of 0 as no timeout at all
+        if int(lock_timeout * 1000) < 1:
+            raise ValueError(f"lock_timeout must be at least 1ms: {lock_timeout}")
+        self.connection = connection
+        self.migrations = migrations
+        self.lock_timeout = lock_timeout
+        self.lock_retries = lock_retries
+        self.batch_pause = batch_pause
+
+    async def setup(self) -> None:
+        await self.connection.execute("SET statement_timeout = 0")
+        # concurrent CREATE TABLE IF NOT EXISTS can still conflict
+        async with self._exclusive():
+            await self.connection.execute(HISTORY_TABLE_QUERY)
+
+    async def applied_versions(self) -> list[str]:
+        rows = await self.connection.fetch(
+            "SELECT version FROM schema_migrations ORDER BY version::BIGINT;"
+        )
+        return [row["version"] for row in rows]
+
+    async def up(self, target: str | None = None) -> list[Migration]:
+        """
+        Apply the pending migrations, up to `target` included if given.
+        """
+        async with self._exclusive():
+            applied = set(await self.applied_versions())
+            done = []
+            for migration in self.migrations:
+                if target is not None and int(migration.version) > int(target):
+                    break
+                if migration.version in applied:
+                    continue
+                await self._run(migration, migration.up_path, up=True)
+                done.append(migration)
+            return done
+
+    async def down(self, steps: int = 1) -> list[Migration]:
+        """
+        Revert the last `steps` applied migrations.
+        """
+        async with self._exclusive():
+            applied = await self.applied_versions()
+            by_version = {migration.version: migration for migration in self.migrations}
+            done = []
+            for version in list(reversed(applied))[:steps]:
+                migration = by_version.get(version)
+                if migration is None or migration.down_path is None:
+                    raise ValueError(f"Migration {version} cannot be reverted")
+                await self._run(migration, migration.down_path, up=False)
+                done.append(migration)
+            return done
+
+    @asynccontextmanager
+    async def _exclusive(self):
+        # lock_timeout also applies to advisory locks: the other runner is
+        # waited for without any, then the migration statements get theirs
+        await self.connection.execute("SET lock_timeout = 0")
+        await self.connection.execute("SELECT pg_advisory_lock($1);", ADVISORY_LOCK_ID)
+        await self.connection.execute(
+            f"SET lock_timeout = '{int(self.lock_timeout * 1000)}ms'"
+        )
+        try:
+            yield
+        finally:
+            await self.connection.execute(
+                "SELECT pg_advisory_unlock($1);", ADVISORY_LOCK_ID
+            )
+
+    async def _run(self, migration: Migration, path: Path, up: bool) -> None:
+        sql = path.read_text()
+        statements = split_statements(sql)
+        direction = "up" if up else "down"
+        logger.info(f"Migrating {direction} {migration.version}_{migration.name}.")
+
+        if NO_TRANSACTION_DIRECTIVE in sql:
+            for statement in statements:
+                await self._execute(statement)
+            await self._record(migration, up)
+            return
+
+        async def run_in_transaction():
+            async with self.connection.transaction():
+                for statement in statements:
+                    await self._execute(statement)
+                await self._record(migration, up)
+
+        # a lock timeout aborts the whole transaction: it is retried entirely
+        await self._retry_on_lock(run_in_transaction)
+
+    async def _execute(self, statement: str) -> str:
+        if self.connection.is_in_transaction():
+            return await self.connection.execute(statement)
+        if BATCH_DIRECTIVE not in statement:
+            return await self._retry_on_lock(
+                lambda: self.connection.execute(statement)
+            )
+
+        batches = 0
+        while True:
+            status = await self._retry_on_lock(
+                lambda: self.connection.execute(statement)
+            )
+            if affected_rows(status) == 0:
+                break
+            batches += 1
+            await asyncio.sleep(self.batch_pause)
+        logger.info(f"Backfilled in {batches} batch(es).")
+        return status
+
+    async def _retry_on_lock(self, func):
+        for attempt in range(self.lock_retries + 1):
+            try:
+                return await func()
+            except asyncpg.LockNotAvailableError:
+                if attempt == self.lock_retries:
+                    raise
+                logger.warning(
+                    f"Lock not obtained within {self.lock_timeout}s, "
+                    f"retrying ({attempt + 1}/{self.lock_retries})."
+                )
+                await asyncio.sleep(self.lock_timeout * (attempt + 1))
+
+    async def _record(self, migration: Migration, up: bool) -> None:
+        if up:
+            await self.connection.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);",
+                migration.version,
+                migration.name,
+            )
+        else:
+            await self.connection.execute(
+                "DELETE FROM schema_migrations WHERE version = $1;",
+                migration.version,
+            )
+
+
+async def connect_runner(directory: Path | None = None) -> MigrationRunner:
+    connection = await asyncpg.connect(db_settings.DATABASE_URL, command_timeout=None)
+    runner = MigrationRunner(
+        connection,
+        load_migrations(directory or Path(settings.MIGRATIONS_DIR)),
+        lock_timeout=settings.MIGRATIONS_LOCK_TIMEOUT,
+        lock_retries=settings.MIGRATIONS_LOCK_RETRIES,
+        batch_pause=settings.MIGRATIONS_BATCH_PAUSE,
+    )
+    await runner.setup()
+    return runner
+
+
+async def run_migrations() -> None:
+    """
+    Apply the pending migrations, e.g. when the API starts.
+    """
+    runner = await connect_runner()
+    try:
+        await runner.up()
+    finally:
+        await runner.connection.close()
+
+
+async def main(args: argparse.Namespace) -> None:
+    runner = await connect_runner()
+    try:
+        if args.command == "up":
+            done = await runner.up(args.target)
+            logger.info(f"Applied {len(done)} migration(s).")
+        elif args.command == "down":
+            done = await runner.down(args.steps)
+            logger.info(f"Reverted {len(done)} migration(s).")
+        applied = set(await runner.applied_versions())
+        for migration in runner.migrations:
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{migration.version}_{migration.name}: {state}")
+    finally:
+        await runner.connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Database schema migrations.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status")
+    up_parser = subparsers.add_parser("up")
+    up_parser.add_argument("--target", help="last version to apply")
+    down_parser = subparsers.add_parser("down")
+    down_parser.add_argument("--steps", type=int, default=1)
+    setup_logging()
+    asyncio.run(main(parser.parse_args()))
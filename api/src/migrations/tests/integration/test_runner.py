@@ -0,0 +1,69 @@
+import asyncpg
+import pytest
+
+from src.config import db_settings
+from src.migrations.runner import MigrationRunner, load_migrations
+
+
+@pytest.fixture
+async def connection():
+    connection = await asyncpg.connect(db_settings.DATABASE_URL)
+    yield connection
+    await connection.execute("DROP TABLE IF EXISTS migration_test;")
+    await connection.execute(
+        "DELETE FROM schema_migrations WHERE version IN ('9001', '9002');"
+    )
+    await connection.close()
+
+
+@pytest.mark.asyncio
+async def test_migrations_up_and_down(tmp_path, connection):
+    (tmp_path / "9001_create_table.up.sql").write_text(
+        """
+        CREATE TABLE migration_test (id SERIAL PRIMARY KEY, flag BOOLEAN);
+        INSERT INTO migration_test (flag) SELECT NULL FROM generate_series(1, 25);
+        """
+    )
+    (tmp_path / "9001_create_table.down.sql").write_text(
+        "DROP TABLE migration_test;"
+    )
+    (tmp_path / "9002_backfill_and_index.up.sql").write_text(
+        """
+        -- migrate:no-transaction
+        -- migrate:batch
+        UPDATE migration_test SET flag = FALSE
+        WHERE id IN (SELECT id FROM migration_test WHERE flag IS NULL LIMIT 10);
+        CREATE INDEX CONCURRENTLY migration_test_flag_idx ON migration_test(flag);
+        """
+    )
+    (tmp_path / "9002_backfill_and_index.down.sql").write_text(
+        """
+        -- migrate:no-transaction
+        DROP INDEX CONCURRENTLY migration_test_flag_idx;
+        """
+    )
+    runner = MigrationRunner(connection, load_migrations(tmp_path), batch_pause=0)
+    await runner.setup()
+
+    done = await runner.up()
+
+    assert [m.version for m in done] == ["9001", "9002"]
+    assert {"9001", "9002"} <= set(await runner.applied_versions())
+    assert (
+        await connection.fetchval(
+            "SELECT COUNT(*) FROM migration_test WHERE flag IS NULL;"
+        )
+        == 0
+    )
+    assert await connection.fetchval(
+        "SELECT to_regclass('migration_test_flag_idx') IS NOT NULL;"
+    )
+    assert await runner.up() == []  # already applied
+
+    done = await runner.down(steps=1)
+
+    assert [m.version for m in done] == ["9002"]
+    assert "9002" not in await runner.applied_versions()
+    assert not await connection.fetchval(
+        "SELECT to_regclass('migration_test_flag_idx') IS NOT NULL;"
+    )
@@ -0,0 +1,139 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import asyncpg
+import pytest
+
+from src.migrations.runner import (
+    HISTORY_TABLE_QUERY,
+    MigrationRunner,
+    affected_rows,
+    load_migrations,
+    split_statements,
+)
+
+
+def test_split_statements_keeps_quoted_and_dollar_quoted_semicolons():
+    sql = """
+        -- first; still a comment
+        INSERT INTO t VALUES ('a;b', 'it''s;');
+        CREATE FUNCTION f() RETURNS VOID AS $body$ BEGIN PERFORM 1; END; $body$
+            LANGUAGE plpgsql;
+        /* block; comment */ SELECT "odd;name" FROM t
+    """
+
+    statements = split_statements(sql)
+
+    assert len(statements) == 3
+    assert statements[0].startswith("-- first; still a comment")
+    assert statements[0].endswith("VALUES ('a;b', 'it''s;');")
+    assert "PERFORM 1; END; $body$" in statements[1]
+    assert statements[2].endswith('SELECT "odd;name" FROM t')
+
+
+def test_split_statements_drops_trailing_comments():
+    assert split_statements("SELECT 1;\n-- the end\n") == ["SELECT 1;"]
+
+
+def test_affected_rows():
+    assert affected_rows("UPDATE 1000") == 1000
+    assert affected_rows("INSERT 0 3") == 3
+    assert affected_rows("CREATE INDEX") == 0
+
+
+def test_load_migrations_in_version_order(tmp_path):
+    for name in (
+        "0010_later.up.sql",
+        "0002_first.up.sql",
+        "0002_first.down.sql",
+    ):
+        (tmp_path / name).write_text("SELECT 1;")
+
+    migrations = load_migrations(tmp_path)
+
+    assert [m.version for m in migrations] == ["0002", "0010"]
+    assert migrations[0].down_path == tmp_path / "0002_first.down.sql"
+    assert migrations[1].down_path is None
+
+
+@pytest.mark.parametrize(
+    "names",
+    [
+        ["0001_missing_up.down.sql"],
+        ["0001_one.up.sql", "0001_other.up.sql"],
+        ["not_a_migration.sql"],
+    ],
+)
+def test_load_migrations_invalid(tmp_path, names):
+    for name in names:
+        (tmp_path / name).write_text("SELECT 1;")
+
+    with pytest.raises(ValueError):
+        load_migrations(tmp_path)
+
+
+@pytest.mark.asyncio
+async def test_statement_retried_when_lock_not_obtained(tmp_path):
+    (tmp_path / "0001_index.up.sql").write_text(
+        "-- migrate:no-transaction\nCREATE INDEX CONCURRENTLY i ON t(c);"
+    )
+    connection = MagicMock()
+    connection.is_in_transaction.return_value = False
+    connection.execute = AsyncMock(
+        side_effect=[
+            "SET",  # no lock_timeout
+            "SELECT 1",  # advisory lock
+            "SET",  # lock_timeout
+            asyncpg.LockNotAvailableError("lock timeout"),
+            "CREATE INDEX",
+            "INSERT 0 1",  # history
+            "SELECT 1",  # advisory unlock
+        ]
+    )
+    connection.fetch = AsyncMock(return_value=[])
+    runner = MigrationRunner(
+        connection, load_migrations(tmp_path), lock_timeout=0.001, lock_retries=1
+    )
+
+    done = await runner.up()
+
+    assert [m.version for m in done] == ["0001"]
+    statements = [call.args[0] for call in connection.execute.call_args_list]
+    assert statements.count(statements[3]) == 2
+    assert "CREATE INDEX CONCURRENTLY" in statements[3]
+
+
+@pytest.mark.asyncio
+async def test_advisory_lock_waited_for_without_lock_timeout(tmp_path):
+    (tmp_path / "0001_table.up.sql").write_text("CREATE TABLE t (c INT);")
+    connection = MagicMock()
+    connection.is_in_transaction.return_value = True
+    connection.execute = AsyncMock(return_value="SELECT 1")
+    connection.fetch = AsyncMock(return_value=[])
+    runner = MigrationRunner(connection, load_migrations(tmp_path), lock_timeout=2.5)
+
+    await runner.setup()
+    await runner.up()
+
+    statements = [call.args[0] for call in connection.execute.call_args_list]
+    exclusive = [
+        "SET lock_timeout = 0",
+        "SELECT pg_advisory_lock($1);",
+        "SET lock_timeout = '2500ms'",
+    ]
+    unlock = "SELECT pg_advisory_unlock($1);"
+    assert statements == [
+        "SET statement_timeout = 0",
+        *exclusive,
+        HISTORY_TABLE_QUERY,
+        unlock,
+        *exclusive,
+        "CREATE TABLE t (c INT);",
+        "INSERT INTO schema_migrations (version, name) VALUES ($1, $2);",
+        unlock,
+    ]
+
+
+@pytest.mark.parametrize("lock_timeout", [0, 0.0004, -1])
+def test_lock_timeout_rounding_to_0ms_rejected(lock_timeout):
+    with pytest.raises(ValueError):
+        MigrationRunner(MagicMock(), [], lock_timeout=lock_timeout)
@@ -0,0 +1,101 @@
+import json
+from datetime import datetime
+
+from src.database import Database, timed_query
+from src.exceptions import DBBaseError
+from src.outbox.exceptions import EmailOutboxCrudInsertError
+from src.outbox.schemas import EmailOutboxFromDB
+
+
+@timed_query
+async def create_outbox_task(
+    db: Database,
+    task_name: str,
+    args: list,
+    expires_at: datetime | None = None,
+) -> EmailOutboxFromDB:
+    """
+    Store an email task to publish once the current transaction commits.
+    The task is discarded by the worker if it is not run by `expires_at`.
+    """
+
+    query = """
+        INSERT INTO email_outbox (task_name, args, expires_at)
+        VALUES (:task_name, CAST(:args AS JSONB), :expires_at)
+        RETURNING id, task_name, args, created_at, expires_at
+        ;
+    """
+
+    try:
+        row = await db.fetch_one(
+            query,
+            {
+                "task_name": task_name,
+                "args": json.dumps(args),
+                "expires_at": expires_at,
+            },
+        )
+    except Exception as e:
+        raise DBBaseError from e
+
+    if not row:
+        raise EmailOutboxCrudInsertError
+
+    return _outbox_from_row(row)
+
+
+@timed_query
+async def get_pending_outbox_tasks_for_update(
+    db: Database,
+    limit: int,
+) -> list[EmailOutboxFromDB]:
+    """
+    Lock the oldest unpublished tasks, skipping rows locked by other relays.
+    Must be called inside a transaction.
+    """
+
+    query = """
+        SELECT id, task_name, args, created_at, expires_at
+        FROM email_outbox
+        WHERE published_at IS NULL
+        ORDER BY id
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+        ;
+    """
+
+    try:
+        rows = await db.fetch_all(query, {"limit": limit})
+    except Exception as e:
+        raise DBBaseError from e
+
+    return [_outbox_from_row(row) for row in rows]
+
+
+@timed_query
+async def mark_outbox_tasks_published(
+    db: Database,
+    ids: list[int],
+) -> None:
+    """
+    Flag tasks as published so they are no longer drained.
+    """
+
+    query = """
+        UPDATE email_outbox
+        SET published_at = NOW()
+        WHERE id = ANY(:ids)
+        ;
+    """
+
+    try:
+        await db.execute(query, {"ids": ids})
+    except Exception as e:
+        raise DBBaseError from e
+
+
+def _outbox_from_row(row) -> EmailOutboxFromDB:
+    row = dict(row)
+    if isinstance(row["args"], str):
+        row["args"] = json.loads(row["args"])
+    return EmailOutboxFromDB(**row)
@@ -0,0 +1,37 @@
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from src.exceptions import DBBaseError
+
+
+# CRUD errors
+
+
+class EmailOutboxCrudBaseError(DBBaseError):
+    """Base class for database errors related to the email outbox."""
+
+    def __init__(self, message="A database error occurred on the email outbox."):
+        super().__init__(message)
+
+
+class EmailOutboxCrudInsertError(EmailOutboxCrudBaseError):
+    """Raised when an email task cannot be written to the outbox."""
+
+    def __init__(self, message="A database error occurred during outbox insertion."):
+        super().__init__(message)
+
+
+# Handlers
+
+
+def register_crud_exceptions_handlers(app: FastAPI) -> None:
+    @app.exception_handler(EmailOutboxCrudBaseError)
+    async def handle_crud_generic_error(request, exception):
+        return JSONResponse(
+            status_code=exception.status_code,
+            content={"detail": str(exception)},
+        )
+
+
+def register_exceptions_handlers(app: FastAPI) -> None:
+    register_crud_exceptions_handlers(app)
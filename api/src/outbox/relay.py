@@ -0,0 +1,68 @@
+import asyncio
+
+import src.outbox.crud as outbox_crud
+from src.config import email_outbox_settings as settings
+from src.database import Database, database
+from src.logging import get_logger, setup_logging
+from src.workers.celery import celery
+
+logger = get_logger(__name__)
+
+
+async def drain_outbox(db: Database, batch_size: int) -> int:
+    """
+    Publish one batch of pending outbox tasks to the broker.
+
+    Rows are locked with SKIP LOCKED, so several relays can drain the outbox
+    concurrently without publishing the same task twice. Publishing stops at
+    the first broker error: the remaining rows stay pending and are picked up
+    again by a later drain (delivery is at-least-once).
+    """
+
+    async with db.transaction():
+        tasks = await outbox_crud.get_pending_outbox_tasks_for_update(db, batch_size)
+        published_ids = []
+        for task in tasks:
+            try:
+                celery.send_task(
+                    task.task_name, args=task.args, expires=task.expires_at
+                )
+            except Exception as e:
+                logger.warning(f"Failed to publish outbox task ID {task.id}: {e}")
+                break
+            published_ids.append(task.id)
+
+        if published_ids:
+            await outbox_crud.mark_outbox_tasks_published(db, published_ids)
+
+    return len(published_ids)
+
+
+async def run_relay(db: Database, batch_size: int, poll_interval: float) -> None:
+    while True:
+        try:
+            published = await drain_outbox(db, batch_size)
+        except Exception as e:
+            logger.warning(f"Failed to drain the email outbox: {e}")
+            published = 0
+        if published:
+            logger.info(f"Published {published} task(s) from the email outbox.")
+        if published < batch_size:
+            await asyncio.sleep(poll_interval)
+
+
+async def main() -> None:
+    await database.connect()
+    try:
+        await run_relay(
+            database,
+            settings.EMAIL_OUTBOX_BATCH_SIZE,
+            settings.EMAIL_OUTBOX_POLL_INTERVAL,
+        )
+    finally:
+        await database.disconnect()
+
+
+if __name__ == "__main__":
+    setup_logging()
+    asyncio.run(main())
@@ -0,0 +1,11 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class EmailOutboxFromDB(BaseModel):
+    id: int
+    task_name: str
+    args: list
+    created_at: datetime
+    expires_at: datetime | None = None
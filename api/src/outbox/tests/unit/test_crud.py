@@ -0,0 +1,78 @@
+import json
+from datetime import datetime
+from unittest.mock import AsyncMock, ANY
+
+import pytest
+
+from src.exceptions import DBBaseError
+from src.outbox import crud
+from src.outbox.exceptions import EmailOutboxCrudInsertError
+from src.outbox.schemas import EmailOutboxFromDB
+
+TASK_NAME = "src.user.tasks.email.send_verification_email"
+TASK_ARGS = ["test@example.com", "1234"]
+
+
+def fake_db_outbox_task(id_=1):
+    return {
+        "id": id_,
+        "task_name": TASK_NAME,
+        "args": json.dumps(TASK_ARGS),
+        "created_at": datetime.now(),
+        "expires_at": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_create_outbox_task_success():
+    mock_db = AsyncMock()
+    mock_db.fetch_one.return_value = fake_db_outbox_task()
+
+    task = await crud.create_outbox_task(mock_db, TASK_NAME, TASK_ARGS)
+
+    mock_db.fetch_one.assert_called_once_with(
+        ANY,
+        {"task_name": TASK_NAME, "args": json.dumps(TASK_ARGS), "expires_at": None},
+    )
+    assert isinstance(task, EmailOutboxFromDB)
+    assert task.args == TASK_ARGS
+
+
+@pytest.mark.asyncio
+async def test_create_outbox_task_failure_db_error():
+    mock_db = AsyncMock()
+    mock_db.fetch_one.side_effect = Exception()
+
+    with pytest.raises(DBBaseError):
+        await crud.create_outbox_task(mock_db, TASK_NAME, TASK_ARGS)
+
+
+@pytest.mark.asyncio
+async def test_create_outbox_task_failure_not_created():
+    mock_db = AsyncMock()
+    mock_db.fetch_one.return_value = None
+
+    with pytest.raises(EmailOutboxCrudInsertError):
+        await crud.create_outbox_task(mock_db, TASK_NAME, TASK_ARGS)
+
+
+@pytest.mark.asyncio
+async def test_get_pending_outbox_tasks_for_update_success():
+    mock_db = AsyncMock()
+    mock_db.fetch_all.return_value = [fake_db_outbox_task(1), fake_db_outbox_task(2)]
+
+    tasks = await crud.get_pending_outbox_tasks_for_update(mock_db, 10)
+
+    mock_db.fetch_all.assert_called_once_with(ANY, {"limit": 10})
+    query, _ = mock_db.fetch_all.call_args.args
+    assert "FOR UPDATE SKIP LOCKED" in query
+    assert [task.id for task in tasks] == [1, 2]
+
+
+@pytest.mark.asyncio
+async def test_mark_outbox_tasks_published_failure_db_error():
+    mock_db = AsyncMock()
+    mock_db.execute.side_effect = Exception()
+
+    with pytest.raises(DBBaseError):
+        await crud.mark_outbox_tasks_published(mock_db, [1, 2])
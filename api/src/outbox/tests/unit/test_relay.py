@@ -0,0 +1,78 @@
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from src.outbox.relay import drain_outbox
+from src.outbox.schemas import EmailOutboxFromDB
+
+
+def fake_outbox_task(id_):
+    return EmailOutboxFromDB(
+        id=id_,
+        task_name="src.user.tasks.email.send_verification_email",
+        args=[f"user{id_}@example.com", "1234"],
+        created_at=datetime.now(),
+    )
+
+
+@patch("src.outbox.relay.celery.send_task")
+@patch("src.outbox.relay.outbox_crud.mark_outbox_tasks_published")
+@patch("src.outbox.relay.outbox_crud.get_pending_outbox_tasks_for_update")
+@pytest.mark.asyncio
+async def test_drain_outbox_success(
+    mock_crud_get_pending,
+    mock_crud_mark_published,
+    mock_send_task,
+    mock_db,
+):
+    mock_crud_get_pending.return_value = [fake_outbox_task(1), fake_outbox_task(2)]
+
+    published = await drain_outbox(mock_db, batch_size=10)
+
+    assert published == 2
+    mock_crud_get_pending.assert_called_once_with(mock_db, 10)
+    mock_send_task.assert_any_call(
+        "src.user.tasks.email.send_verification_email",
+        args=["user2@example.com", "1234"],
+        expires=None,
+    )
+    mock_crud_mark_published.assert_called_once_with(mock_db, [1, 2])
+
+
+@patch("src.outbox.relay.celery.send_task")
+@patch("src.outbox.relay.outbox_crud.mark_outbox_tasks_published")
+@patch("src.outbox.relay.outbox_crud.get_pending_outbox_tasks_for_update")
+@pytest.mark.asyncio
+async def test_drain_outbox_stops_at_broker_error(
+    mock_crud_get_pending,
+    mock_crud_mark_published,
+    mock_send_task,
+    mock_db,
+):
+    mock_crud_get_pending.return_value = [
+        fake_outbox_task(1),
+        fake_outbox_task(2),
+        fake_outbox_task(3),
+    ]
+    mock_send_task.side_effect = [None, ConnectionError("broker down"), None]
+
+    published = await drain_outbox(mock_db, batch_size=10)
+
+    assert published == 1
+    assert mock_send_task.call_count == 2
+    mock_crud_mark_published.assert_called_once_with(mock_db, [1])
+
+
+@patch("src.outbox.relay.outbox_crud.mark_outbox_tasks_published")
+@patch("src.outbox.relay.outbox_crud.get_pending_outbox_tasks_for_update")
+@pytest.mark.asyncio
+async def test_drain_outbox_empty(
+    mock_crud_get_pending,
+    mock_crud_mark_published,
+    mock_db,
+):
+    mock_crud_get_pending.return_value = []
+
+    assert await drain_outbox(mock_db, batch_size=10) == 0
+    mock_crud_mark_published.assert_not_called()
@@ -0,0 +1,76 @@
+import binascii
+from base64 import b64decode
+
+from fastapi import Request
+from fastapi.security.utils import get_authorization_scheme_param
+
+from src.config import rate_limit_settings as settings
+from src.ratelimit.limiter import rate_limiter
+
+
+def get_client_ip(request: Request) -> str | None:
+    """
+    The client IP, read from X-Forwarded-For when trusted: each proxy appends
+    the address it received the request from, so the entry added by the
+    first of the `RATE_LIMIT_TRUSTED_PROXY_HOPS` trusted proxies is the
+    client. Entries to its left are sent by the client and cannot be trusted.
+    """
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded_for = request.headers.get("X-Forwarded-For", "")
+        addresses = [address.strip() for address in forwarded_for.split(",")]
+        hops = settings.RATE_LIMIT_TRUSTED_PROXY_HOPS
+        if 0 < hops <= len(addresses) and addresses[-hops]:
+            return addresses[-hops]
+    return request.client.host if request.client else None
+
+
+def get_basic_auth_username(request: Request) -> str | None:
+    """
+    Read the Basic Auth username without checking anything else: the
+    credentials are verified later by `get_current_user`.
+    """
+    scheme, param = get_authorization_scheme_param(
+        request.headers.get("Authorization")
+    )
+    if scheme.lower() != "basic":
+        return None
+    try:
+        username, _, _ = b64decode(param).decode().partition(":")
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+    return username.lower() or None
+
+
+async def get_body_email(request: Request) -> str | None:
+    try:
+        body = await request.json()  # already read and cached by FastAPI
+    except ValueError:
+        return None
+    email = body.get("email") if isinstance(body, dict) else None
+    return email.lower() if isinstance(email, str) else None
+
+
+async def rate_limit_register(request: Request):
+    email = await get_body_email(request)
+    await rate_limiter.check(
+        "register",
+        [
+            ("ip", get_client_ip(request), settings.RATE_LIMIT_REGISTER_PER_IP),
+            ("email", email, settings.RATE_LIMIT_REGISTER_PER_EMAIL),
+        ],
+    )
+
+
+async def rate_limit_activate(request: Request):
+    """
+    Runs before `get_current_user`: rejected attempts cost no DB lookup and
+    no bcrypt verification.
+    """
+    email = get_basic_auth_username(request)
+    await rate_limiter.check(
+        "activate",
+        [
+            ("ip", get_client_ip(request), settings.RATE_LIMIT_ACTIVATE_PER_IP),
+            ("email", email, settings.RATE_LIMIT_ACTIVATE_PER_EMAIL),
+        ],
+    )
@@ -0,0 +1,40 @@
+import math
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from src.exceptions import ServiceBaseError
+
+
+# Service errors
+
+
+class RateLimitExceededError(ServiceBaseError):
+    """Raised when a client or an email has no request left for now."""
+
+    status_code = 429
+
+    def __init__(
+        self,
+        retry_after: float = 1.0,
+        message="Too many requests, please retry later.",
+    ):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# Handlers
+
+
+def register_service_exceptions_handlers(app: FastAPI) -> None:
+    @app.exception_handler(RateLimitExceededError)
+    async def handle_rate_limit_exceeded_error(request, exception):
+        return JSONResponse(
+            status_code=exception.status_code,
+            content={"detail": str(exception)},
+            headers={"Retry-After": str(math.ceil(exception.retry_after))},
+        )
+
+
+def register_exceptions_handlers(app: FastAPI) -> None:
+    register_service_exceptions_handlers(app)
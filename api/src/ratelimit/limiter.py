@@ -0,0 +1,66 @@
+from src.config import TokenBucketLimit
+from src.config import rate_limit_settings as settings
+from src.logging import get_logger
+from src.metrics.registry import registry
+from src.ratelimit.exceptions import RateLimitExceededError
+from src.ratelimit.store import InMemoryTokenBucketStore, RedisTokenBucketStore
+
+logger = get_logger(__name__)
+
+RATE_LIMIT_REJECTED = registry.counter(
+    "rate_limit_rejected",
+    "Requests rejected by rate limiting, by route and key kind.",
+    ("route", "key"),
+)
+RATE_LIMIT_STORE_ERRORS = registry.counter(
+    "rate_limit_store_errors",
+    "Rate limit checks skipped because the store failed.",
+)
+
+
+class RateLimiter:
+    def __init__(self, store, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+
+    async def check(
+        self,
+        route: str,
+        keys: list[tuple[str, str | None, TokenBucketLimit]],
+    ) -> None:
+        """
+        Take a token for each (kind, value, limit) key of a request, in order.
+        Raise `RateLimitExceededError` on the first empty bucket. Keys without
+        value are skipped. If the store fails, the request is let through.
+        """
+        if not self.enabled:
+            return
+        for kind, value, limit in keys:
+            if not value:
+                continue
+            try:
+                retry_after = await self.store.consume(
+                    f"{route}:{kind}:{value}", limit
+                )
+            except Exception as e:
+                RATE_LIMIT_STORE_ERRORS.inc()
+                logger.warning(f"Rate limit store failed, request allowed: {e}")
+                return
+            if retry_after > 0:
+                RATE_LIMIT_REJECTED.labels(route, kind).inc()
+                raise RateLimitExceededError(retry_after)
+
+    async def close(self) -> None:
+        await self.store.close()
+
+
+def _build_store():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisTokenBucketStore.from_url(settings.RATE_LIMIT_REDIS_URL)
+    return InMemoryTokenBucketStore(
+        shards=settings.RATE_LIMIT_MEMORY_SHARDS,
+        max_keys=settings.RATE_LIMIT_MEMORY_MAX_KEYS,
+    )
+
+
+rate_limiter = RateLimiter(_build_store(), enabled=settings.RATE_LIMIT_ENABLED)
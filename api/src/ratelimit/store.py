@@ -0,0 +1,107 @@
+import time
+from collections import OrderedDict
+
+from src.config import TokenBucketLimit
+
+# Token bucket updated atomically on the Redis server, with the server clock
+# so every API process refills buckets at the same pace.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local refill_per_second = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * refill_per_second)
+
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / refill_per_second
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / refill_per_second * 1000))
+return tostring(retry_after)
+"""
+
+
+class InMemoryTokenBucketStore:
+    """
+    Token buckets of a single API process.
+
+    Buckets are spread over `shards` LRU dicts by key hash, so evicting the
+    least recently used buckets once `max_keys` is reached stays cheap.
+    """
+
+    def __init__(self, shards: int = 16, max_keys: int = 100_000):
+        self._shards: list[OrderedDict[str, list[float]]] = [
+            OrderedDict() for _ in range(shards)
+        ]
+        self._max_keys_per_shard = max(1, max_keys // shards)
+
+    async def consume(self, key: str, limit: TokenBucketLimit, cost: int = 1) -> float:
+        """
+        Take `cost` tokens from the bucket of `key`.
+        Return 0 if they were available, otherwise the seconds to wait.
+        """
+        shard = self._shards[hash(key) % len(self._shards)]
+        now = time.monotonic()
+        bucket = shard.get(key)
+        if bucket is None:
+            bucket = shard[key] = [float(limit.capacity), now]
+            if len(shard) > self._max_keys_per_shard:
+                shard.popitem(last=False)
+        else:
+            shard.move_to_end(key)
+            tokens, updated_at = bucket
+            bucket[0] = min(
+                limit.capacity, tokens + (now - updated_at) * limit.refill_per_second
+            )
+            bucket[1] = now
+
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return 0.0
+        return (cost - bucket[0]) / limit.refill_per_second
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisTokenBucketStore:
+    """
+    Token buckets shared by every API process, on a Redis-protocol server.
+    """
+
+    def __init__(self, client, key_prefix: str = "ratelimit:"):
+        self.client = client
+        self.key_prefix = key_prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisTokenBucketStore":
+        import redis.asyncio  # only needed with this backend
+
+        return cls(redis.asyncio.from_url(url))
+
+    async def consume(self, key: str, limit: TokenBucketLimit, cost: int = 1) -> float:
+        retry_after = await self._script(
+            keys=[self.key_prefix + key],
+            args=[limit.capacity, limit.refill_per_second, cost],
+        )
+        return float(retry_after)
+
+    def clear(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        await self.client.aclose()
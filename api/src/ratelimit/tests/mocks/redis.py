@@ -0,0 +1,11 @@
+from fakeredis import FakeAsyncRedis
+
+from src.ratelimit.store import RedisTokenBucketStore
+
+
+def fake_redis_store() -> RedisTokenBucketStore:
+    """
+    Redis store backed by an in-process fake server, which runs the Lua
+    token bucket script like Redis does.
+    """
+    return RedisTokenBucketStore(FakeAsyncRedis())
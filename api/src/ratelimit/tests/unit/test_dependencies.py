@@ -0,0 +1,64 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import status
+
+from src.config import TokenBucketLimit
+
+ONE_REQUEST = TokenBucketLimit(capacity=1, refill_per_second=0.01)
+
+
+@patch("src.auth.dependencies.verify_password_async")
+@patch("src.auth.dependencies.get_user_by_email")
+@patch("src.ratelimit.dependencies.settings.RATE_LIMIT_ACTIVATE_PER_EMAIL", ONE_REQUEST)
+@pytest.mark.asyncio
+async def test_activate_rejected_before_authentication(
+    mock_get_user_by_email,
+    mock_verify_password_async,
+    client,
+):
+    mock_get_user_by_email.return_value = None
+    auth = httpx.BasicAuth("Test@Example.com", "wrong")
+
+    response = await client.patch("/users/activate", json={"code": "1234"}, auth=auth)
+    assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    auth = httpx.BasicAuth("test@example.com", "wrong")
+    response = await client.patch("/users/activate", json={"code": "1234"}, auth=auth)
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    assert int(response.headers["retry-after"]) >= 1
+    assert response.json() == {"detail": "Too many requests, please retry later."}
+    mock_get_user_by_email.assert_called_once()
+    mock_verify_password_async.assert_not_called()
+
+
+@patch("src.user.service.register_user")
+@patch("src.ratelimit.dependencies.settings.RATE_LIMIT_REGISTER_PER_IP", ONE_REQUEST)
+@pytest.mark.asyncio
+async def test_register_rejected_per_ip(mock_register_user, client):
+    for email in ("first@example.com", "second@example.com"):
+        response = await client.post(
+            "/users/register", json={"email": email, "password": "Password123!?"}
+        )
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    mock_register_user.assert_called_once()
+
+
+@patch("src.user.service.register_user")
+@patch("src.ratelimit.dependencies.settings.RATE_LIMIT_TRUST_FORWARDED_FOR", True)
+@patch("src.ratelimit.dependencies.settings.RATE_LIMIT_REGISTER_PER_IP", ONE_REQUEST)
+@pytest.mark.asyncio
+async def test_register_rejected_per_ip_with_forged_forwarded_for(
+    mock_register_user, client
+):
+    # the client forges a new leftmost entry on each request, the proxy
+    # appends the address it sees
+    for forged_ip in ("1.1.1.1", "2.2.2.2"):
+        response = await client.post(
+            "/users/register",
+            json={"email": f"{forged_ip}@example.com", "password": "Password123!?"},
+            headers={"X-Forwarded-For": f"{forged_ip}, 203.0.113.7"},
+        )
+    assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+    mock_register_user.assert_called_once()
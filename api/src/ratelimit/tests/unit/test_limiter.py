@@ -0,0 +1,48 @@
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.config import TokenBucketLimit
+from src.ratelimit.exceptions import RateLimitExceededError
+from src.ratelimit.limiter import RATE_LIMIT_REJECTED, RateLimiter
+from src.ratelimit.store import InMemoryTokenBucketStore
+
+LIMIT = TokenBucketLimit(capacity=1, refill_per_second=0.5)
+
+
+@pytest.mark.asyncio
+async def test_check_rejects_and_counts():
+    limiter = RateLimiter(InMemoryTokenBucketStore())
+    rejected = RATE_LIMIT_REJECTED.labels("activate", "email")
+    before = rejected.value
+
+    await limiter.check("activate", [("email", "test@example.com", LIMIT)])
+    with pytest.raises(RateLimitExceededError) as exc_info:
+        await limiter.check("activate", [("email", "test@example.com", LIMIT)])
+
+    assert exc_info.value.retry_after == pytest.approx(2.0, rel=0.01)
+    assert rejected.value == before + 1
+
+
+@pytest.mark.asyncio
+async def test_check_skips_missing_values():
+    store = AsyncMock()
+    limiter = RateLimiter(store)
+    await limiter.check("register", [("email", None, LIMIT)])
+    store.consume.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_disabled():
+    store = AsyncMock()
+    limiter = RateLimiter(store, enabled=False)
+    await limiter.check("register", [("ip", "127.0.0.1", LIMIT)])
+    store.consume.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_check_allows_when_store_fails():
+    store = AsyncMock()
+    store.consume.side_effect = ConnectionError("store down")
+    limiter = RateLimiter(store)
+    await limiter.check("register", [("ip", "127.0.0.1", LIMIT)])
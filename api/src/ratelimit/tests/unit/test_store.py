@@ -0,0 +1,60 @@
+from unittest.mock import patch
+
+import pytest
+
+from src.config import TokenBucketLimit
+from src.ratelimit.store import InMemoryTokenBucketStore
+from src.ratelimit.tests.mocks.redis import fake_redis_store
+
+LIMIT = TokenBucketLimit(capacity=2, refill_per_second=1.0)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store(request):
+    if request.param == "memory":
+        return InMemoryTokenBucketStore(shards=4)
+    return fake_redis_store()
+
+
+@pytest.mark.asyncio
+async def test_consume_burst_then_reject(store):
+    assert await store.consume("ip:1", LIMIT) == 0
+    assert await store.consume("ip:1", LIMIT) == 0
+    retry_after = await store.consume("ip:1", LIMIT)
+    assert 0 < retry_after <= 1.0
+
+
+@pytest.mark.asyncio
+async def test_consume_keys_independent(store):
+    for _ in range(2):
+        await store.consume("ip:1", LIMIT)
+    assert await store.consume("ip:2", LIMIT) == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_consume_refills():
+    store = InMemoryTokenBucketStore()
+    with patch("src.ratelimit.store.time.monotonic", return_value=100.0):
+        for _ in range(2):
+            await store.consume("ip:1", LIMIT)
+        assert await store.consume("ip:1", LIMIT) == pytest.approx(1.0)
+    with patch("src.ratelimit.store.time.monotonic", return_value=101.5):
+        assert await store.consume("ip:1", LIMIT) == 0
+        assert await store.consume("ip:1", LIMIT) == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_memory_evicts_least_recently_used():
+    store = InMemoryTokenBucketStore(shards=1, max_keys=2)
+    for key in ("a", "b", "a", "c"):
+        await store.consume(key, LIMIT)
+    (shard,) = store._shards
+    assert list(shard) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_redis_bucket_expires():
+    store = fake_redis_store()
+    await store.consume("ip:1", LIMIT)
+    ttl = await store.client.pttl("ratelimit:ip:1")
+    assert 0 < ttl <= 2000  # time to refill a full bucket
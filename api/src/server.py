@@ -0,0 +1,280 @@
+"""
+Production server: the app served by several worker processes, forked from
+a parent that imported it first.
+
+The parent imports the app with the garbage collector disabled, then calls
+`gc.freeze()` before forking: the imported modules stay in pages shared
+copy-on-write by the workers, instead of being copied into each of them the
+first time a collection touches their objects' headers. The parent only
+supervises: it restarts workers that die and stops them on SIGTERM/SIGINT.
+
+Each worker runs uvicorn on the shared listening socket, with uvloop and
+httptools when they are installed, and opens its own database pool in the
+app lifespan. Pools are capped so that workers x pool size stays within
+`DB_CONNECTION_BUDGET`. With `MIGRATIONS_RUN_ON_STARTUP`, the parent applies
+the pending migrations once before forking, instead of each worker lifespan.
+
+Each worker labels its metrics with its `worker` slot and shares them with
+the others, so the worker serving /metrics exposes all of them (see
+`src.metrics.multiprocess`).
+
+Usage: python -m src.server [--workers N] [--host HOST] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import gc
+import math
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from importlib.util import find_spec
+from pathlib import Path
+
+import uvicorn
+
+from src.config import server_settings as settings
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+RESPAWN_DELAY = 1.0  # seconds, keeps a crashing worker from spinning
+STOP_SIGNALS = (signal.SIGTERM, signal.SIGINT)
+
+
+def cgroup_cpu_quota(root: Path = CGROUP_ROOT) -> float | None:
+    """
+    CPUs allowed by the cgroup CPU quota (e.g. `docker run --cpus`), or None
+    when unlimited or unknown.
+    """
+    cpu_max = root / "cpu.max"  # cgroup v2: "<quota> <period>" or "max <period>"
+    if cpu_max.exists():
+        quota, period = cpu_max.read_text().split()[:2]
+        return None if quota == "max" else int(quota) / int(period)
+
+    for directory in (root / "cpu", root / "cpu,cpuacct"):  # cgroup v1
+        quota_path = directory / "cpu.cfs_quota_us"
+        period_path = directory / "cpu.cfs_period_us"
+        if quota_path.exists() and period_path.exists():
+            quota = int(quota_path.read_text())
+            return None if quota < 0 else quota / int(period_path.read_text())
+    return None
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> int:
+    """
+    CPUs this process can use: the CPUs it may be scheduled on, capped by the
+    cgroup quota (rounded up, a partial CPU still serves requests).
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cpus = len(os.sched_getaffinity(0))
+    else:
+        cpus = os.cpu_count() or 1
+    quota = cgroup_cpu_quota(root)
+    if quota is not None:
+        cpus = min(cpus, math.ceil(quota))
+    return max(cpus, 1)
+
+
+def pool_size_per_worker(
+    workers: int,
+    budget: int | None,
+    min_size: int,
+    max_size: int,
+) -> tuple[int, int]:
+    """
+    Return the (min, max) pool size of each worker, capped so that all the
+    worker pools together open at most `budget` connections.
+    """
+    if budget is None:
+        return min_size, max_size
+    per_worker = budget // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"A connection budget of {budget} cannot serve {workers} workers"
+        )
+    max_size = min(max_size, per_worker)
+    return min(min_size, max_size), max_size
+
+
+def check_shared_state(
+    workers: int,
+    verification_store: str,
+    rate_limit_backend: str | None,
+) -> None:
+    """
+    Refuse the in-process stores the workers cannot share: a code stored by
+    the worker that registered a user must be found by the one activating it.
+    Rate limits kept in memory still work, but apply to each worker.
+    """
+    if workers == 1:
+        return
+    if verification_store == "memory":
+        raise ValueError(
+            f"The memory verification store cannot be shared by {workers} "
+            "workers: use the postgres or redis store, or a single worker"
+        )
+    if rate_limit_backend == "memory":
+        logger.warning(
+            f"Rate limits are kept in each of the {workers} workers: clients "
+            f"get up to {workers} times the limits. Use the redis backend to "
+            "share them."
+        )
+
+
+def build_config(app, host: str, port: int) -> uvicorn.Config:
+    loop = "uvloop" if find_spec("uvloop") else "asyncio"
+    http = "httptools" if find_spec("httptools") else "h11"
+    logger.info(f"Serving with the {loop} event loop and the {http} HTTP parser.")
+    return uvicorn.Config(app, host=host, port=port, loop=loop, http=http)
+
+
+class Supervisor:
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        sock: socket.socket,
+        workers: int,
+        metrics=None,
+    ):
+        self.config = config
+        self.sock = sock
+        self.workers = workers
+        self.metrics = metrics  # MultiprocessMetrics shared by the workers
+        self.children: dict[int, int] = {}  # pid: worker slot
+        self.stopping = False
+
+    def spawn(self, slot: int) -> None:
+        # a stop signal is held until the new worker is known, so it is stopped
+        signal.pthread_sigmask(signal.SIG_BLOCK, STOP_SIGNALS)
+        pid = os.fork()
+        if pid:
+            self.children[pid] = slot
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+            return
+
+        # worker: uvicorn installs its own signal handlers
+        for signum in STOP_SIGNALS:
+            signal.signal(signum, signal.SIG_DFL)
+        signal.pthread_sigmask(signal.SIG_UNBLOCK, STOP_SIGNALS)
+        gc.enable()
+        if self.metrics is not None:
+            # a restarted worker takes over the metrics of the one it replaces
+            self.metrics.worker = slot
+        exit_code = 1
+        try:
+            uvicorn.Server(self.config).run(sockets=[self.sock])
+            exit_code = 0
+        finally:
+            os._exit(exit_code)
+
+    def stop(self, signum, frame) -> None:
+        self.stopping = True
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        # before forking: a signal received while starting stops the workers
+        # already forked, instead of killing the parent alone
+        for signum in STOP_SIGNALS:
+            signal.signal(signum, self.stop)
+        for slot in range(self.workers):
+            if self.stopping:
+                break
+            self.spawn(slot)
+        logger.info(f"Started {self.workers} worker(s).")
+
+        while self.children:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot = self.children.pop(pid, None)
+            if slot is not None and not self.stopping:
+                exit_code = os.waitstatus_to_exitcode(status)
+                logger.warning(f"Worker {pid} exited with code {exit_code}.")
+                time.sleep(RESPAWN_DELAY)
+                if not self.stopping:
+                    self.spawn(slot)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Multi-process API server.")
+    parser.add_argument("--workers", type=int, default=settings.SERVER_WORKERS)
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    args = parser.parse_args()
+
+    # nothing is collected while importing: every object created here stays
+    # in the pages shared with the workers
+    gc.disable()
+
+    from src.auth.utils import hashing_executor
+    from src.config import (
+        db_settings,
+        hashing_settings,
+        metrics_settings,
+        migration_settings,
+        rate_limit_settings,
+        verification_settings,
+    )
+    from src.database import database
+    from src.main import app
+    from src.metrics.multiprocess import multiprocess_metrics
+    from src.migrations.runner import run_migrations
+
+    cpus = available_cpus()
+    workers = args.workers or cpus
+    check_shared_state(
+        workers,
+        verification_settings.VERIFICATION_STORE,
+        (
+            rate_limit_settings.RATE_LIMIT_BACKEND
+            if rate_limit_settings.RATE_LIMIT_ENABLED
+            else None
+        ),
+    )
+    database.min_size, database.max_size = pool_size_per_worker(
+        workers,
+        db_settings.DB_CONNECTION_BUDGET,
+        database.min_size,
+        database.max_size,
+    )
+    if hashing_settings.HASHING_MAX_WORKERS is None:
+        # the workers share the CPUs: together they run one bcrypt job per CPU
+        hashing_executor.max_workers = max(cpus // workers, 1)
+    logger.info(
+        f"{workers} worker(s) for {cpus} CPU(s), database pools of "
+        f"{database.min_size} to {database.max_size} connections each."
+    )
+
+    if migration_settings.MIGRATIONS_RUN_ON_STARTUP:
+        asyncio.run(run_migrations())
+        # already applied: the lifespan of the workers skips them
+        migration_settings.MIGRATIONS_RUN_ON_STARTUP = False
+
+    metrics = None
+    if metrics_settings.METRICS_ENABLED and workers > 1:
+        # any worker may serve /metrics: each one shares its metrics with them
+        multiprocess_metrics.directory = Path(tempfile.mkdtemp(prefix="metrics-"))
+        metrics = multiprocess_metrics
+
+    config = build_config(app, args.host, args.port)
+    sock = config.bind_socket()
+    gc.freeze()
+    try:
+        Supervisor(config, sock, workers, metrics).run()
+    finally:
+        if metrics is not None:
+            shutil.rmtree(metrics.directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.database import Database, compile_query
+
+
+def test_compile_query_named_params():
+    sql, names = compile_query(
+        "SELECT * FROM user_data WHERE id = :user_id AND email = :email;"
+    )
+    assert sql == "SELECT * FROM user_data WHERE id = $1 AND email = $2;"
+    assert names == ("user_id", "email")
+
+
+def test_compile_query_repeated_param():
+    sql, names = compile_query("UPDATE t SET a = :id WHERE b = :id OR c = :other")
+    assert sql == "UPDATE t SET a = $1 WHERE b = $1 OR c = $2"
+    assert names == ("id", "other")
+
+
+def test_compile_query_ignores_casts_and_literals():
+    sql, names = compile_query(
+        "SELECT CAST(:args AS JSONB), x::text, '12:30' FROM t WHERE a = :a"
+    )
+    assert sql == "SELECT CAST($1 AS JSONB), x::text, '12:30' FROM t WHERE a = $2"
+    assert names == ("args", "a")
+
+
+@patch("src.database.asyncpg.create_pool", new_callable=AsyncMock)
+@pytest.mark.asyncio
+async def test_database_pgbouncer_mode_disables_statement_cache(mock_create_pool):
+    db = Database("postgres://test", statement_cache_size=100, pgbouncer_mode=True)
+
+    await db.connect()
+
+    _, kwargs = mock_create_pool.call_args
+    assert kwargs["statement_cache_size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_database_transaction_reuses_connection():
+    connection = MagicMock()
+    connection.fetchrow = AsyncMock(return_value={"id": 1})
+    connection.transaction.return_value = AsyncMock()
+    pool = MagicMock()
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=connection)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+
+    db = Database("postgres://test")
+    db._pool = pool
+
+    async with db.transaction():
+        await db.fetch_one("SELECT :id", {"id": 1})
+        await db.fetch_one("SELECT :id", {"id": 2})
+
+    pool.acquire.assert_called_once()
+    connection.fetchrow.assert_any_call("SELECT $1", 2)
+
+
+def make_pool(name):
+    connection = MagicMock(name=f"{name}_connection")
+    connection.fetchrow = AsyncMock(return_value={"pool": name})
+    connection.execute = AsyncMock()
+    connection.transaction.return_value = AsyncMock()
+    pool = MagicMock(name=name)
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=connection)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+    return pool
+
+
+def make_replicated_db(**kwargs):
+    db = Database(
+        "postgres://primary",
+        replica_urls=["postgres://replica"],
+        replica_max_lag=1.0,
+        **kwargs,
+    )
+    db._pool = make_pool("primary")
+    db.replicas[0].pool = make_pool("replica")
+    db.replicas[0].lag = 0.0
+    return db
+
+
+async def fetch_pool_name(db, read_only):
+    row = await db.fetch_one("SELECT 1", read_only=read_only)
+    return row["pool"]
+
+
+@pytest.mark.asyncio
+async def test_database_routes_reads_to_replica():
+    db = make_replicated_db()
+
+    assert await fetch_pool_name(db, read_only=True) == "replica"
+    assert await fetch_pool_name(db, read_only=False) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_database_falls_back_to_primary_when_replica_lags():
+    db = make_replicated_db()
+    db.replicas[0].lag = 5.0
+    assert await fetch_pool_name(db, read_only=True) == "primary"
+
+    db.replicas[0].lag = None  # lag check failed
+    assert await fetch_pool_name(db, read_only=True) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_database_read_your_writes_pins_to_primary():
+    db = make_replicated_db(read_your_writes=True)
+
+    await db.execute("UPDATE t SET a = 1")
+
+    assert await fetch_pool_name(db, read_only=True) == "primary"
+
+
+@pytest.mark.asyncio
+async def test_database_without_read_your_writes_reads_from_replica():
+    db = make_replicated_db(read_your_writes=False)
+
+    await db.execute("UPDATE t SET a = 1")
+
+    assert await fetch_pool_name(db, read_only=True) == "replica"
+
+
+@pytest.mark.asyncio
+async def test_database_check_replicas_lag():
+    db = make_replicated_db()
+    db.replicas[0].pool.fetchval = AsyncMock(return_value=2.5)
+    await db.check_replicas_lag()
+    assert db.replicas[0].lag == 2.5
+
+    db.replicas[0].pool.fetchval = AsyncMock(side_effect=OSError("down"))
+    await db.check_replicas_lag()
+    assert db.replicas[0].lag is None
+
+
+@pytest.mark.asyncio
+async def test_database_acquire_wait_average():
+    db = Database("postgres://test")
+    db._pool = make_pool("primary")
+
+    with patch("src.database.time.perf_counter", side_effect=[0.0, 1.0]):
+        await db.fetch_one("SELECT 1")
+
+    assert db.acquire_wait == pytest.approx(0.2)  # smoothed
+
+
+@pytest.mark.asyncio
+async def test_database_acquire_wait_expires_when_idle():
+    db = Database("postgres://test")
+    db._pool = make_pool("primary")
+    with patch("src.database.time.perf_counter", side_effect=[0.0, 1.0]):
+        await db.fetch_one("SELECT 1")
+
+    with patch("src.database.time.monotonic", return_value=db._acquire_wait_at + 2):
+        assert db.acquire_wait == 0.0
+        db._acquire_waiters = 1  # a pending acquisition keeps it
+        assert db.acquire_wait == pytest.approx(0.2)
+
+
+@pytest.mark.asyncio
+async def test_database_reconnects_replica_down_at_startup():
+    db = Database(
+        "postgres://primary",
+        replica_urls=["postgres://replica"],
+        replica_lag_check_interval=0.01,
+    )
+    replica_pool = make_pool("replica")
+    replica_pool.fetchval = AsyncMock(return_value=0.0)
+    create_pool = AsyncMock(
+        side_effect=[make_pool("primary"), OSError("down"), replica_pool]
+    )
+
+    with patch("src.database.asyncpg.create_pool", create_pool):
+        await db.connect()
+        assert db.replicas[0].pool is None
+        assert await fetch_pool_name(db, read_only=True) == "primary"
+
+        # the lag monitor retries the replica
+        async with asyncio.timeout(1):
+            while db.replicas[0].lag is None:
+                await asyncio.sleep(0.01)
+
+    assert db.replicas[0].pool is replica_pool
+    assert await fetch_pool_name(db, read_only=True) == "replica"
+    db._lag_monitor.cancel()
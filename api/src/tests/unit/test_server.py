@@ -0,0 +1,217 @@
+import signal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from src.server import (
+    available_cpus,
+    cgroup_cpu_quota,
+    Supervisor,
+    check_shared_state,
+    main,
+    pool_size_per_worker,
+)
+
+
+def test_cgroup_v2_quota(tmp_path):
+    (tmp_path / "cpu.max").write_text("250000 100000\n")
+
+    assert cgroup_cpu_quota(tmp_path) == 2.5
+
+
+def test_cgroup_v2_unlimited(tmp_path):
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+
+    assert cgroup_cpu_quota(tmp_path) is None
+
+
+def test_cgroup_v1_quota(tmp_path):
+    (tmp_path / "cpu,cpuacct").mkdir()
+    (tmp_path / "cpu,cpuacct" / "cpu.cfs_quota_us").write_text("200000\n")
+    (tmp_path / "cpu,cpuacct" / "cpu.cfs_period_us").write_text("100000\n")
+
+    assert cgroup_cpu_quota(tmp_path) == 2.0
+
+
+def test_cgroup_v1_unlimited(tmp_path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+
+    assert cgroup_cpu_quota(tmp_path) is None
+
+
+@patch("src.server.os.sched_getaffinity", return_value=set(range(8)))
+def test_available_cpus_capped_by_quota(mock_affinity, tmp_path):
+    assert available_cpus(tmp_path) == 8  # no cgroup files
+
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert available_cpus(tmp_path) == 2
+
+    (tmp_path / "cpu.max").write_text("20000 100000\n")
+    assert available_cpus(tmp_path) == 1
+
+
+def test_pool_size_per_worker():
+    assert pool_size_per_worker(4, None, 5, 20) == (5, 20)
+    assert pool_size_per_worker(4, 100, 5, 20) == (5, 20)
+    assert pool_size_per_worker(4, 40, 5, 20) == (5, 10)
+    assert pool_size_per_worker(4, 10, 5, 20) == (2, 2)
+
+
+def test_pool_size_per_worker_budget_too_small():
+    with pytest.raises(ValueError):
+        pool_size_per_worker(4, 3, 5, 20)
+
+
+def test_check_shared_state_memory_verification_store():
+    check_shared_state(1, "memory", "memory")
+    check_shared_state(4, "postgres", "redis")
+
+    with pytest.raises(ValueError):
+        check_shared_state(4, "memory", "redis")
+
+
+def test_check_shared_state_memory_rate_limits(caplog):
+    check_shared_state(4, "redis", None)
+    assert not caplog.records
+
+    check_shared_state(4, "redis", "memory")
+    assert any(
+        record.levelname == "WARNING" and "4 times the limits" in record.message
+        for record in caplog.records
+    )
+
+
+@pytest.fixture
+def mock_supervisor(monkeypatch):
+    """
+    Let `main()` run up to the supervisor, without binding a socket or forking.
+    """
+    from src.auth.utils import hashing_executor
+    from src.database import database
+    from src.metrics.multiprocess import multiprocess_metrics
+
+    monkeypatch.setattr("sys.argv", ["server", "--workers", "2"])
+    monkeypatch.setattr(multiprocess_metrics, "directory", None)
+    monkeypatch.setattr(database, "min_size", database.min_size)
+    monkeypatch.setattr(database, "max_size", database.max_size)
+    monkeypatch.setattr(hashing_executor, "max_workers", hashing_executor.max_workers)
+    with (
+        patch("src.server.gc"),
+        patch("src.server.build_config"),
+        patch("src.server.Supervisor") as mock_supervisor,
+    ):
+        yield mock_supervisor
+
+
+@patch("src.migrations.runner.run_migrations", new_callable=AsyncMock)
+def test_main_runs_migrations_once_before_forking(
+    mock_run_migrations, mock_supervisor
+):
+    from src.config import migration_settings
+
+    with patch.object(migration_settings, "MIGRATIONS_RUN_ON_STARTUP", True):
+        main()
+
+        mock_run_migrations.assert_awaited_once()
+        mock_supervisor.return_value.run.assert_called_once()
+        assert not migration_settings.MIGRATIONS_RUN_ON_STARTUP  # worker lifespans
+
+
+@patch("src.migrations.runner.run_migrations", new_callable=AsyncMock)
+def test_main_without_migrations_on_startup(mock_run_migrations, mock_supervisor):
+    from src.config import migration_settings
+
+    with patch.object(migration_settings, "MIGRATIONS_RUN_ON_STARTUP", False):
+        main()
+
+    mock_run_migrations.assert_not_awaited()
+
+
+@patch("src.migrations.runner.run_migrations", new_callable=AsyncMock)
+def test_main_refuses_memory_verification_store(mock_run_migrations, mock_supervisor):
+    from src.config import migration_settings, verification_settings
+
+    with (
+        patch.object(verification_settings, "VERIFICATION_STORE", "memory"),
+        patch.object(migration_settings, "MIGRATIONS_RUN_ON_STARTUP", True),
+        pytest.raises(ValueError),
+    ):
+        main()
+
+    mock_run_migrations.assert_not_awaited()
+    mock_supervisor.assert_not_called()
+
+
+def test_main_shares_metrics_of_workers(mock_supervisor):
+    from src.metrics.multiprocess import multiprocess_metrics
+
+    directories = []
+    mock_supervisor.return_value.run.side_effect = lambda: directories.append(
+        multiprocess_metrics.directory
+    )
+
+    main()
+
+    assert mock_supervisor.call_args.args[3] is multiprocess_metrics
+    assert directories[0].name.startswith("metrics-")
+    assert not directories[0].exists()  # removed once the workers stopped
+
+
+@patch("src.server.signal.signal")
+@patch("src.server.gc")
+@patch("src.server.uvicorn.Server")
+@patch("src.server.os._exit")
+@patch("src.server.os.fork", return_value=0)
+def test_supervisor_worker_labels_metrics_with_slot(
+    mock_fork, mock_exit, mock_server, mock_gc, mock_signal
+):
+    metrics = MagicMock(worker=None)
+    supervisor = Supervisor(MagicMock(), MagicMock(), 2, metrics)
+
+    supervisor.spawn(1)
+
+    assert metrics.worker == 1
+    mock_server.return_value.run.assert_called_once()
+    mock_exit.assert_called_once_with(0)
+
+
+@patch("src.server.time.sleep")
+@patch("src.server.signal.signal")
+@patch("src.server.os.waitstatus_to_exitcode", return_value=1)
+@patch("src.server.os.wait", side_effect=[(101, 256), ChildProcessError])
+@patch("src.server.os.fork", side_effect=[101, 102, 103])
+def test_supervisor_respawns_worker_in_its_slot(
+    mock_fork, mock_wait, mock_exitcode, mock_signal, mock_sleep
+):
+    supervisor = Supervisor(MagicMock(), MagicMock(), 2)
+
+    supervisor.run()
+
+    assert supervisor.children == {102: 1, 103: 0}
+
+
+@patch("src.server.os.wait", side_effect=[(101, 0), ChildProcessError])
+@patch("src.server.os.kill")
+@patch("src.server.signal.pthread_sigmask")
+@patch("src.server.signal.signal")
+@patch("src.server.os.fork", return_value=101)
+def test_supervisor_stopped_while_starting(
+    mock_fork, mock_signal, mock_sigmask, mock_kill, mock_wait
+):
+    supervisor = Supervisor(MagicMock(), MagicMock(), 3)
+
+    def sigterm_held_during_fork(how, signals):
+        if how == signal.SIG_UNBLOCK:
+            # the handlers were installed before forking
+            assert mock_signal.call_count == 2
+            assert 101 in supervisor.children
+            supervisor.stop(signal.SIGTERM, None)
+
+    mock_sigmask.side_effect = sigterm_held_during_fork
+
+    supervisor.run()
+
+    mock_fork.assert_called_once()  # no other worker forked once stopping
+    mock_kill.assert_called_once_with(101, signal.SIGTERM)
@@ -0,0 +1,50 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from src.exceptions import EXCEPTION_HANDLER_MODULES, find_exception_handler_modules
+from src.user.tasks.email import send_confirmation_email, send_verification_email
+from src.user import service
+
+# seconds to import the app in a fresh interpreter, generous for slow CI runners
+COLD_IMPORT_BUDGET = 3.0
+
+# loaded by the workers, not by the API process
+WORKER_MODULES = ("celery", "kombu", "celery_batches", "aiosmtplib")
+
+COLD_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import src.main
+print(json.dumps({
+    "duration": time.perf_counter() - start,
+    "modules": sorted(name for name in sys.modules if name.split(".")[0] in %r),
+}))
+"""
+
+
+def test_cold_import_within_budget_without_worker_stack():
+    result = subprocess.run(
+        [sys.executable, "-c", COLD_IMPORT_SCRIPT % (WORKER_MODULES,)],
+        cwd=Path(__file__).resolve().parents[3],
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    cold_import = json.loads(result.stdout.splitlines()[-1])
+
+    assert cold_import["modules"] == []
+    assert cold_import["duration"] < COLD_IMPORT_BUDGET
+
+
+def test_exception_handler_modules_registry_complete():
+    assert sorted(EXCEPTION_HANDLER_MODULES) == find_exception_handler_modules()
+
+
+def test_lazy_tasks_named_after_tasks():
+    assert service.send_verification_email.name == send_verification_email.name
+    assert service.send_confirmation_email.name == send_confirmation_email.name
+    assert service.send_verification_email.delay == send_verification_email.delay
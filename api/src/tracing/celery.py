@@ -0,0 +1,21 @@
+from celery.signals import before_task_publish
+
+from src.tracing.tracer import SpanContext, tracer
+
+
+@before_task_publish.connect
+def inject_trace_context(headers=None, **kwargs):
+    """Send the current trace context in the headers of published tasks."""
+    if headers is not None:
+        tracer.inject(headers)
+
+
+def get_task_trace_context(request) -> SpanContext | None:
+    """
+    Return the trace context sent with a task request: a task `self.request`,
+    or a `celery_batches` request.
+    """
+    request_dict = getattr(request, "request_dict", None)
+    if request_dict is not None:
+        return tracer.extract(request_dict)
+    return SpanContext.from_traceparent(getattr(request, "traceparent", None))
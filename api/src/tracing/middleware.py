@@ -0,0 +1,32 @@
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.metrics.middleware import get_route_template
+from src.tracing.tracer import tracer
+
+
+class TracingMiddleware:
+    """
+    Start the root span of each HTTP request, named after its route template.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = get_route_template(scope)
+        with tracer.start_span(
+            f"{method} {route}",
+            attributes={"http.method": method, "http.route": route},
+        ) as span:
+
+            async def send_with_status(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                await send(message)
+
+            await self.app(scope, receive, send_with_status)
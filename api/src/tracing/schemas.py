@@ -0,0 +1,15 @@
+from pydantic import model_validator
+
+from src.tracing.tracer import tracer
+
+
+class TracedValidationMixin:
+    """
+    Record the validation of a request body in a `validation` span.
+    """
+
+    @model_validator(mode="wrap")
+    @classmethod
+    def trace_validation(cls, data, handler):
+        with tracer.start_span("validation", attributes={"model": cls.__name__}):
+            return handler(data)
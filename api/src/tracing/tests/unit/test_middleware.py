@@ -0,0 +1,46 @@
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.tracing.middleware import TracingMiddleware
+from src.tracing.tracer import InMemorySpanExporter, Tracer
+from src.user.schemas import UserRegister
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    tracer = Tracer(enabled=True, sample_ratio=1.0, exporter=exporter)
+    with (
+        patch("src.tracing.middleware.tracer", tracer),
+        patch("src.tracing.schemas.tracer", tracer),
+    ):
+        yield exporter
+
+
+@pytest.mark.asyncio
+async def test_request_span_with_validation_child(exporter):
+    app = FastAPI()
+
+    @app.post("/users/register", status_code=201)
+    async def register(user_in: UserRegister):
+        return {}
+
+    app.add_middleware(TracingMiddleware)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.post(
+            "/users/register",
+            json={"email": "test@example.com", "password": "Password123!?"},
+        )
+    assert response.status_code == 201
+
+    validation, request = exporter.get_finished_spans()
+    assert request.name == "POST /users/register"
+    assert request.attributes["http.status_code"] == 201
+    assert validation.name == "validation"
+    assert validation.attributes == {"model": "UserRegister"}
+    assert validation.parent_id == request.context.span_id
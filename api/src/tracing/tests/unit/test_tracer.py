@@ -0,0 +1,125 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.tracing.celery import get_task_trace_context
+from src.tracing.tracer import (
+    FileSpanExporter,
+    InMemorySpanExporter,
+    SpanContext,
+    Tracer,
+)
+
+
+@pytest.fixture
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture
+def tracer(exporter):
+    return Tracer(enabled=True, sample_ratio=1.0, exporter=exporter)
+
+
+def test_child_span_shares_trace(tracer, exporter):
+    with tracer.start_span("root") as root:
+        with tracer.start_span("child") as child:
+            pass
+
+    assert [span.name for span in exporter.get_finished_spans()] == ["child", "root"]
+    assert child.context.trace_id == root.context.trace_id
+    assert child.parent_id == root.context.span_id
+    assert root.parent_id is None
+    assert root.duration >= child.duration
+
+
+def test_span_records_error(tracer, exporter):
+    with pytest.raises(ValueError):
+        with tracer.start_span("root"):
+            raise ValueError("boom")
+
+    (span,) = exporter.get_finished_spans()
+    assert span.error == "ValueError: boom"
+
+
+def test_unsampled_trace_not_recorded(exporter):
+    tracer = Tracer(enabled=True, sample_ratio=0.0, exporter=exporter)
+    with tracer.start_span("root") as root:
+        with tracer.start_span("child") as child:
+            carrier = {}
+            tracer.inject(carrier)
+
+    assert not root.is_recording
+    assert not child.is_recording
+    assert carrier == {}
+    assert exporter.get_finished_spans() == []
+
+
+def test_disabled_tracer_not_recorded(exporter):
+    tracer = Tracer(enabled=False, sample_ratio=1.0, exporter=exporter)
+    with tracer.start_span("root") as root:
+        pass
+
+    assert not root.is_recording
+    assert exporter.get_finished_spans() == []
+
+
+def test_remote_parent_decides_sampling(exporter):
+    tracer = Tracer(enabled=True, sample_ratio=0.0, exporter=exporter)
+    parent = SpanContext("a" * 32, "b" * 16, sampled=True)
+    with tracer.start_span("task", parent=parent) as span:
+        pass
+
+    assert span.context.trace_id == "a" * 32
+    assert span.parent_id == "b" * 16
+    assert exporter.get_finished_spans() == [span]
+
+
+def test_linked_span_sampled_with_its_links(exporter):
+    tracer = Tracer(enabled=True, sample_ratio=0.0, exporter=exporter)
+    link = SpanContext("a" * 32, "b" * 16, sampled=True)
+    with tracer.start_span("batch", links=[link, None]) as span:
+        pass
+
+    assert span.is_recording
+    assert span.context.trace_id != link.trace_id
+    assert span.to_dict()["links"] == [{"trace_id": "a" * 32, "span_id": "b" * 16}]
+
+
+def test_inject_extract(tracer):
+    with tracer.start_span("enqueue") as span:
+        headers = {}
+        tracer.inject(headers)
+
+    context = tracer.extract(headers)
+    assert context.trace_id == span.context.trace_id
+    assert context.span_id == span.context.span_id
+    assert context.sampled
+
+
+@pytest.mark.parametrize("traceparent", [None, "", "00-xyz-abc-01"])
+def test_extract_invalid(tracer, traceparent):
+    assert tracer.extract({"traceparent": traceparent}) is None
+
+
+def test_get_task_trace_context():
+    traceparent = f"00-{'a' * 32}-{'b' * 16}-01"
+    task_request = MagicMock(spec=["traceparent"], traceparent=traceparent)
+    batch_request = MagicMock(request_dict={"traceparent": traceparent})
+
+    assert get_task_trace_context(task_request).span_id == "b" * 16
+    assert get_task_trace_context(batch_request).span_id == "b" * 16
+
+
+def test_file_exporter(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(enabled=True, sample_ratio=1.0, exporter=FileSpanExporter(path))
+    with tracer.start_span("root", attributes={"route": "/users/register"}):
+        with tracer.start_span("child"):
+            pass
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [span["name"] for span in spans] == ["child", "root"]
+    assert spans[1]["attributes"] == {"route": "/users/register"}
+    assert spans[0]["parent_id"] == spans[1]["span_id"]
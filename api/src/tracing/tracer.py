@@ -0,0 +1,265 @@
+"""
+Lightweight tracing: spans with parent/child relations and links, exported
+to memory or to a JSON lines file.
+
+The sampling decision is taken once per trace, at its root span, and
+inherited by every child span, including the ones of Celery tasks through
+the `traceparent` header (W3C Trace Context format). Spans of an unsampled
+trace are not recorded and cost a context variable lookup.
+"""
+
+import json
+import os
+import random
+import re
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.config import tracing_settings as settings
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+class SpanContext:
+    __slots__ = ("trace_id", "span_id", "sampled")
+
+    def __init__(self, trace_id: str, span_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    def to_traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    @classmethod
+    def from_traceparent(cls, traceparent: str | None) -> "SpanContext | None":
+        match = _TRACEPARENT.match(traceparent or "")
+        if not match:
+            return None
+        trace_id, span_id, flags = match.groups()
+        return cls(trace_id, span_id, bool(int(flags, 16) & 1))
+
+
+UNSAMPLED_CONTEXT = SpanContext("0" * 32, "0" * 16, sampled=False)
+
+
+class Span:
+    __slots__ = (
+        "name",
+        "context",
+        "parent_id",
+        "links",
+        "attributes",
+        "start_time",
+        "duration",
+        "error",
+        "_start",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        context: SpanContext,
+        parent_id: str | None = None,
+        links: list[SpanContext] | None = None,
+        attributes: dict | None = None,
+    ):
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.links = links or []
+        self.attributes = attributes or {}
+        self.start_time = time.time()
+        self.duration: float | None = None
+        self.error: str | None = None
+        self._start = time.perf_counter()
+
+    @property
+    def is_recording(self) -> bool:
+        return True
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def end(self):
+        self.duration = time.perf_counter() - self._start
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.context.trace_id,
+            "span_id": self.context.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": self.start_time,
+            "duration_ms": (self.duration or 0.0) * 1000,
+            "attributes": self.attributes,
+            "links": [
+                {"trace_id": link.trace_id, "span_id": link.span_id}
+                for link in self.links
+            ],
+            "error": self.error,
+        }
+
+
+class NonRecordingSpan:
+    """Span of an unsampled trace: it only carries the context."""
+
+    __slots__ = ("context",)
+
+    def __init__(self, context: SpanContext):
+        self.context = context
+
+    @property
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value):
+        pass
+
+
+UNSAMPLED_SPAN = NonRecordingSpan(UNSAMPLED_CONTEXT)
+
+
+# Exporters
+
+
+class InMemorySpanExporter:
+    def __init__(self, max_spans: int = 10000):
+        self._spans: deque[Span] = deque(maxlen=max_spans)
+
+    def export(self, span: Span):
+        self._spans.append(span)
+
+    def get_finished_spans(self) -> list[Span]:
+        return list(self._spans)
+
+    def clear(self):
+        self._spans.clear()
+
+
+class FileSpanExporter:
+    """
+    Append spans as JSON lines. Each span is a single `write` on a file
+    opened in append mode, so the API and worker processes can share a file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: int | None = None
+
+    def export(self, span: Span):
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+        os.write(self._fd, (json.dumps(span.to_dict(), default=str) + "\n").encode())
+
+    def get_finished_spans(self) -> list[Span]:
+        return []
+
+    def clear(self):
+        pass
+
+
+# Tracer
+
+
+class Tracer:
+    def __init__(self, enabled: bool, sample_ratio: float, exporter):
+        self.enabled = enabled
+        self.sample_ratio = sample_ratio
+        self.exporter = exporter
+        self._current_span: ContextVar[Span | NonRecordingSpan | None] = ContextVar(
+            f"current_span_{id(self)}", default=None
+        )
+
+    def get_current_span(self) -> Span | NonRecordingSpan | None:
+        return self._current_span.get()
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        attributes: dict | None = None,
+        parent: SpanContext | None = None,
+        links: list[SpanContext] | None = None,
+    ):
+        """
+        Start a child of `parent`, or of the current span when not given.
+        Without either, start the root span of a new trace and sample it,
+        unless it is linked to a sampled trace.
+        """
+        if not self.enabled:
+            yield UNSAMPLED_SPAN
+            return
+
+        current = self._current_span.get()
+        if parent is None and current is UNSAMPLED_SPAN:
+            yield UNSAMPLED_SPAN
+            return
+        if parent is None and current is not None:
+            parent = current.context
+
+        links = [link for link in links or [] if link is not None]
+        if parent is None:
+            # a span linked to sampled traces (e.g. a batch) is kept with them
+            sampled = (
+                any(link.sampled for link in links)
+                or random.random() < self.sample_ratio
+            )
+            trace_id = f"{random.getrandbits(128):032x}" if sampled else None
+        else:
+            sampled = parent.sampled
+            trace_id = parent.trace_id
+
+        if not sampled:
+            token = self._current_span.set(UNSAMPLED_SPAN)
+            try:
+                yield UNSAMPLED_SPAN
+            finally:
+                self._current_span.reset(token)
+            return
+
+        context = SpanContext(trace_id, f"{random.getrandbits(64):016x}", True)
+        span = Span(
+            name,
+            context,
+            parent_id=parent.span_id if parent is not None else None,
+            links=links,
+            attributes=attributes,
+        )
+        token = self._current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            self._current_span.reset(token)
+            span.end()
+            self.exporter.export(span)
+
+    def inject(self, carrier: dict):
+        """
+        Add the current trace context to `carrier` (e.g. task headers).
+        """
+        current = self._current_span.get()
+        if current is not None and current.context.sampled:
+            carrier["traceparent"] = current.context.to_traceparent()
+
+    @staticmethod
+    def extract(carrier: dict | None) -> SpanContext | None:
+        return SpanContext.from_traceparent((carrier or {}).get("traceparent"))
+
+
+def _build_exporter():
+    if settings.TRACING_EXPORTER == "file":
+        return FileSpanExporter(settings.TRACING_FILE_PATH)
+    return InMemorySpanExporter(settings.TRACING_MEMORY_MAX_SPANS)
+
+
+tracer = Tracer(
+    enabled=settings.TRACING_ENABLED,
+    sample_ratio=settings.TRACING_SAMPLE_RATIO,
+    exporter=_build_exporter(),
+)
@@ -1,17 +1,22 @@
-from databases import Database
-
+from src.database import Database, timed_query
 from src.exceptions import DBBaseError
 from src.user.exceptions import (
     UserCrudInsertError,
     UserCrudUpdateIsActiveError,
-    UserVerificationCrudInsertError,
 )
-from src.user.schemas import UserFromDB, UserVerificationFromDB
+from src.user.schemas import (
+    UserActivationStatus,
+    UserFromDB,
+    UserVerificationFromDB,
+)
+from src.user.utils import VERIFICATION_CODE_TTL
+from src.user.verification import verification_store
 
 
 # User
 
 
+@timed_query
 async def create_user(
     db: Database,
     email: str,
@@ -42,9 +47,10 @@ async def create_user(
     if not row:
         raise UserCrudInsertError
 
-    return UserFromDB(**dict(row))
+    return UserFromDB(**row)
 
 
+@timed_query
 async def get_user_by_email(
     db: Database,
     email: str,
@@ -67,6 +73,7 @@ async def get_user_by_email(
             {
                 "email": email,
             },
+            read_only=True,
         )
     except Exception as e:
         raise DBBaseError from e
@@ -74,9 +81,10 @@ async def get_user_by_email(
     if not row:
         return None
 
-    return UserFromDB(**dict(row))
+    return UserFromDB.from_row(row)
 
 
+@timed_query
 async def update_user_is_active(
     db: Database,
     user_id: int,
@@ -108,25 +116,84 @@ async def update_user_is_active(
     if not row:
         raise UserCrudUpdateIsActiveError
 
-    return UserFromDB(**dict(row))
+    return UserFromDB.from_row(row)
 
 
-# User verification
+@timed_query
+async def activate_user(
+    db: Database,
+    user_id: int,
+) -> UserFromDB | None:
+    """
+    Activate a user. Return None if it was already active.
+    """
 
+    query = """
+        UPDATE user_data
+        SET is_active = TRUE
+        WHERE id = :user_id AND is_active = FALSE
+        RETURNING id, email, password_hash, is_active
+        ;
+    """
 
-async def create_user_verification(
+    try:
+        row = await db.fetch_one(
+            query,
+            {
+                "user_id": user_id,
+            },
+        )
+    except Exception as e:
+        raise DBBaseError from e
+
+    if not row:
+        return None
+
+    return UserFromDB.from_row(row)
+
+
+@timed_query
+async def activate_user_with_code(
     db: Database,
     user_id: int,
     code: str,
-) -> UserVerificationFromDB | None:
+) -> tuple[UserActivationStatus, UserFromDB | None]:
     """
-    Create a verification code for a user.
+    Activate a user in a single statement if the code is valid and unexpired.
+    The expiry is checked against the database clock.
     """
 
     query = """
-        INSERT INTO user_verification (user_id, code) 
-        VALUES (:user_id, :code)
-        RETURNING id, user_id, code, created_at
+        WITH target AS (
+            SELECT id, is_active
+            FROM user_data
+            WHERE id = :user_id
+        ),
+        activated AS (
+            UPDATE user_data
+            SET is_active = TRUE
+            WHERE
+                id = :user_id
+                AND is_active = FALSE
+                AND EXISTS (
+                    SELECT 1
+                    FROM user_verification
+                    WHERE
+                        user_id = :user_id
+                        AND code = :code
+                        AND created_at > NOW() - make_interval(secs => :ttl)
+                        AND created_at <= NOW()  -- bounds the scan to the current partitions
+                )
+            RETURNING id, email, password_hash, is_active
+        )
+        SELECT
+            activated.id,
+            activated.email,
+            activated.password_hash,
+            activated.is_active,
+            target.is_active AS was_active
+        FROM target
+        LEFT JOIN activated ON activated.id = target.id
         ;
     """
 
@@ -136,33 +203,117 @@ async def create_user_verification(
             {
                 "user_id": user_id,
                 "code": code,
+                "ttl": VERIFICATION_CODE_TTL,
             },
         )
     except Exception as e:
         raise DBBaseError from e
 
     if not row:
-        raise UserVerificationCrudInsertError
+        raise UserCrudUpdateIsActiveError
 
-    return UserVerificationFromDB(**dict(row))
+    if row["id"] is not None:
+        return UserActivationStatus.ACTIVATED, UserFromDB.from_row(row)
+    if row["was_active"]:
+        return UserActivationStatus.ALREADY_ACTIVE, None
+    return UserActivationStatus.INVALID_CODE, None
 
 
-async def get_valid_user_verification(
+# User registration
+
+
+@timed_query
+async def create_user_if_not_registered(
+    db: Database,
+    email: str,
+    password_hash: str,
+) -> UserFromDB | None:
+    """
+    Create a new user. Return None if the email has already been registered.
+    """
+
+    query = """
+        INSERT INTO user_data (email, password_hash)
+        VALUES (:email, :password_hash)
+        ON CONFLICT (email) DO NOTHING
+        RETURNING id, email, password_hash, is_active
+        ;
+    """
+
+    try:
+        row = await db.fetch_one(
+            query,
+            {
+                "email": email,
+                "password_hash": password_hash,
+            },
+        )
+    except Exception as e:
+        raise DBBaseError from e
+
+    if not row:
+        return None
+
+    return UserFromDB.from_row(row)
+
+
+@timed_query
+async def delete_inactive_user(
     db: Database,
     user_id: int,
+) -> None:
+    """
+    Delete a user not activated yet, e.g. one whose registration failed
+    halfway.
+    """
+
+    query = """
+        DELETE FROM user_data
+        WHERE id = :user_id
+            AND is_active = FALSE
+        ;
+    """
+
+    try:
+        await db.execute(query, {"user_id": user_id})
+    except Exception as e:
+        raise DBBaseError from e
+
+
+@timed_query
+async def create_user_with_verification(
+    db: Database,
+    email: str,
+    password_hash: str,
     code: str,
-) -> UserVerificationFromDB | None:
+) -> tuple[UserFromDB, UserVerificationFromDB] | None:
     """
-    Get user verification code from string code.
+    Create a new user and its verification code in a single statement.
+    Return None if the email has already been registered.
     """
 
     query = """
-        SELECT id, user_id, code, created_at
-        FROM user_verification
-        WHERE 
-            user_id = :user_id
-            AND code = :code
-            AND created_at > NOW() - INTERVAL '1 minute'
+        WITH new_user AS (
+            INSERT INTO user_data (email, password_hash)
+            VALUES (:email, :password_hash)
+            ON CONFLICT (email) DO NOTHING
+            RETURNING id, email, password_hash, is_active
+        ),
+        new_verification AS (
+            INSERT INTO user_verification (user_id, code)
+            SELECT id, :code FROM new_user
+            RETURNING id, user_id, code, created_at
+        )
+        SELECT
+            new_user.id AS user_id,
+            new_user.email,
+            new_user.password_hash,
+            new_user.is_active,
+            new_verification.id AS verification_id,
+            new_verification.code,
+            new_verification.created_at
+        FROM new_user
+        JOIN new_verification ON new_verification.user_id = new_user.id
         ;
     """
 
@@ -170,7 +321,8 @@ async def get_valid_user_verification(
         row = await db.fetch_one(
             query,
             {
-                "user_id": user_id,
+                "email": email,
+                "password_hash": password_hash,
                 "code": code,
             },
         )
@@ -180,4 +332,61 @@ async def get_valid_user_verification(
     if not row:
         return None
 
-    return UserVerificationFromDB(**dict(row))
+    user = UserFromDB.model_construct(
+        id=row["user_id"],
+        email=row["email"],
+        password_hash=row["password_hash"],
+        is_active=row["is_active"],
+    )
+    verification = UserVerificationFromDB.model_construct(
+        id=row["verification_id"],
+        user_id=row["user_id"],
+        code=row["code"],
+        created_at=row["created_at"],
+    )
+    return user, verification
+
+
+# User verification
+#
+# The codes live in the configured verification store (see
+# `src.user.verification`): the `user_verification` table or a key-value
+# store expiring them natively.
+
+
+@timed_query
+async def create_user_verification(
+    db: Database,
+    user_id: int,
+    code: str,
+) -> UserVerificationFromDB | None:
+    """
+    Create a verification code for a user.
+    """
+
+    return await verification_store.create(db, user_id, code)
+
+
+@timed_query
+async def get_valid_user_verification(
+    db: Database,
+    user_id: int,
+    code: str,
+) -> UserVerificationFromDB | None:
+    """
+    Get user verification code from string code.
+    """
+
+    return await verification_store.get_valid(db, user_id, code)
+
+
+@timed_query
+async def delete_user_verification(
+    db: Database,
+    user_id: int,
+) -> None:
+    """
+    Delete the verification code of a user once used.
+    """
+
+    await verification_store.delete(db, user_id)
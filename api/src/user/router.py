@@ -1,11 +1,12 @@
 from typing import Annotated
 
-from databases import Database
 from fastapi import APIRouter, Depends, status
 from fastapi.security import HTTPBasic
 
 from src.auth.dependencies import get_current_user
+from src.database import Database
 from src.dependencies import get_db
+from src.ratelimit.dependencies import rate_limit_activate, rate_limit_register
 from src.user import service as user_service
 from src.user.schemas import UserRegister, UserPublic
 from src.user.schemas import UserVerificationActivate
@@ -18,7 +19,11 @@ router = APIRouter(
 security = HTTPBasic()
 
 
-@router.post("/register", status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/register",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit_register)],
+)
 async def register_user(
     user_in: UserRegister,
     db: Annotated[Database, Depends(get_db)],
@@ -33,13 +38,18 @@ async def register_user(
     **Responses**:
     - **201 Created**: User registered successfully.
     - **400 Bad Request**: Email already in use.
+    - **429 Too Many Requests**: Too many registrations from this client or for this email.
     - **503 Service Unavailable**: Failed to send verification email.
     """
     await user_service.register_user(db, user_in)
     return {"detail": "User registered. Please check your email to activate it."}
 
 
-@router.patch("/activate", status_code=status.HTTP_200_OK)
+@router.patch(
+    "/activate",
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(rate_limit_activate)],
+)
 async def activate_user(
     verification_in: UserVerificationActivate,
     current_user: Annotated[UserPublic, Depends(get_current_user)],
@@ -58,6 +68,7 @@ async def activate_user(
     - **400 Bad Request**: Invalid or expired verification code.
     - **401 Unauthorized**: Invalid credentials.
     - **403 Forbidden**: User already activated.
+    - **429 Too Many Requests**: Too many attempts from this client or for this email.
     """
     await user_service.activate_user(db, current_user, verification_in)
     return {
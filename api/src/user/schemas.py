@@ -1,7 +1,9 @@
 from datetime import datetime
+from enum import Enum
 
 from pydantic import BaseModel, field_validator, EmailStr
 
+from src.tracing.schemas import TracedValidationMixin
 from src.user.utils import is_valid_password, is_valid_verification_code
 
 
@@ -27,14 +29,32 @@ class UserMixin:
         return value
 
 
-class UserFromDB(UserMixin, BaseModel):
+class TrustedRowMixin:
+    @classmethod
+    def from_row(cls, row):
+        """
+        Build the model from a database row without validating it again:
+        the row holds data that was validated before we wrote it.
+        Columns that are not model fields are ignored.
+        """
+        return cls.model_construct(**row)
+
+
+class UserFromDB(TrustedRowMixin, UserMixin, BaseModel):
     id: int
     email: EmailStr
     password_hash: str
     is_active: bool
 
+    def to_public(self) -> "UserPublic":
+        return UserPublic.model_construct(
+            id=self.id,
+            email=self.email,
+            is_active=self.is_active,
+        )
 
-class UserRegister(UserMixin, BaseModel):
+
+class UserRegister(TracedValidationMixin, UserMixin, BaseModel):
     email: EmailStr
     password: str
 
@@ -54,12 +74,18 @@ class UserVerificationMixin:
         return code
 
 
-class UserVerificationFromDB(UserVerificationMixin, BaseModel):
+class UserVerificationFromDB(TrustedRowMixin, UserVerificationMixin, BaseModel):
     id: int
     user_id: int
     code: str
     created_at: datetime
 
 
-class UserVerificationActivate(BaseModel):
+class UserVerificationActivate(TracedValidationMixin, BaseModel):
     code: str
+
+
+class UserActivationStatus(str, Enum):
+    ACTIVATED = "activated"
+    ALREADY_ACTIVE = "already_active"
+    INVALID_CODE = "invalid_code"
@@ -1,9 +1,10 @@
-from datetime import datetime, timedelta
-
-from databases import Database
+from contextlib import nullcontext
 
+import src.outbox.crud as outbox_crud
 import src.user.crud as user_crud
-from src.auth.utils import hash_password
+from src.auth.utils import hash_password_async
+from src.config import email_outbox_settings
+from src.database import Database
 from src.logging import get_logger
 from src.user.exceptions import (
     UserAlreadyRegisteredError,
@@ -11,18 +12,21 @@ from src.user.exceptions import (
     UserVerificationCodeInvalidError,
 )
 from src.user.schemas import (
+    UserActivationStatus,
+    UserFromDB,
     UserRegister,
     UserPublic,
     UserVerificationActivate,
 )
-from src.user.tasks.email import (
-    send_confirmation_email,
-    send_verification_email,
-)
-from src.user.utils import generate_random_4_digits
+from src.user.utils import generate_random_4_digits, get_verification_code_expiry
+from src.user.verification import verification_store
+from src.workers.enqueue import LazyTask, apply_async, delay
 
 logger = get_logger(__name__)
 
+send_verification_email = LazyTask("src.user.tasks.email", "send_verification_email")
+send_confirmation_email = LazyTask("src.user.tasks.email", "send_confirmation_email")
+
 
 async def register_user(
     db: Database,
@@ -32,27 +36,65 @@ async def register_user(
     Register a new user and send a verification email.
     """
 
-    async with db.transaction():
-        existing_user = await user_crud.get_user_by_email(db, user_in.email)
-        if existing_user:
-            raise UserAlreadyRegisteredError
+    password_hash = await hash_password_async(user_in.password)
+    code = generate_random_4_digits()
+
+    # the registration is a single statement with the Postgres verification
+    # store, and a key-value store cannot join a transaction: only the outbox
+    # needs one
+    transaction = (
+        db.transaction() if email_outbox_settings.EMAIL_OUTBOX_ENABLED else nullcontext()
+    )
+    async with transaction:
+        if verification_store.in_database:
+            registration = await user_crud.create_user_with_verification(
+                db, str(user_in.email), password_hash, code
+            )
+            if not registration:
+                raise UserAlreadyRegisteredError
+            user, verification = registration
+        else:
+            user = await user_crud.create_user_if_not_registered(
+                db, str(user_in.email), password_hash
+            )
+            if not user:
+                raise UserAlreadyRegisteredError
+            try:
+                verification = await user_crud.create_user_verification(
+                    db, user.id, code
+                )
+            except Exception:
+                # the store is outside the database: without a code, the
+                # user could neither activate nor register again
+                await _delete_registered_user(db, user.id)
+                raise
+        # an email sent after the code expired is useless: the worker drops it
+        expires_at = get_verification_code_expiry(verification.created_at)
 
-        password_hash = hash_password(user_in.password)
-        user = await user_crud.create_user(db, str(user_in.email), password_hash)
-        code = generate_random_4_digits()
-        verification = await user_crud.create_user_verification(db, user.id, code)
+        if email_outbox_settings.EMAIL_OUTBOX_ENABLED:
+            await outbox_crud.create_outbox_task(
+                db,
+                send_verification_email.name,
+                [user.email, verification.code],
+                expires_at,
+            )
 
     logger.info(
         f"User ID {user.id} registered, verification code ID {verification.id} created."
     )
-    try:
-        send_verification_email.delay(user.email, verification.code)
-    except Exception as e:
-        logger.warning(
-            f"Failed to enqueue verification email for user ID {user.id}: {e}"
-        )
+    if not email_outbox_settings.EMAIL_OUTBOX_ENABLED:
+        try:
+            apply_async(
+                send_verification_email,
+                (user.email, verification.code),
+                expires=expires_at,
+            )
+        except Exception as e:
+            logger.warning(
+                f"Failed to enqueue verification email for user ID {user.id}: {e}"
+            )
 
-    return UserPublic(**user.model_dump())
+    return user.to_public()
 
 
 async def activate_user(
@@ -66,25 +108,68 @@ async def activate_user(
     if user.is_active is True:
         raise UserAlreadyActivatedError
 
-    async with db.transaction():
-        valid_verification = await user_crud.get_valid_user_verification(
-            db, user.id, verification_in.code
-        )
-        if not valid_verification:
-            raise UserVerificationCodeInvalidError
-        if valid_verification.created_at < datetime.now() - timedelta(minutes=1):
+    # the activation is a single statement with the Postgres verification
+    # store, and a key-value store cannot join a transaction: only the outbox
+    # needs one
+    transaction = (
+        db.transaction() if email_outbox_settings.EMAIL_OUTBOX_ENABLED else nullcontext()
+    )
+    async with transaction:
+        if verification_store.in_database:
+            status, activated_user = await user_crud.activate_user_with_code(
+                db, user.id, verification_in.code
+            )
+        else:
+            status, activated_user = await _activate_user_with_stored_code(
+                db, user.id, verification_in.code
+            )
+        if status is UserActivationStatus.ALREADY_ACTIVE:
+            raise UserAlreadyActivatedError
+        if status is not UserActivationStatus.ACTIVATED:
             raise UserVerificationCodeInvalidError
 
-        activated_user = await user_crud.update_user_is_active(
-            db, user.id, is_active=True
-        )
+        if email_outbox_settings.EMAIL_OUTBOX_ENABLED:
+            await outbox_crud.create_outbox_task(
+                db,
+                send_confirmation_email.name,
+                [activated_user.email],
+            )
 
     logger.info(f"User ID {user.id} activated successfully.")
+    if not email_outbox_settings.EMAIL_OUTBOX_ENABLED:
+        try:
+            delay(send_confirmation_email, activated_user.email)
+        except Exception as e:
+            logger.warning(
+                f"Failed to enqueue confirmation email for user ID {activated_user.id}: {e}"
+            )
+
+    return activated_user.to_public()
+
+
+async def _delete_registered_user(db: Database, user_id: int) -> None:
     try:
-        send_confirmation_email.delay(activated_user.email)
+        await user_crud.delete_inactive_user(db, user_id)
     except Exception as e:
-        logger.warning(
-            f"Failed to enqueue confirmation email for user ID {activated_user.id}: {e}"
-        )
+        logger.error(f"Failed to delete user ID {user_id} without a code: {e}")
+
+
+async def _activate_user_with_stored_code(
+    db: Database,
+    user_id: int,
+    code: str,
+) -> tuple[UserActivationStatus, UserFromDB | None]:
+    """
+    Check the code in the verification store, then activate the user.
+    The code is deleted once used.
+    """
+    verification = await user_crud.get_valid_user_verification(db, user_id, code)
+    if not verification:
+        return UserActivationStatus.INVALID_CODE, None
+
+    activated_user = await user_crud.activate_user(db, user_id)
+    if not activated_user:
+        return UserActivationStatus.ALREADY_ACTIVE, None
 
-    return UserPublic(**activated_user.model_dump())
+    await user_crud.delete_user_verification(db, user_id)
+    return UserActivationStatus.ACTIVATED, activated_user
@@ -1,15 +1,141 @@
 import asyncio
+from datetime import datetime, timedelta
 from email.message import EmailMessage
 
-import aiosmtplib
-from aiosmtplib.errors import SMTPException, SMTPConnectError
-from celery import shared_task
+from celery import current_app, shared_task
+from celery.utils.time import maybe_iso8601
+from celery_batches import Batches
 
+from src.config import email_batch_settings, email_brownout_settings
 from src.config import smtp_settings as settings
 from src.logging import get_logger
+from src.tracing.celery import get_task_trace_context
+from src.tracing.tracer import tracer
+from src.user.tasks.smtp import (
+    SMTPCircuitOpenError,
+    SMTPConnectionPool,
+    is_smtp_unavailable,
+    is_transient_smtp_error,
+)
+from src.user.utils import VERIFICATION_CODE_TTL
+from src.workers.breaker import CircuitBreaker
+from src.workers.brownout import Brownout, broadcast_pause_queue
+from src.workers.celery import CONFIRMATION_QUEUE, VERIFICATION_QUEUE
+from src.workers.loop import register_worker_loop_cleanup, run_in_worker_loop
+from src.workers.retry import full_jitter_backoff
 
 logger = get_logger(__name__)
 
+smtp_pool = SMTPConnectionPool(
+    hostname=settings.SMTP_SERVER,
+    port=settings.SMTP_PORT,
+    username=settings.SMTP_USER,
+    password=settings.SMTP_PASS,
+    max_size=settings.SMTP_POOL_SIZE,
+    max_messages_per_connection=settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    noop_after=settings.SMTP_POOL_NOOP_AFTER,
+)
+register_worker_loop_cleanup(smtp_pool.close)
+
+# shared by the tasks of the worker process, whatever their queue
+smtp_breaker = CircuitBreaker(
+    failure_threshold=settings.SMTP_BREAKER_FAILURE_THRESHOLD,
+    reset_timeout=settings.SMTP_BREAKER_RESET_TIMEOUT,
+)
+
+
+def get_retry_countdown(retries: int) -> float:
+    """
+    Delay before retrying an email: a full-jitter exponential backoff,
+    counted from when the SMTP circuit lets emails through again.
+    """
+    backoff = full_jitter_backoff(
+        retries, settings.SMTP_RETRY_BACKOFF_BASE, settings.SMTP_RETRY_BACKOFF_MAX
+    )
+    return smtp_breaker.retry_after() + backoff
+
+
+def record_smtp_error(error: BaseException, queue: str, hostname: str | None):
+    """
+    Record a failed email in the SMTP circuit breaker. When it opens, the
+    worker `hostname` stops consuming `queue` until the server is tried
+    again, instead of taking tasks only to retry them.
+    """
+    if not is_smtp_unavailable(error):
+        smtp_breaker.record_success()  # the server answered
+        return
+    was_open = smtp_breaker.is_open
+    smtp_breaker.record_failure()
+    if was_open or not smtp_breaker.is_open:
+        return
+    logger.warning(
+        f"SMTP server unavailable, pausing {queue} for "
+        f"{smtp_breaker.reset_timeout:.0f}s: {error}"
+    )
+    if hostname is None:
+        return
+    try:
+        broadcast_pause_queue(
+            current_app, queue, smtp_breaker.reset_timeout, destination=[hostname]
+        )
+    except Exception as e:
+        logger.warning(f"Failed to pause {queue}: {e}")
+
+
+def send_task_email(task, email: tuple[str, str, str], queue: str) -> None:
+    """
+    Send the (to_, subject, body) `email` of `task`, consumed from `queue`.
+
+    Transient failures retry the task with backoff, permanent ones fail it
+    at once. While the SMTP circuit is open, the email is not tried.
+    """
+    retries = task.request.retries
+    if smtp_breaker.is_open:
+        raise task.retry(
+            exc=SMTPCircuitOpenError(), countdown=get_retry_countdown(retries)
+        )
+    try:
+        run_in_worker_loop(send_email(*email))
+    except Exception as e:
+        record_smtp_error(e, queue, task.request.hostname)
+        if not is_transient_smtp_error(e):
+            logger.error(f"Email to {email[0]} failed permanently: {e!r}")
+            raise
+        logger.warning(f"Email to {email[0]} failed: {e!r}")
+        raise task.retry(exc=e, countdown=get_retry_countdown(retries))
+    smtp_breaker.record_success()
+
+
+def defer_confirmation_emails(seconds: float) -> None:
+    broadcast_pause_queue(current_app, CONFIRMATION_QUEUE, seconds)
+
+
+# confirmation emails share the SMTP server: they wait while verification
+# emails, whose codes expire, are late
+verification_brownout = Brownout(
+    target=email_brownout_settings.EMAIL_BROWNOUT_LATENCY_TARGET,
+    hold=email_brownout_settings.EMAIL_BROWNOUT_HOLD,
+    broadcast=defer_confirmation_emails,
+)
+
+
+def get_verification_latency(expires: datetime | str | None) -> float | None:
+    """
+    Seconds since the code of a verification email was created, derived
+    from the `expires` of its task (None without one).
+    """
+    expires = maybe_iso8601(expires)
+    if expires is None:
+        return None
+    created_at = expires - timedelta(seconds=VERIFICATION_CODE_TTL)
+    return (datetime.now(created_at.tzinfo) - created_at).total_seconds()
+
+
+def observe_verification_latency(expires: datetime | str | None) -> None:
+    latency = get_verification_latency(expires)
+    if latency is not None and email_brownout_settings.EMAIL_BROWNOUT_ENABLED:
+        verification_brownout.observe(latency)
+
 
 async def send_email(to_, subject, body):
     message = EmailMessage()
@@ -18,33 +144,159 @@ async def send_email(to_, subject, body):
     message["Subject"] = subject
     message.set_content(body)
 
-    await aiosmtplib.send(
-        message,
-        hostname=settings.SMTP_SERVER,
-        port=settings.SMTP_PORT,
-        username=settings.SMTP_USER,
-        password=settings.SMTP_PASS,
+    with tracer.start_span("smtp.send"):
+        await smtp_pool.send_message(message)
+
+
+async def send_emails(
+    emails: list[tuple[str, str, str]],
+    concurrency: int,
+) -> list[BaseException | None]:
+    """
+    Send (to_, subject, body) emails concurrently, at most `concurrency` at
+    once, and return the error raised for each email (None when sent).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send_one(to_, subject, body):
+        async with semaphore:
+            await send_email(to_, subject, body)
+
+    return await asyncio.gather(
+        *(send_one(*email) for email in emails),
+        return_exceptions=True,
     )
 
 
-@shared_task(bind=True, default_retry_delay=5, time_limit=50, max_retries=5)
-def send_verification_email(self, to_, code: str):
-    to_ = to_
+def build_verification_email(to_, code: str) -> tuple[str, str, str]:
     subject = f"Your verification code: {code}"
     body = f"Please use this code to verify your registration: {code}. This code is valid for 1 minute."
-    try:
-        asyncio.run(send_email(to_, subject, body))
-    except (SMTPException, SMTPConnectError) as e:
-        logger.warning(f"Verification email failed for {to_}: {e}")
-        raise self.retry(exc=e)
+    return to_, subject, body
+
+
+def build_confirmation_email(to_) -> tuple[str, str, str]:
+    subject = "Your account has been activated."
+    body = "Your account has been successfully activated. Thank you for joining us!"
+    return to_, subject, body
+
+
+def _send_verification_email(self, to_, code: str):
+    with tracer.start_span(
+        "send_verification_email",
+        attributes={"retries": self.request.retries},
+        parent=get_task_trace_context(self.request),
+    ):
+        # a retry keeps the task `expires`
+        send_task_email(self, build_verification_email(to_, code), VERIFICATION_QUEUE)
+    observe_verification_latency(self.request.expires)
+
+
+def _send_verification_email_batch(self, requests):
+    """
+    Send a batch of buffered `send_verification_email(to_, code)` calls.
+
+    Each request is settled on its own: sent emails are marked as done,
+    transient SMTP failures are published again with the task retry policy,
+    and other failures (or exhausted retries) are marked as failed. Requests
+    past their `expires` are revoked without being sent (the batch consumer
+    does not check it). While the SMTP circuit is open, no email is tried.
+    """
+    requests = [
+        request for request in requests if not _revoke_if_expired(self, request)
+    ]
+    if not requests:
+        return
+
+    if smtp_breaker.is_open:
+        for request in requests:
+            _retry_batch_request(self, request, SMTPCircuitOpenError(), True)
+        return
+
+    emails = [
+        build_verification_email(*request.args, **request.kwargs)
+        for request in requests
+    ]
+    # the batch serves several traces: it is linked to each of them
+    with tracer.start_span(
+        "send_verification_email.batch",
+        attributes={"batch_size": len(requests)},
+        links=[get_task_trace_context(request) for request in requests],
+    ):
+        results = run_in_worker_loop(
+            send_emails(emails, email_batch_settings.EMAIL_BATCH_CONCURRENCY)
+        )
+
+    for request, error in zip(requests, results):
+        if error is None:
+            smtp_breaker.record_success()
+            self.backend.mark_as_done(request.id, None, request=request)
+            observe_verification_latency(request.request_dict.get("expires"))
+            continue
 
+        record_smtp_error(error, VERIFICATION_QUEUE, request.hostname)
+        _retry_batch_request(self, request, error, is_transient_smtp_error(error))
 
-@shared_task(bind=True, default_retry_delay=5, time_limit=50, max_retries=5)
+
+def _retry_batch_request(self, request, error: BaseException, transient: bool):
+    to_ = request.args[0]
+    retries = request.request_dict.get("retries", 0)
+    if not transient or retries >= self.max_retries:
+        logger.error(f"Verification email dropped for {to_}: {error!r}")
+        self.backend.mark_as_failure(request.id, error, request=request)
+        return
+
+    logger.warning(f"Verification email failed for {to_}: {error!r}")
+    self.apply_async(
+        args=request.args,
+        kwargs=request.kwargs,
+        task_id=request.id,
+        countdown=get_retry_countdown(retries),
+        expires=request.request_dict.get("expires"),
+        retries=retries + 1,
+    )
+
+
+def _revoke_if_expired(self, request) -> bool:
+    expires = maybe_iso8601(request.request_dict.get("expires"))
+    if expires is None or expires > datetime.now(expires.tzinfo):
+        return False
+    logger.warning(f"Verification email expired for {request.args[0]}.")
+    self.backend.mark_as_revoked(request.id, "expired", request=request)
+    return True
+
+
+# Both modes register the same task name and signature, so callers of
+# `send_verification_email.delay(to_, code)` do not depend on the mode.
+# The code expires within a minute, so do its retries.
+if email_batch_settings.EMAIL_BATCH_ENABLED:
+    send_verification_email = shared_task(
+        _send_verification_email_batch,
+        base=Batches,
+        bind=True,
+        name=f"{__name__}.send_verification_email",
+        acks_late=True,
+        flush_every=email_batch_settings.EMAIL_BATCH_SIZE,
+        flush_interval=email_batch_settings.EMAIL_BATCH_FLUSH_INTERVAL,
+        time_limit=50,
+        max_retries=5,
+    )
+else:
+    send_verification_email = shared_task(
+        _send_verification_email,
+        bind=True,
+        name=f"{__name__}.send_verification_email",
+        time_limit=50,
+        max_retries=5,
+    )
+
+
+# with the default backoff, 10 retries span up to ~18 minutes: enough to outlast
+# an SMTP outage
+@shared_task(bind=True, time_limit=50, max_retries=10)
 def send_confirmation_email(self, to_):
-    to_ = to_
-    subject = f"Your account has been activated."
-    body = f"Your account has been successfully activated. Thank you for joining us!"
-    try:
-        asyncio.run(send_email(to_, subject, body))
-    except Exception as e:  # todo: more precise catch
-        raise self.retry(exc=e)
+    with tracer.start_span(
+        "send_confirmation_email",
+        attributes={"retries": self.request.retries},
+        parent=get_task_trace_context(self.request),
+    ):
+        send_task_email(self, build_confirmation_email(to_), CONFIRMATION_QUEUE)
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections import deque
+from email.message import EmailMessage
+
+import aiosmtplib
+from aiosmtplib.errors import (
+    SMTPException,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+    SMTPServerDisconnected,
+)
+
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class SMTPCircuitOpenError(Exception):
+    """The email was not tried: recent attempts found the SMTP server down."""
+
+
+def is_smtp_unavailable(error: BaseException) -> bool:
+    """
+    The server could not be reached, or refuses service (421): any other
+    email would fail the same way.
+    """
+    if isinstance(error, OSError):  # connection errors and timeouts
+        return True
+    return isinstance(error, SMTPResponseException) and error.code == 421
+
+
+def is_transient_smtp_error(error: BaseException) -> bool:
+    """
+    The email may go through if tried again later: the server is unavailable
+    or answered with a 4xx code. Anything else (5xx codes, invalid messages,
+    bugs) would fail again.
+    """
+    if is_smtp_unavailable(error):
+        return True
+    if isinstance(error, SMTPResponseException):
+        return 400 <= error.code < 500
+    if isinstance(error, SMTPRecipientsRefused):
+        return all(400 <= refused.code < 500 for refused in error.recipients)
+    return False
+
+
+class PooledSMTPConnection:
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """
+    Pool of authenticated SMTP connections bound to one event loop.
+
+    Idle connections are checked with a NOOP before reuse when they have been
+    idle for more than `noop_after` seconds, and are closed after
+    `max_messages_per_connection` messages. A message that fails on a reused
+    connection because the server dropped it is sent again once on a fresh
+    connection.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: str | None = None,
+        password: str | None = None,
+        max_size: int = 4,
+        max_messages_per_connection: int = 100,
+        noop_after: float = 10.0,
+        smtp_class=aiosmtplib.SMTP,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.noop_after = noop_after
+        self.smtp_class = smtp_class
+        self._idle: deque[PooledSMTPConnection] = deque()
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def idle_size(self) -> int:
+        return len(self._idle)
+
+    def _bind_loop(self) -> None:
+        # connections belong to the loop that opened them: start over when the
+        # pool is used from another loop (e.g. in a forked worker process)
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._idle.clear()
+            self._semaphore = asyncio.Semaphore(self.max_size)
+
+    async def _connect(self) -> PooledSMTPConnection:
+        client = self.smtp_class(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+        )
+        await client.connect()
+        return PooledSMTPConnection(client)
+
+    async def _is_alive(self, connection: PooledSMTPConnection) -> bool:
+        if not connection.client.is_connected:
+            return False
+        if time.monotonic() - connection.last_used < self.noop_after:
+            return True
+        try:
+            await connection.client.noop()
+        except (SMTPException, OSError):
+            return False
+        return True
+
+    async def _discard(self, connection: PooledSMTPConnection, quit_: bool = False):
+        try:
+            if quit_ and connection.client.is_connected:
+                await connection.client.quit()
+            else:
+                connection.client.close()
+        except (SMTPException, OSError) as e:
+            logger.debug(f"Failed to close SMTP connection cleanly: {e}")
+
+    async def _acquire(self) -> tuple[PooledSMTPConnection, bool]:
+        while self._idle:
+            connection = self._idle.pop()
+            if await self._is_alive(connection):
+                return connection, True
+            await self._discard(connection)
+        return await self._connect(), False
+
+    async def _release(self, connection: PooledSMTPConnection) -> None:
+        connection.last_used = time.monotonic()
+        if connection.messages_sent >= self.max_messages_per_connection:
+            await self._discard(connection, quit_=True)
+        else:
+            self._idle.append(connection)
+
+    async def send_message(self, message: EmailMessage) -> None:
+        self._bind_loop()
+        async with self._semaphore:
+            while True:
+                connection, reused = await self._acquire()
+                try:
+                    await connection.client.send_message(message)
+                except SMTPServerDisconnected:
+                    await self._discard(connection)
+                    if reused:
+                        continue  # stale connection, retry on a fresh one
+                    raise
+                except BaseException:
+                    await self._discard(connection)
+                    raise
+                connection.messages_sent += 1
+                await self._release(connection)
+                return
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._discard(self._idle.pop(), quit_=True)
@@ -1,32 +1,26 @@
-from unittest.mock import patch
+from unittest.mock import patch, ANY
 
-import databases.core
 import pytest
 
 from src.auth.dependencies import get_current_user
-from src.auth.utils import verify_password
+from src.auth.utils import verify_password_async
+from src.database import Database
+from src.user.schemas import UserActivationStatus
 from src.user.tests.assertions import assert_register_ok, assert_activate_ok
-from src.user.tests.mocks.crud import (
-    side_effect_crud_create_user,
-    side_effect_crud_create_verification,
-)
+from src.user.tests.mocks.crud import side_effect_crud_create_user_with_verification
 from src.user.tests.utils import post_activate_user, post_register_user
 from src.user.utils import is_valid_verification_code
 
 
 @patch("src.user.service.send_confirmation_email.delay")
-@patch("src.user.service.user_crud.update_user_is_active")
-@patch("src.user.service.user_crud.get_valid_user_verification")
-@patch("src.user.service.send_verification_email.delay")
-@patch("src.user.service.user_crud.create_user_verification")
-@patch("src.user.service.user_crud.create_user")
+@patch("src.user.service.user_crud.activate_user_with_code")
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.create_user_with_verification")
 @pytest.mark.asyncio
 async def test_user_register_and_activate(
-    mock_create_user,
-    mock_create_user_verification,
+    mock_create_user_with_verification,
     mock_send_verification_email,
-    mock_get_valid_user_verification,
-    mock_update_user_is_active,
+    mock_activate_user_with_code,
     mock_send_confirmation_email,
     app,
     client,
@@ -38,8 +32,9 @@ async def test_user_register_and_activate(
     # ---------------
     # Registration
     # ---------------
-    mock_create_user.side_effect = side_effect_crud_create_user
-    mock_create_user_verification.side_effect = side_effect_crud_create_verification
+    mock_create_user_with_verification.side_effect = (
+        side_effect_crud_create_user_with_verification
+    )
 
     register_response = await post_register_user(
         client,
@@ -48,27 +43,24 @@ async def test_user_register_and_activate(
     )
     assert_register_ok(register_response)
 
-    # Check: User creation call
-    mock_create_user.assert_called_once()
-    crud_args, _ = mock_create_user.call_args
-    assert len(crud_args) == 3
-    assert type(crud_args[0]) == databases.core.Database
+    # Check: User and user verification creation call
+    mock_create_user_with_verification.assert_called_once()
+    crud_args, _ = mock_create_user_with_verification.call_args
+    assert len(crud_args) == 4
+    assert type(crud_args[0]) == Database
     assert crud_args[1] == fake_crud_inactive_user.email
-    assert verify_password(fake_user_password, crud_args[2])
-
-    # Check: User verification creation call
-    mock_create_user_verification.assert_called_once()
-    crud_verif_args, _ = mock_create_user_verification.call_args
-    assert len(crud_verif_args) == 3
-    assert type(crud_verif_args[0]) == databases.core.Database
-    assert crud_verif_args[1] == fake_crud_inactive_user.id
-    created_verification_code = crud_verif_args[2]  # value will be ignored by the mock
+    assert await verify_password_async(fake_user_password, crud_args[2])
+    created_verification_code = crud_args[3]  # value will be ignored by the mock
     assert is_valid_verification_code(created_verification_code)
 
     # Check: Mailing task call
     mock_send_verification_email.assert_called_once_with(
-        fake_crud_inactive_user.email,
-        created_verification_code,  # email is sent with the new code that will be ignored next
+        (
+            fake_crud_inactive_user.email,
+            created_verification_code,  # email is sent with the new code that will be ignored next
+        ),
+        None,
+        expires=ANY,
     )
 
     # ---------------
@@ -77,8 +69,10 @@ async def test_user_register_and_activate(
 
     app.dependency_overrides[get_current_user] = lambda: fake_crud_inactive_user
 
-    mock_get_valid_user_verification.return_value = fake_crud_verification
-    mock_update_user_is_active.return_value = fake_crud_active_user
+    mock_activate_user_with_code.return_value = (
+        UserActivationStatus.ACTIVATED,
+        fake_crud_active_user,
+    )
 
     activate_response = await post_activate_user(
         client,
@@ -88,23 +82,14 @@ async def test_user_register_and_activate(
     )
     assert_activate_ok(activate_response)
 
-    # Check: Search a valid verification record
-    mock_get_valid_user_verification.assert_called_once()
-    verif_args, _ = mock_get_valid_user_verification.call_args
-    assert len(verif_args) == 3
-    assert type(verif_args[0]) == databases.core.Database
-    assert verif_args[1] == fake_crud_active_user.id
-    assert verif_args[2] == fake_crud_verification.code
-    assert is_valid_verification_code(verif_args[2])
-
-    # Check: Valid update on is_active
-    mock_update_user_is_active.assert_called_once()
-    update_args, update_kwargs = mock_update_user_is_active.call_args
-    assert len(update_args) == 2
-    assert len(update_kwargs) == 1
-    assert type(update_args[0]) == databases.core.Database
-    assert update_args[1] == fake_crud_active_user.id
-    assert update_kwargs == {"is_active": True}
+    # Check: Validate the code and activate the user
+    mock_activate_user_with_code.assert_called_once()
+    activate_args, _ = mock_activate_user_with_code.call_args
+    assert len(activate_args) == 3
+    assert type(activate_args[0]) == Database
+    assert activate_args[1] == fake_crud_active_user.id
+    assert activate_args[2] == fake_crud_verification.code
+    assert is_valid_verification_code(activate_args[2])
 
     # Check: Mailing task call
     mock_send_confirmation_email.assert_called_once_with(fake_crud_inactive_user.email)
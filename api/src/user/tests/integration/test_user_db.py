@@ -0,0 +1,10 @@
+import pytest
+
+from src.benchmarks.plans import check_plans
+from src.database import database
+
+
+@pytest.mark.asyncio
+async def test_user_queries_plans(manager_app):
+    # manager_app: the lifespan connects the database
+    assert await check_plans(database) == []
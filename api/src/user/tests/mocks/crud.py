@@ -1,7 +1,6 @@
 from datetime import datetime
 
-from databases import Database
-
+from src.database import Database
 from src.user.schemas import UserFromDB, UserVerificationFromDB
 
 
@@ -29,3 +28,13 @@ def side_effect_crud_create_verification(
         code=code,
         created_at=datetime.now(),
     )
+
+
+def side_effect_crud_create_user_with_verification(
+    db: Database,
+    email: str,
+    password_hash: str,
+    code: str,
+) -> tuple[UserFromDB, UserVerificationFromDB]:
+    user = side_effect_crud_create_user(db, email, password_hash)
+    return user, side_effect_crud_create_verification(db, user.id, code)
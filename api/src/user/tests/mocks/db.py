@@ -51,3 +51,18 @@ def return_value_db_user_verification(
         "code": code,
         "created_at": created_at,
     }
+
+
+def side_effect_db_create_user_with_verification(
+    query: str,
+    values: dict,
+) -> dict:
+    return {
+        "user_id": 1,
+        "email": values["email"],
+        "password_hash": values["password_hash"],
+        "is_active": False,
+        "verification_id": 1,
+        "code": values["code"],
+        "created_at": datetime.now(),
+    }
@@ -0,0 +1,39 @@
+from aiosmtplib.errors import SMTPServerDisconnected
+
+
+class FakeSMTP:
+    """In-memory stand-in for `aiosmtplib.SMTP` recording every call."""
+
+    instances = []
+
+    def __init__(self, hostname=None, port=None, username=None, password=None):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.is_connected = False
+        self.sent = []
+        self.noops = 0
+        self.fail_next_send = False
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def noop(self):
+        if not self.is_connected:
+            raise SMTPServerDisconnected("Not connected")
+        self.noops += 1
+
+    async def send_message(self, message):
+        if self.fail_next_send:
+            self.fail_next_send = False
+            self.is_connected = False
+            raise SMTPServerDisconnected("Connection lost")
+        self.sent.append(message)
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
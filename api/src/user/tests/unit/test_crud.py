@@ -11,7 +11,11 @@ from src.user.exceptions import (
     UserCrudInsertError,
     UserVerificationCrudInsertError,
 )
-from src.user.schemas import UserFromDB, UserVerificationFromDB
+from src.user.schemas import (
+    UserActivationStatus,
+    UserFromDB,
+    UserVerificationFromDB,
+)
 from src.user.tests.conftest import (
     fake_user_email,
     fake_crud_verification,
@@ -20,6 +24,7 @@ from src.user.tests.conftest import (
 from src.user.tests.mocks.db import (
     side_effect_db_create_user,
     side_effect_db_create_user_verification,
+    side_effect_db_create_user_with_verification,
 )
 from src.user.tests.unit.assertions import (
     assert_value_error_verification_code,
@@ -27,6 +32,7 @@ from src.user.tests.unit.assertions import (
     assert_value_error_password_hash_empty,
     assert_value_error_email_invalid,
 )
+from src.user.utils import VERIFICATION_CODE_TTL
 
 
 @pytest.mark.asyncio
@@ -162,6 +168,7 @@ async def test_get_user_by_email_success(
     mock_db.fetch_one.assert_called_once_with(
         ANY,
         {"email": fake_user_email},
+        read_only=True,
     )
     assert isinstance(user, UserFromDB)
     assert user.model_dump() == fake_crud_inactive_user.model_dump()
@@ -190,6 +197,7 @@ async def test_get_user_by_email_failure_not_found(
     mock_db.fetch_one.assert_called_once_with(
         ANY,
         {"email": fake_user_email},
+        read_only=True,
     )
     assert user is None
 
@@ -235,6 +243,150 @@ async def test_update_user_is_active_failure_not_updated(
         await crud.update_user_is_active(mock_db, fake_user_id, True)
 
 
+@pytest.mark.asyncio
+async def test_activate_user_with_code_success(
+    fake_user_id,
+    fake_verification_code,
+    fake_db_active_user,
+    fake_crud_active_user,
+):
+    mock_db = AsyncMock()
+    mock_db.fetch_one.return_value = {**fake_db_active_user, "was_active": False}
+
+    status, user = await crud.activate_user_with_code(
+        mock_db, fake_user_id, fake_verification_code
+    )
+
+    mock_db.fetch_one.assert_called_once_with(
+        ANY,
+        {
+            "user_id": fake_user_id,
+            "code": fake_verification_code,
+            "ttl": VERIFICATION_CODE_TTL,
+        },
+    )
+    assert status is UserActivationStatus.ACTIVATED
+    assert isinstance(user, UserFromDB)
+    assert user.model_dump() == fake_crud_active_user.model_dump()
+
+
+@pytest.mark.parametrize(
+    "was_active, expected_status",
+    [
+        (True, UserActivationStatus.ALREADY_ACTIVE),
+        (False, UserActivationStatus.INVALID_CODE),
+    ],
+)
+@pytest.mark.asyncio
+async def test_activate_user_with_code_not_activated(
+    was_active,
+    expected_status,
+    fake_user_id,
+    fake_verification_code,
+):
+    mock_db = AsyncMock()
+    mock_db.fetch_one.return_value = {
+        "id": None,
+        "email": None,
+        "password_hash": None,
+        "is_active": None,
+        "was_active": was_active,
+    }
+
+    status, user = await crud.activate_user_with_code(
+        mock_db, fake_user_id, fake_verification_code
+    )
+
+    assert status is expected_status
+    assert user is None
+
+
+@pytest.mark.asyncio
+async def test_activate_user_with_code_failure_db_error(
+    fake_user_id,
+    fake_verification_code,
+):
+    mock_db = AsyncMock()
+    mock_db.fetch_one.side_effect = Exception()
+
+    with pytest.raises(DBBaseError):
+        await crud.activate_user_with_code(mock_db, fake_user_id, fake_verification_code)
+
+
+@pytest.mark.asyncio
+async def test_activate_user_with_code_failure_user_not_found(
+    fake_user_id,
+    fake_verification_code,
+):
+    mock_db = AsyncMock()
+    mock_db.fetch_one.return_value = None
+
+    with pytest.raises(UserCrudUpdateIsActiveError):
+        await crud.activate_user_with_code(mock_db, fake_user_id, fake_verification_code)
+
+
+@pytest.mark.asyncio
+async def test_create_user_with_verification_success(
+    fake_user_email,
+    fake_user_password_hash,
+    fake_verification_code,
+    fake_crud_inactive_user,
+    fake_expect_verification,
+):
+    mock_db = AsyncMock()
+    mock_db.fetch_one.side_effect = side_effect_db_create_user_with_verification
+
+    user, verification = await crud.create_user_with_verification(
+        mock_db, fake_user_email, fake_user_password_hash, fake_verification_code
+    )
+
+    mock_db.fetch_one.assert_called_once_with(
+        ANY,
+        {
+            "email": fake_user_email,
+            "password_hash": fake_user_password_hash,
+            "code": fake_verification_code,
+        },
+    )
+    query, _ = mock_db.fetch_one.call_args.args
+    assert "ON CONFLICT (email) DO NOTHING" in query
+    assert isinstance(user, UserFromDB)
+    assert user.model_dump() == fake_crud_inactive_user.model_dump()
+    assert isinstance(verification, UserVerificationFromDB)
+    assert verification.model_dump() == fake_expect_verification
+
+
+@pytest.mark.asyncio
+async def test_create_user_with_verification_failure_db_error(
+    fake_user_email,
+    fake_user_password_hash,
+    fake_verification_code,
+):
+    mock_db = AsyncMock()
+    mock_db.fetch_one.side_effect = Exception()
+
+    with pytest.raises(DBBaseError):
+        await crud.create_user_with_verification(
+            mock_db, fake_user_email, fake_user_password_hash, fake_verification_code
+        )
+
+
+@pytest.mark.asyncio
+async def test_create_user_with_verification_already_registered(
+    fake_user_email,
+    fake_user_password_hash,
+    fake_verification_code,
+):
+    mock_db = AsyncMock()
+    mock_db.fetch_one.return_value = None
+
+    registration = await crud.create_user_with_verification(
+        mock_db, fake_user_email, fake_user_password_hash, fake_verification_code
+    )
+
+    assert registration is None
+
+
 @pytest.mark.asyncio
 async def test_create_user_verification_success(
     fake_user_id,
@@ -361,7 +513,12 @@ async def test_get_valid_user_verification_success(
 
     mock_db.fetch_one.assert_called_once_with(
         ANY,
-        {"user_id": fake_user_id, "code": fake_verification_code},
+        {
+            "user_id": fake_user_id,
+            "code": fake_verification_code,
+            "ttl": VERIFICATION_CODE_TTL,
+        },
+        read_only=True,
     )
     assert isinstance(verification, UserVerificationFromDB)
     assert verification.model_dump() == fake_expect_verification
@@ -399,6 +556,32 @@ async def test_get_valid_user_verification_failure_not_found(
 
     mock_db.fetch_one.assert_called_once_with(
         ANY,
-        {"user_id": fake_user_id, "code": fake_verification_code},
+        {
+            "user_id": fake_user_id,
+            "code": fake_verification_code,
+            "ttl": VERIFICATION_CODE_TTL,
+        },
+        read_only=True,
     )
     assert verification is None
+
+
+@pytest.mark.asyncio
+async def test_delete_inactive_user_only_deletes_inactive():
+    mock_db = AsyncMock()
+
+    await crud.delete_inactive_user(mock_db, 1)
+
+    query, values = mock_db.execute.call_args.args
+    assert "DELETE FROM user_data" in query
+    assert "is_active = FALSE" in query
+    assert values == {"user_id": 1}
+
+
+@pytest.mark.asyncio
+async def test_delete_inactive_user_failure_db_error():
+    mock_db = AsyncMock()
+    mock_db.execute.side_effect = Exception("db down")
+
+    with pytest.raises(DBBaseError):
+        await crud.delete_inactive_user(mock_db, 1)
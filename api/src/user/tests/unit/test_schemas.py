@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from src.user.schemas import UserFromDB, UserPublic, UserVerificationFromDB
+
+USER_ROW = {
+    "id": 1,
+    "email": "test@example.com",
+    "password_hash": "$2b$12$q1jZc9H7jm36Eu9TRn0uB.3Bmch9JasnMfhUD8IqdQsUR01afrWDm",
+    "is_active": True,
+}
+
+
+def test_user_from_row_equals_validated():
+    assert UserFromDB.from_row(USER_ROW) == UserFromDB(**USER_ROW)
+
+
+def test_user_from_row_ignores_extra_columns():
+    user = UserFromDB.from_row({**USER_ROW, "created_at": datetime.now()})
+    assert user == UserFromDB(**USER_ROW)
+    assert "created_at" not in user.model_dump()
+
+
+def test_user_verification_from_row_equals_validated():
+    row = {"id": 1, "user_id": 1, "code": "1234", "created_at": datetime.now()}
+    assert UserVerificationFromDB.from_row(row) == UserVerificationFromDB(**row)
+
+
+def test_user_to_public():
+    user = UserFromDB(**USER_ROW)
+    public = user.to_public()
+    assert isinstance(public, UserPublic)
+    assert public == UserPublic(**user.model_dump())
+    assert public.model_dump() == {
+        "id": 1,
+        "email": "test@example.com",
+        "is_active": True,
+    }
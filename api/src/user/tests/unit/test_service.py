@@ -1,15 +1,16 @@
+from datetime import timedelta
 from unittest.mock import patch, ANY
 
 import pytest
 
 from src.auth.dependencies import get_current_user
-from src.auth.utils import verify_password
+from src.auth.utils import verify_password_async
 from src.user.exceptions import (
     UserAlreadyRegisteredError,
     UserAlreadyActivatedError,
     UserVerificationCodeInvalidError,
 )
-from src.user.schemas import UserPublic
+from src.user.schemas import UserActivationStatus, UserPublic
 from src.user.service import logger as service_logger
 from src.user.service import register_user, activate_user
 from src.user.tests.assertions import assert_warning_logged
@@ -21,15 +22,11 @@ from src.user.tests.conftest import (
 from src.user.utils import is_valid_verification_code
 
 
-@patch("src.user.service.send_verification_email.delay")
-@patch("src.user.service.user_crud.create_user_verification")
-@patch("src.user.service.user_crud.create_user")
-@patch("src.user.service.user_crud.get_user_by_email")
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.create_user_with_verification")
 @pytest.mark.asyncio
 async def test_register_success(
-    mock_crud_get_user_by_email,
-    mock_crud_create_user,
-    mock_crud_create_user_verification,
+    mock_crud_create_user_with_verification,
     mock_task_send_verification_email,
     mock_db,
     fake_user_password,
@@ -40,43 +37,38 @@ async def test_register_success(
 ):
     fake_crud_user = fake_crud_inactive_user
 
-    mock_crud_get_user_by_email.return_value = None
-    mock_crud_create_user.return_value = fake_crud_user
-    mock_crud_create_user_verification.return_value = fake_crud_verification
+    mock_crud_create_user_with_verification.return_value = (
+        fake_crud_user,
+        fake_crud_verification,
+    )
 
     user = await register_user(
         db=mock_db,
         user_in=fake_router_user_register,
     )
 
-    # mock: crud doesn't find an already registered user
-    mock_crud_get_user_by_email.assert_called_once_with(
-        mock_db,
-        fake_crud_user.email,
-    )
-
-    # mock: crud creates a new user
-    mock_crud_create_user.assert_called_once_with(
+    # mock: crud creates a new user and its verification in one call
+    mock_crud_create_user_with_verification.assert_called_once_with(
         mock_db,
         fake_crud_user.email,
         ANY,
-    )
-    (_, _, created_hashed_pwd), _ = mock_crud_create_user.call_args
-    assert verify_password(fake_user_password, created_hashed_pwd)
-
-    # mock: crud creates a new user verification
-    mock_crud_create_user_verification.assert_called_once_with(
-        mock_db,
-        fake_crud_user.id,
         ANY,
     )
-    (_, _, created_code), _ = mock_crud_create_user_verification.call_args
+    (_, _, created_hashed_pwd, created_code), _ = (
+        mock_crud_create_user_with_verification.call_args
+    )
+    assert await verify_password_async(fake_user_password, created_hashed_pwd)
     assert is_valid_verification_code(created_code)
 
+    # mock: no transaction is opened for the single registration statement
+    mock_db.transaction.assert_not_called()
+
     # mock: service sends a new email task
+    # mock: the task expires with the code
     mock_task_send_verification_email.assert_called_once_with(
-        fake_crud_user.email,
-        fake_crud_verification.code,
+        (fake_crud_user.email, fake_crud_verification.code),
+        None,
+        expires=fake_crud_verification.created_at + timedelta(seconds=60),
     )
 
     # mock: service returns a correct inactive UserPublic object
@@ -84,41 +76,39 @@ async def test_register_success(
     assert user.model_dump() == fake_router_inactive_user.model_dump()
 
 
-@patch("src.user.service.user_crud.get_user_by_email")
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.create_user_with_verification")
 @pytest.mark.asyncio
 async def test_register_failure_already_registered(
-    mock_crud_get_user_by_email,
+    mock_crud_create_user_with_verification,
+    mock_task_send_verification_email,
     mock_db,
-    fake_crud_inactive_user,
     fake_router_user_register,
 ):
-    mock_crud_get_user_by_email.return_value = fake_crud_inactive_user
+    mock_crud_create_user_with_verification.return_value = None
 
     with pytest.raises(UserAlreadyRegisteredError):
         await register_user(db=mock_db, user_in=fake_router_user_register)
 
+    mock_task_send_verification_email.assert_not_called()
+
 
-@patch("src.user.service.send_verification_email.delay")
-@patch("src.user.service.user_crud.create_user_verification")
-@patch("src.user.service.user_crud.create_user")
-@patch("src.user.service.user_crud.get_user_by_email")
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.create_user_with_verification")
 @pytest.mark.asyncio
 async def test_register_failure_email_task_error(
-    mock_crud_get_user_by_email,
-    mock_crud_create_user,
-    mock_crud_create_user_verification,
+    mock_crud_create_user_with_verification,
     mock_task_send_verification_email,
     mock_db,
-    fake_user_password,
     fake_crud_inactive_user,
     fake_crud_verification,
     fake_router_user_register,
-    fake_router_inactive_user,
     caplog,
 ):
-    mock_crud_get_user_by_email.return_value = None
-    mock_crud_create_user.return_value = fake_crud_inactive_user
-    mock_crud_create_user_verification.return_value = fake_crud_verification
+    mock_crud_create_user_with_verification.return_value = (
+        fake_crud_inactive_user,
+        fake_crud_verification,
+    )
     mock_task_send_verification_email.side_effect = Exception("fail")
 
     await register_user(
@@ -132,27 +122,25 @@ async def test_register_failure_email_task_error(
 
 
 @patch("src.user.service.send_confirmation_email.delay")
-@patch("src.user.service.user_crud.update_user_is_active")
-@patch("src.user.service.user_crud.get_valid_user_verification")
+@patch("src.user.service.user_crud.activate_user_with_code")
 @pytest.mark.asyncio
 async def test_activate_success(
-    mock_crud_get_valid_user_verification,
-    mock_crud_update_user_is_active,
+    mock_crud_activate_user_with_code,
     mock_task_send_confirmation_email,
     app,
     mock_db,
-    fake_user_password,
     fake_crud_inactive_user,
     fake_crud_active_user,
-    fake_crud_verification,
     fake_router_active_user,
     fake_router_verification_activate,
 ):
     fake_crud_user = fake_crud_inactive_user
     app.dependency_overrides[get_current_user] = lambda: fake_crud_user
 
-    mock_crud_get_valid_user_verification.return_value = fake_crud_verification
-    mock_crud_update_user_is_active.return_value = fake_crud_active_user
+    mock_crud_activate_user_with_code.return_value = (
+        UserActivationStatus.ACTIVATED,
+        fake_crud_active_user,
+    )
 
     user = await activate_user(
         db=mock_db,
@@ -160,21 +148,17 @@ async def test_activate_success(
         verification_in=fake_router_verification_activate,
     )
 
-    # mock: crud finds a valid user validation
-    mock_crud_get_valid_user_verification.assert_called_once_with(
+    # mock: crud validates the code and activates the user in one call
+    mock_crud_activate_user_with_code.assert_called_once_with(
         mock_db,
         fake_crud_user.id,
         ANY,
     )
-    (_, _, created_code), _ = mock_crud_get_valid_user_verification.call_args
+    (_, _, created_code), _ = mock_crud_activate_user_with_code.call_args
     assert is_valid_verification_code(created_code)
 
-    # mock: crud updates is_active on current user
-    mock_crud_update_user_is_active.assert_called_once_with(
-        mock_db,
-        fake_crud_user.id,
-        is_active=True,
-    )
+    # mock: no transaction is opened for the single activation statement
+    mock_db.transaction.assert_not_called()
 
     # mock: service sends a new email task
     mock_task_send_confirmation_email.assert_called_once_with(
@@ -205,48 +189,48 @@ async def test_activate_failure_already_activated(
 
 
 @patch("src.user.service.send_confirmation_email.delay")
-@patch("src.user.service.user_crud.update_user_is_active")
-@patch("src.user.service.user_crud.get_valid_user_verification")
+@patch("src.user.service.user_crud.activate_user_with_code")
 @pytest.mark.asyncio
-async def test_activate_failure_verification_not_found(
-    mock_crud_get_valid_user_verification,
-    app,
+async def test_activate_failure_activated_concurrently(
+    mock_crud_activate_user_with_code,
+    mock_task_send_confirmation_email,
     mock_db,
     fake_crud_inactive_user,
     fake_router_verification_activate,
 ):
-    fake_crud_user = fake_crud_inactive_user
-    app.dependency_overrides[get_current_user] = lambda: fake_crud_user
-
-    mock_crud_get_valid_user_verification.return_value = None
+    mock_crud_activate_user_with_code.return_value = (
+        UserActivationStatus.ALREADY_ACTIVE,
+        None,
+    )
 
-    with pytest.raises(UserVerificationCodeInvalidError):
+    with pytest.raises(UserAlreadyActivatedError):
         await activate_user(
             db=mock_db,
-            user=fake_crud_user,
+            user=fake_crud_inactive_user,
             verification_in=fake_router_verification_activate,
         )
 
+    mock_task_send_confirmation_email.assert_not_called()
+
 
 @patch("src.user.service.send_confirmation_email.delay")
-@patch("src.user.service.user_crud.update_user_is_active")
-@patch("src.user.service.user_crud.get_valid_user_verification")
+@patch("src.user.service.user_crud.activate_user_with_code")
 @pytest.mark.asyncio
-async def test_activate_failure_verification_expired(
-    mock_crud_get_valid_user_verification,
-    mock_crud_update_user_is_active,
+async def test_activate_failure_verification_invalid_or_expired(
+    mock_crud_activate_user_with_code,
+    mock_task_send_confirmation_email,
     app,
     mock_db,
     fake_crud_inactive_user,
-    fake_crud_active_user,
-    fake_crud_expired_verification,
     fake_router_verification_activate,
 ):
     fake_crud_user = fake_crud_inactive_user
     app.dependency_overrides[get_current_user] = lambda: fake_crud_user
 
-    mock_crud_get_valid_user_verification.return_value = fake_crud_expired_verification
-    mock_crud_update_user_is_active.return_value = fake_crud_active_user
+    mock_crud_activate_user_with_code.return_value = (
+        UserActivationStatus.INVALID_CODE,
+        None,
+    )
 
     with pytest.raises(UserVerificationCodeInvalidError):
         await activate_user(
@@ -255,30 +239,30 @@ async def test_activate_failure_verification_expired(
             verification_in=fake_router_verification_activate,
         )
 
+    mock_task_send_confirmation_email.assert_not_called()
+
 
 @patch("src.user.service.send_confirmation_email.delay")
-@patch("src.user.service.user_crud.update_user_is_active")
-@patch("src.user.service.user_crud.get_valid_user_verification")
+@patch("src.user.service.user_crud.activate_user_with_code")
 @pytest.mark.asyncio
 async def test_activate_failure_email_task_error(
-    mock_crud_get_valid_user_verification,
-    mock_crud_update_user_is_active,
-    mock_task_send_verification_email,
+    mock_crud_activate_user_with_code,
+    mock_task_send_confirmation_email,
     app,
     mock_db,
     fake_crud_inactive_user,
     fake_crud_active_user,
-    fake_crud_verification,
     fake_router_verification_activate,
-    fake_router_active_user,
     caplog,
 ):
     fake_crud_user = fake_crud_inactive_user
     app.dependency_overrides[get_current_user] = lambda: fake_crud_user
 
-    mock_crud_get_valid_user_verification.return_value = fake_crud_verification
-    mock_crud_update_user_is_active.return_value = fake_crud_active_user
-    mock_task_send_verification_email.side_effect = Exception()
+    mock_crud_activate_user_with_code.return_value = (
+        UserActivationStatus.ACTIVATED,
+        fake_crud_active_user,
+    )
+    mock_task_send_confirmation_email.side_effect = Exception()
 
     await activate_user(
         db=mock_db,
@@ -289,3 +273,70 @@ async def test_activate_failure_email_task_error(
     assert_warning_logged(
         caplog, "Failed to enqueue confirmation email", service_logger.name
     )
+
+
+@patch("src.user.service.email_outbox_settings.EMAIL_OUTBOX_ENABLED", True)
+@patch("src.user.service.outbox_crud.create_outbox_task")
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.create_user_with_verification")
+@pytest.mark.asyncio
+async def test_register_success_with_outbox(
+    mock_crud_create_user_with_verification,
+    mock_task_send_verification_email,
+    mock_crud_create_outbox_task,
+    mock_db,
+    fake_crud_inactive_user,
+    fake_crud_verification,
+    fake_router_user_register,
+):
+    mock_crud_create_user_with_verification.return_value = (
+        fake_crud_inactive_user,
+        fake_crud_verification,
+    )
+
+    await register_user(db=mock_db, user_in=fake_router_user_register)
+
+    # mock: the user and the outbox task are written in the same transaction
+    mock_db.transaction.assert_called_once()
+
+    # mock: the task is written in the transaction instead of being enqueued
+    mock_crud_create_outbox_task.assert_called_once_with(
+        mock_db,
+        "src.user.tasks.email.send_verification_email",
+        [fake_crud_inactive_user.email, fake_crud_verification.code],
+        fake_crud_verification.created_at + timedelta(seconds=60),
+    )
+    mock_task_send_verification_email.assert_not_called()
+
+
+@patch("src.user.service.email_outbox_settings.EMAIL_OUTBOX_ENABLED", True)
+@patch("src.user.service.outbox_crud.create_outbox_task")
+@patch("src.user.service.send_confirmation_email.delay")
+@patch("src.user.service.user_crud.activate_user_with_code")
+@pytest.mark.asyncio
+async def test_activate_success_with_outbox(
+    mock_crud_activate_user_with_code,
+    mock_task_send_confirmation_email,
+    mock_crud_create_outbox_task,
+    mock_db,
+    fake_crud_inactive_user,
+    fake_crud_active_user,
+    fake_router_verification_activate,
+):
+    mock_crud_activate_user_with_code.return_value = (
+        UserActivationStatus.ACTIVATED,
+        fake_crud_active_user,
+    )
+
+    await activate_user(
+        db=mock_db,
+        user=fake_crud_inactive_user,
+        verification_in=fake_router_verification_activate,
+    )
+
+    mock_crud_create_outbox_task.assert_called_once_with(
+        mock_db,
+        "src.user.tasks.email.send_confirmation_email",
+        [fake_crud_active_user.email],
+    )
+    mock_task_send_confirmation_email.assert_not_called()
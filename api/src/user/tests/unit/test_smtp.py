@@ -0,0 +1,152 @@
+import asyncio
+from email.message import EmailMessage
+from unittest.mock import patch
+
+import pytest
+from aiosmtplib.errors import (
+    SMTPConnectError,
+    SMTPNotSupported,
+    SMTPRecipientRefused,
+    SMTPRecipientsRefused,
+    SMTPResponseException,
+    SMTPServerDisconnected,
+)
+
+from src.user.tasks.smtp import (
+    SMTPConnectionPool,
+    is_smtp_unavailable,
+    is_transient_smtp_error,
+)
+from src.user.tests.mocks.smtp import FakeSMTP
+from src.workers.loop import get_worker_loop, run_in_worker_loop
+
+
+@pytest.fixture
+def pool():
+    FakeSMTP.instances = []
+    return SMTPConnectionPool(
+        hostname="mail",
+        port=1025,
+        username="admin",
+        password="changethis",
+        max_size=2,
+        max_messages_per_connection=3,
+        noop_after=10.0,
+        smtp_class=FakeSMTP,
+    )
+
+
+def make_message(to_="test@example.com"):
+    message = EmailMessage()
+    message["To"] = to_
+    message.set_content("body")
+    return message
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_reuses_connection(pool):
+    for _ in range(3):
+        await pool.send_message(make_message())
+
+    assert len(FakeSMTP.instances) == 1
+    assert len(FakeSMTP.instances[0].sent) == 3
+    assert FakeSMTP.instances[0].username == "admin"
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_caps_messages_per_connection(pool):
+    for _ in range(4):
+        await pool.send_message(make_message())
+
+    assert len(FakeSMTP.instances) == 2
+    assert not FakeSMTP.instances[0].is_connected
+    assert len(FakeSMTP.instances[1].sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_bounds_concurrent_connections(pool):
+    await asyncio.gather(*(pool.send_message(make_message()) for _ in range(6)))
+
+    assert len(FakeSMTP.instances) <= pool.max_size
+    assert sum(len(smtp.sent) for smtp in FakeSMTP.instances) == 6
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_noop_check_on_idle_connection(pool):
+    with patch("src.user.tasks.smtp.time.monotonic", return_value=1000.0):
+        await pool.send_message(make_message())
+    with patch("src.user.tasks.smtp.time.monotonic", return_value=1011.0):
+        await pool.send_message(make_message())
+
+    assert len(FakeSMTP.instances) == 1
+    assert FakeSMTP.instances[0].noops == 1
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_reconnects_dead_idle_connection(pool):
+    await pool.send_message(make_message())
+    FakeSMTP.instances[0].is_connected = False
+
+    await pool.send_message(make_message())
+
+    assert len(FakeSMTP.instances) == 2
+    assert len(FakeSMTP.instances[1].sent) == 1
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_retries_on_dropped_reused_connection(pool):
+    await pool.send_message(make_message())
+    FakeSMTP.instances[0].fail_next_send = True
+
+    await pool.send_message(make_message())
+
+    assert len(FakeSMTP.instances) == 2
+    assert len(FakeSMTP.instances[1].sent) == 1
+    assert pool.idle_size == 1
+
+
+@pytest.mark.asyncio
+async def test_smtp_pool_failure_fresh_connection_dropped(pool):
+    with patch.object(FakeSMTP, "send_message", side_effect=SMTPServerDisconnected("lost")):
+        with pytest.raises(SMTPServerDisconnected):
+            await pool.send_message(make_message())
+
+    assert pool.idle_size == 0
+
+
+def test_worker_loop_is_persistent(pool):
+    run_in_worker_loop(pool.send_message(make_message()))
+    run_in_worker_loop(pool.send_message(make_message()))
+
+    assert get_worker_loop() is get_worker_loop()
+    assert len(FakeSMTP.instances) == 1
+    run_in_worker_loop(pool.close())
+    assert not FakeSMTP.instances[0].is_connected
+
+
+@pytest.mark.parametrize(
+    "error, transient, unavailable",
+    [
+        (SMTPConnectError("connection refused"), True, True),
+        (SMTPServerDisconnected("dropped"), True, True),
+        (TimeoutError(), True, True),
+        (SMTPResponseException(421, "service not available"), True, True),
+        (SMTPResponseException(451, "local error"), True, False),
+        (SMTPResponseException(550, "mailbox unavailable"), False, False),
+        (
+            SMTPRecipientsRefused([SMTPRecipientRefused(452, "full", "a@b.c")]),
+            True,
+            False,
+        ),
+        (
+            SMTPRecipientsRefused([SMTPRecipientRefused(550, "no user", "a@b.c")]),
+            False,
+            False,
+        ),
+        (SMTPNotSupported("no SMTPUTF8"), False, False),
+        (ValueError("invalid header"), False, False),
+    ],
+)
+def test_smtp_error_classification(error, transient, unavailable):
+    assert is_transient_smtp_error(error) is transient
+    assert is_smtp_unavailable(error) is unavailable
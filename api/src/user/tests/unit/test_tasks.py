@@ -0,0 +1,251 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import ANY, MagicMock, patch
+
+import pytest
+from aiosmtplib.errors import SMTPConnectError, SMTPResponseException
+from celery.exceptions import Retry
+
+from src.user.tasks.email import (
+    _send_verification_email_batch,
+    build_confirmation_email,
+    build_verification_email,
+    get_verification_latency,
+    send_emails,
+    send_task_email,
+    smtp_breaker,
+)
+from src.user.tasks.smtp import SMTPCircuitOpenError
+
+
+def make_request(id_, to_, code, retries=0, expires=None):
+    return SimpleNamespace(
+        id=id_,
+        args=(to_, code),
+        kwargs={},
+        hostname="verification@test",
+        request_dict={"retries": retries, "expires": expires},
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_smtp_breaker():
+    smtp_breaker.record_success()
+    yield
+    smtp_breaker.record_success()
+
+
+@pytest.fixture
+def batch_task():
+    return MagicMock(max_retries=5)
+
+
+@pytest.fixture
+def task():
+    task = MagicMock()
+    task.request.retries = 1
+    task.request.hostname = "confirmation@test"
+    task.retry.side_effect = lambda exc, countdown: Retry(exc=exc, when=countdown)
+    return task
+
+
+@patch("src.user.tasks.email.send_email")
+@pytest.mark.asyncio
+async def test_send_emails_collects_errors(mock_send_email):
+    error = SMTPResponseException(550, "mailbox unavailable")
+    mock_send_email.side_effect = [None, error]
+
+    results = await send_emails(
+        [("a@example.com", "s", "b"), ("b@example.com", "s", "b")],
+        concurrency=2,
+    )
+
+    assert results == [None, error]
+
+
+@patch("src.user.tasks.email.send_email")
+def test_send_verification_email_batch_success(mock_send_email, batch_task):
+    requests = [
+        make_request("1", "a@example.com", "1234"),
+        make_request("2", "b@example.com", "5678"),
+    ]
+
+    _send_verification_email_batch(batch_task, requests)
+
+    assert mock_send_email.call_count == 2
+    mock_send_email.assert_any_call(*build_verification_email("b@example.com", "5678"))
+    assert batch_task.backend.mark_as_done.call_count == 2
+    batch_task.apply_async.assert_not_called()
+
+
+@patch("src.user.tasks.email.get_retry_countdown", return_value=5)
+@patch("src.user.tasks.email.send_email")
+def test_send_verification_email_batch_retries_failed_message(
+    mock_send_email, mock_get_retry_countdown, batch_task
+):
+    mock_send_email.side_effect = [
+        None,
+        SMTPResponseException(421, "try again later"),
+    ]
+    expires = (datetime.now() + timedelta(seconds=30)).isoformat()
+    requests = [
+        make_request("1", "a@example.com", "1234"),
+        make_request("2", "b@example.com", "5678", retries=2, expires=expires),
+    ]
+
+    _send_verification_email_batch(batch_task, requests)
+
+    batch_task.backend.mark_as_done.assert_called_once_with(
+        "1", None, request=requests[0]
+    )
+    batch_task.apply_async.assert_called_once_with(
+        args=("b@example.com", "5678"),
+        kwargs={},
+        task_id="2",
+        countdown=5,
+        expires=expires,
+        retries=3,
+    )
+    mock_get_retry_countdown.assert_called_once_with(2)
+
+
+@patch("src.user.tasks.email.send_email")
+def test_send_verification_email_batch_fails_after_max_retries(
+    mock_send_email, batch_task
+):
+    error = SMTPResponseException(421, "try again later")
+    mock_send_email.side_effect = error
+    requests = [make_request("1", "a@example.com", "1234", retries=5)]
+
+    _send_verification_email_batch(batch_task, requests)
+
+    batch_task.apply_async.assert_not_called()
+    batch_task.backend.mark_as_failure.assert_called_once_with(
+        "1", error, request=requests[0]
+    )
+
+
+@patch("src.user.tasks.email.send_email")
+def test_send_verification_email_batch_revokes_expired(mock_send_email, batch_task):
+    expired = (datetime.now() - timedelta(seconds=1)).isoformat()
+    requests = [
+        make_request("1", "a@example.com", "1234", expires=expired),
+        make_request("2", "b@example.com", "5678"),
+    ]
+
+    _send_verification_email_batch(batch_task, requests)
+
+    mock_send_email.assert_called_once_with(
+        *build_verification_email("b@example.com", "5678")
+    )
+    batch_task.backend.mark_as_revoked.assert_called_once_with(
+        "1", "expired", request=requests[0]
+    )
+
+
+def test_get_verification_latency_from_expires():
+    expires = datetime.now() + timedelta(seconds=45)  # code created 15s ago
+
+    assert get_verification_latency(expires.isoformat()) == pytest.approx(15, abs=1)
+    assert get_verification_latency(None) is None
+
+
+@patch("src.user.tasks.email.send_email")
+def test_send_verification_email_batch_drops_permanent_failure(
+    mock_send_email, batch_task
+):
+    error = SMTPResponseException(550, "mailbox unavailable")
+    mock_send_email.side_effect = error
+    requests = [make_request("1", "a@example.com", "1234")]
+
+    _send_verification_email_batch(batch_task, requests)
+
+    batch_task.apply_async.assert_not_called()
+    batch_task.backend.mark_as_failure.assert_called_once_with(
+        "1", error, request=requests[0]
+    )
+
+
+@patch("src.user.tasks.email.send_email")
+def test_send_verification_email_batch_not_sent_while_circuit_open(
+    mock_send_email, batch_task
+):
+    for _ in range(smtp_breaker.failure_threshold):
+        smtp_breaker.record_failure()
+
+    _send_verification_email_batch(
+        batch_task, [make_request("1", "a@example.com", "1234")]
+    )
+
+    mock_send_email.assert_not_called()
+    batch_task.apply_async.assert_called_once()
+    countdown = batch_task.apply_async.call_args.kwargs["countdown"]
+    assert countdown >= smtp_breaker.retry_after() > 0
+
+
+@patch("src.user.tasks.email.send_email")
+def test_send_task_email_success(mock_send_email, task):
+    smtp_breaker.record_failure()
+    email = build_confirmation_email("a@example.com")
+
+    send_task_email(task, email, "email.confirmation")
+
+    mock_send_email.assert_called_once_with(*email)
+    task.retry.assert_not_called()
+    assert smtp_breaker._failures == 0
+
+
+@patch("src.user.tasks.email.full_jitter_backoff", return_value=3)
+@patch("src.user.tasks.email.send_email")
+def test_send_task_email_retries_transient_error(
+    mock_send_email, mock_full_jitter_backoff, task
+):
+    error = SMTPResponseException(451, "try again later")
+    mock_send_email.side_effect = error
+
+    with pytest.raises(Retry):
+        send_task_email(
+            task, build_confirmation_email("a@example.com"), "email.confirmation"
+        )
+
+    task.retry.assert_called_once_with(exc=error, countdown=3)
+    assert mock_full_jitter_backoff.call_args.args[0] == 1  # retries so far
+
+
+@patch("src.user.tasks.email.send_email")
+def test_send_task_email_fails_on_permanent_error(mock_send_email, task):
+    mock_send_email.side_effect = SMTPResponseException(550, "mailbox unavailable")
+
+    with pytest.raises(SMTPResponseException):
+        send_task_email(
+            task, build_confirmation_email("a@example.com"), "email.confirmation"
+        )
+
+    task.retry.assert_not_called()
+
+
+@patch("src.user.tasks.email.broadcast_pause_queue")
+@patch("src.user.tasks.email.send_email")
+def test_send_task_email_pauses_queue_when_circuit_opens(
+    mock_send_email, mock_broadcast_pause_queue, task
+):
+    mock_send_email.side_effect = SMTPConnectError("connection refused")
+    email = build_confirmation_email("a@example.com")
+
+    for _ in range(smtp_breaker.failure_threshold):
+        with pytest.raises(Retry):
+            send_task_email(task, email, "email.confirmation")
+
+    # the worker of the task stops consuming its queue
+    mock_broadcast_pause_queue.assert_called_once_with(
+        ANY,
+        "email.confirmation",
+        smtp_breaker.reset_timeout,
+        destination=["confirmation@test"],
+    )
+
+    # while the circuit is open, emails are not tried
+    with pytest.raises(Retry):
+        send_task_email(task, email, "email.confirmation")
+    assert mock_send_email.call_count == smtp_breaker.failure_threshold
+    assert isinstance(task.retry.call_args.kwargs["exc"], SMTPCircuitOpenError)
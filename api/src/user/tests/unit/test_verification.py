@@ -0,0 +1,209 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fakeredis import FakeAsyncRedis
+
+from src.user.exceptions import (
+    UserAlreadyActivatedError,
+    UserVerificationCodeInvalidError,
+)
+from src.user.schemas import UserVerificationActivate
+from src.user.service import activate_user, register_user
+from src.user.utils import VERIFICATION_CODE_TTL
+from src.user.verification import (
+    MemoryVerificationStore,
+    PostgresVerificationStore,
+    RedisVerificationStore,
+)
+
+
+@pytest.fixture(params=["memory", "redis"])
+def kv_store(request):
+    if request.param == "redis":
+        return RedisVerificationStore(FakeAsyncRedis(), ttl=60)
+    return MemoryVerificationStore(ttl=60)
+
+
+@pytest.mark.asyncio
+async def test_kv_store_code_valid_until_deleted(kv_store, mock_db):
+    verification = await kv_store.create(mock_db, 1, "1234")
+    assert verification.user_id == 1
+    assert verification.code == "1234"
+
+    valid = await kv_store.get_valid(mock_db, 1, "1234")
+    assert valid.user_id == 1
+    assert valid.created_at == verification.created_at
+
+    assert await kv_store.get_valid(mock_db, 1, "4321") is None
+    assert await kv_store.get_valid(mock_db, 2, "1234") is None
+
+    await kv_store.delete(mock_db, 1)
+    assert await kv_store.get_valid(mock_db, 1, "1234") is None
+
+    # mock: the database is never queried
+    mock_db.fetch_one.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_kv_store_new_code_replaces_previous(kv_store, mock_db):
+    await kv_store.create(mock_db, 1, "1234")
+    await kv_store.create(mock_db, 1, "5678")
+
+    assert await kv_store.get_valid(mock_db, 1, "1234") is None
+    assert await kv_store.get_valid(mock_db, 1, "5678") is not None
+
+
+@pytest.mark.asyncio
+async def test_memory_store_code_expires(mock_db):
+    store = MemoryVerificationStore(ttl=60)
+
+    with patch("src.user.verification.time.monotonic", return_value=1000.0):
+        await store.create(mock_db, 1, "1234")
+    with patch("src.user.verification.time.monotonic", return_value=1059.0):
+        assert await store.get_valid(mock_db, 1, "1234") is not None
+    with patch("src.user.verification.time.monotonic", return_value=1060.0):
+        assert await store.get_valid(mock_db, 1, "1234") is None
+
+        # expired codes are dropped when a new one is added
+        await store.create(mock_db, 2, "1234")
+    assert list(store._codes) == [2]
+
+
+@pytest.mark.asyncio
+async def test_redis_store_code_expires_on_server(mock_db):
+    client = FakeAsyncRedis()
+    store = RedisVerificationStore(client, ttl=60)
+
+    await store.create(mock_db, 1, "1234")
+
+    assert 0 < await client.ttl("verification:1") <= 60
+
+
+@pytest.mark.asyncio
+async def test_postgres_store_queries_table(mock_db, fake_crud_verification):
+    store = PostgresVerificationStore()
+    mock_db.fetch_one = AsyncMock(return_value=fake_crud_verification.model_dump())
+
+    verification = await store.get_valid(mock_db, 1, "1234")
+
+    assert verification.code == fake_crud_verification.code
+    query, values = mock_db.fetch_one.call_args.args
+    assert "FROM user_verification" in query
+    assert values == {"user_id": 1, "code": "1234", "ttl": VERIFICATION_CODE_TTL}
+
+
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.create_user_if_not_registered")
+@pytest.mark.asyncio
+async def test_register_with_kv_store(
+    mock_crud_create_user_if_not_registered,
+    mock_task_send_verification_email,
+    mock_db,
+    fake_crud_inactive_user,
+    fake_router_user_register,
+):
+    store = MemoryVerificationStore()
+    mock_crud_create_user_if_not_registered.return_value = fake_crud_inactive_user
+
+    with patch("src.user.service.verification_store", store), patch(
+        "src.user.crud.verification_store", store
+    ):
+        await register_user(db=mock_db, user_in=fake_router_user_register)
+
+    # mock: the code is stored and emailed, not written to user_verification
+    ((email, code), _), _ = mock_task_send_verification_email.call_args
+    assert email == fake_crud_inactive_user.email
+    assert await store.get_valid(mock_db, fake_crud_inactive_user.id, code)
+    mock_db.fetch_one.assert_not_called()
+
+
+@patch("src.user.service.send_verification_email.apply_async")
+@patch("src.user.service.user_crud.delete_inactive_user")
+@patch("src.user.service.user_crud.create_user_if_not_registered")
+@pytest.mark.asyncio
+async def test_register_with_kv_store_failure_deletes_user(
+    mock_crud_create_user_if_not_registered,
+    mock_crud_delete_inactive_user,
+    mock_task_send_verification_email,
+    mock_db,
+    fake_crud_inactive_user,
+    fake_router_user_register,
+):
+    store = MemoryVerificationStore()
+    store.create = AsyncMock(side_effect=ConnectionError("store down"))
+    mock_crud_create_user_if_not_registered.return_value = fake_crud_inactive_user
+
+    with patch("src.user.service.verification_store", store), patch(
+        "src.user.crud.verification_store", store
+    ):
+        with pytest.raises(ConnectionError):
+            await register_user(db=mock_db, user_in=fake_router_user_register)
+
+    # mock: the user is deleted, so the email can register again
+    mock_crud_delete_inactive_user.assert_called_once_with(
+        mock_db, fake_crud_inactive_user.id
+    )
+    mock_task_send_verification_email.assert_not_called()
+
+
+@patch("src.user.service.send_confirmation_email.delay")
+@patch("src.user.service.user_crud.activate_user")
+@pytest.mark.asyncio
+async def test_activate_with_kv_store(
+    mock_crud_activate_user,
+    mock_task_send_confirmation_email,
+    mock_db,
+    fake_crud_inactive_user,
+    fake_crud_active_user,
+):
+    store = MemoryVerificationStore()
+    user = fake_crud_inactive_user
+    await store.create(mock_db, user.id, "1234")
+    mock_crud_activate_user.return_value = fake_crud_active_user
+
+    with patch("src.user.service.verification_store", store), patch(
+        "src.user.crud.verification_store", store
+    ):
+        with pytest.raises(UserVerificationCodeInvalidError):
+            await activate_user(
+                db=mock_db,
+                user=user,
+                verification_in=UserVerificationActivate(code="4321"),
+            )
+        mock_crud_activate_user.assert_not_called()
+
+        activated = await activate_user(
+            db=mock_db,
+            user=user,
+            verification_in=UserVerificationActivate(code="1234"),
+        )
+
+    assert activated.is_active is True
+    mock_crud_activate_user.assert_called_once_with(mock_db, user.id)
+    mock_task_send_confirmation_email.assert_called_once_with(user.email)
+
+    # the used code is deleted
+    assert await store.get_valid(mock_db, user.id, "1234") is None
+
+
+@patch("src.user.service.user_crud.activate_user")
+@pytest.mark.asyncio
+async def test_activate_with_kv_store_activated_concurrently(
+    mock_crud_activate_user,
+    mock_db,
+    fake_crud_inactive_user,
+):
+    store = MemoryVerificationStore()
+    user = fake_crud_inactive_user
+    await store.create(mock_db, user.id, "1234")
+    mock_crud_activate_user.return_value = None
+
+    with patch("src.user.service.verification_store", store), patch(
+        "src.user.crud.verification_store", store
+    ):
+        with pytest.raises(UserAlreadyActivatedError):
+            await activate_user(
+                db=mock_db,
+                user=user,
+                verification_in=UserVerificationActivate(code="1234"),
+            )
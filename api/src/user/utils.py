@@ -1,5 +1,8 @@
 import random
 import re
+from datetime import datetime, timedelta
+
+VERIFICATION_CODE_TTL = 60  # seconds, the "1 minute" of the emails and queries
 
 
 def is_valid_password(password: str) -> bool:
@@ -20,3 +23,7 @@ def is_valid_verification_code(code: str) -> bool:
 
 def generate_random_4_digits() -> str:
     return "".join(random.choices("0123456789", k=4))
+
+
+def get_verification_code_expiry(created_at: datetime) -> datetime:
+    return created_at + timedelta(seconds=VERIFICATION_CODE_TTL)
@@ -0,0 +1,215 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from src.config import verification_settings as settings
+from src.database import Database
+from src.exceptions import DBBaseError
+from src.user.exceptions import UserVerificationCrudInsertError
+from src.user.schemas import UserVerificationFromDB
+from src.user.utils import VERIFICATION_CODE_TTL
+
+
+class PostgresVerificationStore:
+    """
+    Codes kept in the `user_verification` table, purged by pg_cron.
+
+    `in_database` lets the service write and check the code in the same
+    statement as the user (see `create_user_with_verification` and
+    `activate_user_with_code`).
+    """
+
+    in_database = True
+
+    async def create(
+        self, db: Database, user_id: int, code: str
+    ) -> UserVerificationFromDB:
+        query = """
+            INSERT INTO user_verification (user_id, code) 
+            VALUES (:user_id, :code)
+            RETURNING id, user_id, code, created_at
+            ;
+        """
+
+        try:
+            row = await db.fetch_one(
+                query,
+                {
+                    "user_id": user_id,
+                    "code": code,
+                },
+            )
+        except Exception as e:
+            raise DBBaseError from e
+
+        if not row:
+            raise UserVerificationCrudInsertError
+
+        return UserVerificationFromDB(**row)
+
+    async def get_valid(
+        self, db: Database, user_id: int, code: str
+    ) -> UserVerificationFromDB | None:
+        query = """
+            SELECT id, user_id, code, created_at
+            FROM user_verification
+            WHERE 
+                user_id = :user_id
+                AND code = :code
+                AND created_at > NOW() - make_interval(secs => :ttl)
+                AND created_at <= NOW()  -- bounds the scan to the current partitions
+            ;
+        """
+
+        try:
+            row = await db.fetch_one(
+                query,
+                {
+                    "user_id": user_id,
+                    "code": code,
+                    "ttl": VERIFICATION_CODE_TTL,
+                },
+                read_only=True,
+            )
+        except Exception as e:
+            raise DBBaseError from e
+
+        if not row:
+            return None
+
+        return UserVerificationFromDB.from_row(row)
+
+    async def delete(self, db: Database, user_id: int) -> None:
+        pass  # expired rows are purged by pg_cron
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryVerificationStore:
+    """
+    Codes kept in a dict of the API process, for single nodes and tests.
+
+    One code per user, keyed by user id: lookups are O(1). All codes share
+    the same TTL, so the dict is ordered by expiry and expired codes are
+    dropped from its front whenever a code is added.
+    """
+
+    in_database = False
+
+    def __init__(self, ttl: float = VERIFICATION_CODE_TTL):
+        self.ttl = ttl
+        # user id -> (code, created_at, expires_at)
+        self._codes: OrderedDict[int, tuple[str, datetime, float]] = OrderedDict()
+
+    def _purge_expired(self, now: float) -> None:
+        while self._codes:
+            user_id, (_, _, expires_at) = next(iter(self._codes.items()))
+            if expires_at > now:
+                return
+            del self._codes[user_id]
+
+    async def create(
+        self, db: Database, user_id: int, code: str
+    ) -> UserVerificationFromDB:
+        now = time.monotonic()
+        self._purge_expired(now)
+        created_at = datetime.now()
+        self._codes.pop(user_id, None)
+        self._codes[user_id] = (code, created_at, now + self.ttl)
+        return UserVerificationFromDB.model_construct(
+            id=user_id, user_id=user_id, code=code, created_at=created_at
+        )
+
+    async def get_valid(
+        self, db: Database, user_id: int, code: str
+    ) -> UserVerificationFromDB | None:
+        entry = self._codes.get(user_id)
+        if entry is None:
+            return None
+        stored_code, created_at, expires_at = entry
+        if expires_at <= time.monotonic() or stored_code != code:
+            return None
+        return UserVerificationFromDB.model_construct(
+            id=user_id, user_id=user_id, code=code, created_at=created_at
+        )
+
+    async def delete(self, db: Database, user_id: int) -> None:
+        self._codes.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._codes.clear()
+
+    async def close(self) -> None:
+        pass
+
+
+class RedisVerificationStore:
+    """
+    Codes kept on a Redis-protocol server, expired by the server (SET EX).
+    One code per user, keyed by user id.
+    """
+
+    in_database = False
+
+    def __init__(
+        self,
+        client,
+        ttl: int = VERIFICATION_CODE_TTL,
+        key_prefix: str = "verification:",
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisVerificationStore":
+        import redis.asyncio  # only needed with this backend
+
+        return cls(redis.asyncio.from_url(url))
+
+    async def create(
+        self, db: Database, user_id: int, code: str
+    ) -> UserVerificationFromDB:
+        created_at = datetime.now()
+        await self.client.set(
+            f"{self.key_prefix}{user_id}",
+            f"{code}|{created_at.isoformat()}",
+            ex=self.ttl,
+        )
+        return UserVerificationFromDB.model_construct(
+            id=user_id, user_id=user_id, code=code, created_at=created_at
+        )
+
+    async def get_valid(
+        self, db: Database, user_id: int, code: str
+    ) -> UserVerificationFromDB | None:
+        value = await self.client.get(f"{self.key_prefix}{user_id}")
+        if value is None:
+            return None
+        stored_code, _, created_at = value.decode().partition("|")
+        if stored_code != code:
+            return None
+        return UserVerificationFromDB.model_construct(
+            id=user_id,
+            user_id=user_id,
+            code=code,
+            created_at=datetime.fromisoformat(created_at),
+        )
+
+    async def delete(self, db: Database, user_id: int) -> None:
+        await self.client.delete(f"{self.key_prefix}{user_id}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+def _build_store():
+    if settings.VERIFICATION_STORE == "redis":
+        return RedisVerificationStore.from_url(settings.VERIFICATION_REDIS_URL)
+    if settings.VERIFICATION_STORE == "memory":
+        return MemoryVerificationStore()
+    return PostgresVerificationStore()
+
+
+verification_store = _build_store()
@@ -0,0 +1,65 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Fail fast while a dependency is down.
+
+    Closed: calls go through, and `failure_threshold` consecutive failures
+    open the circuit. Open: calls are rejected for `reset_timeout` seconds.
+    Then half-open: calls are let through again as trials, the first outcome
+    closes the circuit (success) or opens it for another `reset_timeout`
+    (failure).
+
+    Thread-safe, so a process can share one breaker between its threads.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 5.0,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return self.CLOSED
+        if self._clock() - self._opened_at < self.reset_timeout:
+            return self.OPEN
+        return self.HALF_OPEN
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls must be rejected."""
+        return self.state == self.OPEN
+
+    def retry_after(self) -> float:
+        """Seconds until calls are let through again (0 if they are)."""
+        opened_at = self._opened_at
+        if opened_at is None:
+            return 0.0
+        return max(opened_at + self.reset_timeout - self._clock(), 0.0)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                # a failed trial reopens for a full timeout
+                self._opened_at = self._clock()
@@ -0,0 +1,110 @@
+import time
+
+from celery.worker.control import control_command
+
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class Brownout:
+    """
+    Ask the workers to defer a lower-priority queue while a latency is
+    above `target`.
+
+    `observe()` is called with each measured latency: above the target, the
+    lower-priority queue is paused for `hold` seconds with `broadcast(hold)`.
+    The pause is a lease, renewed at most every `hold / 2` seconds while the
+    latency stays above target, so the queue resumes on its own once the
+    latency recovers, or if the process observing it stops.
+    """
+
+    def __init__(self, target: float, hold: float, broadcast, clock=time.monotonic):
+        self.target = target
+        self.hold = hold
+        self._broadcast = broadcast
+        self._clock = clock
+        self._renew_at = float("-inf")
+
+    def observe(self, latency: float) -> None:
+        if latency <= self.target:
+            return
+        now = self._clock()
+        if now < self._renew_at:
+            return
+        self._renew_at = now + self.hold / 2
+        logger.warning(
+            f"Latency {latency:.1f}s above the {self.target:.1f}s target, "
+            f"deferring lower-priority emails for {self.hold:.0f}s."
+        )
+        try:
+            self._broadcast(self.hold)
+        except Exception as e:
+            logger.warning(f"Failed to broadcast the brownout: {e}")
+
+
+class QueuePause:
+    """
+    Stop consuming `queue` until a deadline, extended by each `pause()`.
+
+    Runs in the worker consumer: the messages stay in the broker while the
+    queue is paused. Workers that do not consume `queue` ignore the pause.
+    """
+
+    def __init__(self, queue: str, clock=time.monotonic):
+        self.queue = queue
+        self._clock = clock
+        self.until = 0.0
+        self.paused = False
+
+    def pause(self, consumer, seconds: float) -> bool:
+        self.until = max(self.until, self._clock() + seconds)
+        if self.paused:
+            return True
+        if not consumer.task_consumer.consuming_from(self.queue):
+            return False
+        consumer.cancel_task_queue(self.queue)
+        self.paused = True
+        consumer.timer.call_after(seconds, self._resume, (consumer,))
+        return True
+
+    def _resume(self, consumer) -> None:
+        remaining = self.until - self._clock()
+        if remaining > 0:
+            consumer.timer.call_after(remaining, self._resume, (consumer,))
+            return
+        # selected again, so the queue is also consumed after a reconnection
+        queues = consumer.app.amqp.queues
+        queues.select_add(queues[self.queue])
+        consumer.add_task_queue(self.queue)
+        self.paused = False
+        logger.info(f"Resumed consuming {self.queue}.")
+
+
+def broadcast_pause_queue(
+    app, queue: str, seconds: float, destination: list[str] | None = None
+) -> None:
+    """
+    Ask the workers (all of them, or the `destination` nodes) to stop
+    consuming `queue` for `seconds`.
+    """
+    app.control.broadcast(
+        "pause_queue",
+        arguments={"queue": queue, "seconds": seconds},
+        destination=destination,
+    )
+
+
+_pauses: dict[str, QueuePause] = {}
+
+
+@control_command(
+    args=[("queue", str), ("seconds", float)],
+    signature="<queue> <seconds>",
+)
+def pause_queue(state, queue: str, seconds: float):
+    """Stop consuming a queue for some seconds."""
+    queue_pause = _pauses.setdefault(queue, QueuePause(queue))
+    if queue_pause.pause(state.consumer, seconds):
+        return {"ok": f"{queue} paused for {seconds}s"}
+    return {"ok": f"not consuming {queue}"}
@@ -1,6 +1,13 @@
 from celery import Celery
+from kombu import Queue
 
-from src.config import worker_settings
+import src.workers.brownout  # noqa: F401, registers the pause_queue command
+from src.config import email_batch_settings, worker_settings
+
+# verification codes expire within a minute: their emails get their own queue
+# and worker pool, so a backlog of other tasks never delays them
+VERIFICATION_QUEUE = "email.verification"
+CONFIRMATION_QUEUE = "email.confirmation"
 
 celery = Celery(
     "worker",
@@ -8,6 +15,21 @@ celery = Celery(
     backend=worker_settings.CELERY_RESULT_BACKEND,
 )
 
+celery.conf.task_queues = (
+    Queue(VERIFICATION_QUEUE),
+    Queue(CONFIRMATION_QUEUE),
+    Queue("celery"),
+)
+celery.conf.task_routes = {
+    "src.user.tasks.email.send_verification_email": {"queue": VERIFICATION_QUEUE},
+    "src.user.tasks.email.send_confirmation_email": {"queue": CONFIRMATION_QUEUE},
+}
+
+if email_batch_settings.EMAIL_BATCH_ENABLED:
+    # batch tasks are buffered in the consumer: it must be allowed to prefetch
+    # at least a full batch, otherwise batches only flush on the interval
+    celery.conf.worker_prefetch_multiplier = email_batch_settings.EMAIL_BATCH_SIZE
+
 celery.autodiscover_tasks(
     [
         "src.user",  # discovers src.user.tasks (thanks to __all__ declaration)
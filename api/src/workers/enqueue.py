@@ -0,0 +1,68 @@
+import importlib
+import time
+
+from src.metrics.registry import registry
+from src.tracing.tracer import tracer
+from src.workers.publisher import task_publisher
+
+TASK_ENQUEUE_DURATION = registry.histogram(
+    "celery_task_enqueue_duration_seconds",
+    "Latency of task enqueue calls (buffering, or publishing when synchronous).",
+    ("task",),
+)
+TASK_ENQUEUE_FAILURES = registry.counter(
+    "celery_task_enqueue_failures",
+    "Task enqueue calls that raised.",
+    ("task",),
+)
+
+
+class LazyTask:
+    """
+    Stand-in for the Celery task `name` of `module`, imported on first use:
+    the API process only loads Celery, kombu and the SMTP client once it
+    enqueues a task, not at startup.
+    """
+
+    def __init__(self, module: str, name: str):
+        self._module = module
+        self._attribute = name
+        self.name = f"{module}.{name}"  # Celery's default task name
+
+    def __getattr__(self, attribute: str):
+        task = getattr(importlib.import_module(self._module), self._attribute)
+        return getattr(task, attribute)
+
+
+def delay(task, *args, **kwargs):
+    """
+    Enqueue `task` with `args` and `kwargs`, like `task.delay()`.
+    """
+    return apply_async(task, args, kwargs)
+
+
+def apply_async(task, args: tuple = (), kwargs: dict | None = None, **options):
+    """
+    Enqueue `task` with the Celery `options` (e.g. `expires`), recording its
+    latency and failures.
+
+    With the task publisher running, the task is only buffered and published
+    in the background; otherwise `task.apply_async()` publishes it
+    synchronously. The task is enqueued in an `enqueue` span, its parent in
+    the worker.
+    """
+    start = time.perf_counter()
+    try:
+        with tracer.start_span("enqueue", attributes={"task": task.name}):
+            if task_publisher.running:
+                return task_publisher.publish(task.name, args, kwargs, options)
+            import src.tracing.celery  # noqa: F401, sends the trace context
+
+            if not options:
+                return task.delay(*args, **(kwargs or {}))
+            return task.apply_async(args, kwargs, **options)
+    except Exception:
+        TASK_ENQUEUE_FAILURES.labels(task.name).inc()
+        raise
+    finally:
+        TASK_ENQUEUE_DURATION.labels(task.name).observe(time.perf_counter() - start)
@@ -0,0 +1,56 @@
+import asyncio
+import os
+
+from celery.signals import worker_process_shutdown
+
+from src.logging import get_logger
+
+logger = get_logger(__name__)
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_pid: int | None = None
+_cleanups = []
+
+
+def get_worker_loop() -> asyncio.AbstractEventLoop:
+    """
+    Return the long-lived event loop of the current worker process.
+
+    The loop is created on first use and recreated after a fork, so every
+    prefork child owns its own loop (and whatever connections live on it).
+    """
+    global _loop, _loop_pid
+    if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+        _loop = asyncio.new_event_loop()
+        _loop_pid = os.getpid()
+    return _loop
+
+
+def run_in_worker_loop(coro):
+    """Run a coroutine to completion on the worker process event loop."""
+    return get_worker_loop().run_until_complete(coro)
+
+
+def register_worker_loop_cleanup(func):
+    """Register a coroutine function awaited before the worker loop closes."""
+    _cleanups.append(func)
+    return func
+
+
+def close_worker_loop() -> None:
+    global _loop, _loop_pid
+    if _loop is None or _loop_pid != os.getpid():
+        return
+    for cleanup in _cleanups:
+        try:
+            _loop.run_until_complete(cleanup())
+        except Exception as e:
+            logger.warning(f"Worker loop cleanup {cleanup!r} failed: {e}")
+    _loop.close()
+    _loop = None
+    _loop_pid = None
+
+
+@worker_process_shutdown.connect
+def handle_worker_process_shutdown(**kwargs):
+    close_worker_loop()
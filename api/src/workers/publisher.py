@@ -0,0 +1,283 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from src.config import task_publisher_settings as settings
+from src.logging import get_logger
+from src.metrics.registry import registry
+from src.workers.breaker import CircuitBreaker
+
+logger = get_logger(__name__)
+
+TASK_PUBLISH_DURATION = registry.histogram(
+    "task_publisher_publish_duration_seconds",
+    "Time to publish a buffered task to the broker, confirmation included.",
+)
+TASK_PUBLISH_FAILURES = registry.counter(
+    "task_publisher_publish_failures",
+    "Broker errors while publishing buffered tasks.",
+)
+TASK_PUBLISH_DROPPED = registry.counter(
+    "task_publisher_dropped",
+    "Tasks not published, by reason.",
+    ("reason",),
+)
+
+
+class TaskPublisherUnavailableError(Exception):
+    """The task was not buffered: the buffer is full or the broker is down."""
+
+
+@dataclass
+class BufferedTask:
+    name: str
+    args: tuple
+    kwargs: dict
+    options: dict  # `send_task()` options, e.g. `expires`
+    context: contextvars.Context  # of the enqueuing request, for its trace
+
+
+def _get_celery_app():
+    import src.tracing.celery  # noqa: F401, sends the trace context with tasks
+    from src.workers.celery import celery
+
+    return celery
+
+
+class TaskPublisher:
+    """
+    Publish Celery tasks without blocking the event loop.
+
+    `publish()` only appends the task to a bounded in-memory buffer. A
+    background task drains it, handing batches to a single thread that
+    publishes them over one persistent broker connection, in confirm mode
+    when `confirm` is set (a task is dropped from the buffer once the broker
+    has acknowledged it).
+
+    A circuit breaker opens after consecutive broker errors: while it is
+    open, `publish()` fails fast and the drain only retries once per
+    `reset_timeout`. Tasks still buffered at shutdown are published within
+    `shutdown_timeout`, the others are dropped.
+    """
+
+    def __init__(
+        self,
+        max_buffer_size: int = 10_000,
+        batch_size: int = 100,
+        confirm: bool = True,
+        failure_threshold: int = 3,
+        reset_timeout: float = 5.0,
+        shutdown_timeout: float = 5.0,
+        enabled: bool = True,
+        get_app=_get_celery_app,
+    ):
+        self.max_buffer_size = max_buffer_size
+        self.batch_size = batch_size
+        self.confirm = confirm
+        self.shutdown_timeout = shutdown_timeout
+        self.enabled = enabled
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._get_app = get_app
+        self._buffer: deque[BufferedTask] = deque()
+        self._ready = asyncio.Event()
+        self._drain_task: asyncio.Task | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._app = None
+        self._connection = None
+        self._producer = None
+
+    @property
+    def running(self) -> bool:
+        return self._drain_task is not None
+
+    @property
+    def buffer_size(self) -> int:
+        return len(self._buffer)
+
+    async def start(self) -> None:
+        if not self.enabled or self.running:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="task-publisher"
+        )
+        self._ready = asyncio.Event()
+        self._drain_task = asyncio.create_task(self._drain())
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        try:
+            async with asyncio.timeout(self.shutdown_timeout):
+                while self._buffer and not self.breaker.is_open:
+                    await asyncio.sleep(0.01)
+        except TimeoutError:
+            pass
+        if self._buffer:
+            logger.warning(f"Dropped {len(self._buffer)} unpublished task(s).")
+            TASK_PUBLISH_DROPPED.labels("shutdown").inc(len(self._buffer))
+            self._buffer.clear()
+
+        self._drain_task.cancel()
+        try:
+            await self._drain_task
+        except asyncio.CancelledError:
+            pass
+        self._drain_task = None
+        await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._release_connection
+        )
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    def publish(
+        self,
+        name: str,
+        args: tuple = (),
+        kwargs: dict | None = None,
+        options: dict | None = None,
+    ) -> None:
+        """
+        Buffer the task `name` for publishing with the `send_task()`
+        `options`, or raise
+        `TaskPublisherUnavailableError` right away.
+        """
+        if self.breaker.is_open:
+            TASK_PUBLISH_DROPPED.labels("circuit_open").inc()
+            raise TaskPublisherUnavailableError("broker unavailable")
+        if len(self._buffer) >= self.max_buffer_size:
+            TASK_PUBLISH_DROPPED.labels("buffer_full").inc()
+            raise TaskPublisherUnavailableError("publish buffer full")
+        self._buffer.append(
+            BufferedTask(
+                name, args, kwargs or {}, options or {}, contextvars.copy_context()
+            )
+        )
+        self._ready.set()
+
+    # Drain (event loop)
+
+    async def _drain(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self._buffer:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+
+            retry_after = self.breaker.retry_after()
+            if retry_after > 0:
+                await asyncio.sleep(retry_after)
+                continue
+
+            # a half-open breaker is probed with a single task
+            half_open = self.breaker.state == CircuitBreaker.HALF_OPEN
+            size = min(1 if half_open else self.batch_size, len(self._buffer))
+            batch = [self._buffer[i] for i in range(size)]
+            done, durations, error = await loop.run_in_executor(
+                self._executor, self._publish_batch, batch
+            )
+
+            for _ in range(done):
+                self._buffer.popleft()
+            for duration in durations:
+                TASK_PUBLISH_DURATION.observe(duration)
+            if error is None:
+                self.breaker.record_success()
+                continue
+
+            TASK_PUBLISH_FAILURES.inc()
+            self.breaker.record_failure()
+            logger.warning(f"Failed to publish task {batch[done].name}: {error}")
+            if not self.breaker.is_open:
+                await asyncio.sleep(0.1)
+
+    # Publishing (publisher thread)
+
+    def _publish_batch(
+        self, batch: list[BufferedTask]
+    ) -> tuple[int, list[float], Exception | None]:
+        """
+        Publish the tasks in order until the broker fails. Return the number
+        of tasks done with, the duration of each task published and the
+        broker error, if any. A task that cannot be encoded is dropped.
+        """
+        from kombu.exceptions import EncodeError
+
+        done = 0
+        durations = []
+        for task in batch:
+            start = time.perf_counter()
+            try:
+                task.context.run(self._send, task)
+            except EncodeError as e:
+                logger.error(f"Dropped task {task.name}, it cannot be encoded: {e}")
+                TASK_PUBLISH_DROPPED.labels("encode_error").inc()
+                done += 1
+                continue
+            except Exception as e:
+                self._release_connection()
+                return done, durations, e
+            durations.append(time.perf_counter() - start)
+            done += 1
+        return done, durations, None
+
+    def _send(self, task: BufferedTask) -> None:
+        if self._producer is None:
+            if self._app is None:
+                self._app = self._get_app()
+            transport_options = {
+                **self._app.conf.broker_transport_options,
+                "confirm_publish": self.confirm,
+            }
+            self._connection = self._app.connection_for_write(
+                transport_options=transport_options
+            )
+            self._producer = self._app.amqp.Producer(
+                self._connection, auto_declare=False
+            )
+        self._app.send_task(
+            task.name,
+            args=task.args,
+            kwargs=task.kwargs,
+            producer=self._producer,
+            retry=False,
+            **task.options,
+        )
+
+    def _release_connection(self) -> None:
+        connection, self._connection, self._producer = self._connection, None, None
+        if connection is not None:
+            try:
+                connection.release()
+            except Exception:
+                pass
+
+
+task_publisher = TaskPublisher(
+    max_buffer_size=settings.TASK_PUBLISHER_BUFFER_SIZE,
+    batch_size=settings.TASK_PUBLISHER_BATCH_SIZE,
+    confirm=settings.TASK_PUBLISHER_CONFIRM,
+    failure_threshold=settings.TASK_PUBLISHER_FAILURE_THRESHOLD,
+    reset_timeout=settings.TASK_PUBLISHER_RESET_TIMEOUT,
+    shutdown_timeout=settings.TASK_PUBLISHER_SHUTDOWN_TIMEOUT,
+    enabled=settings.TASK_PUBLISHER_ENABLED,
+)
+
+registry.gauge(
+    "task_publisher_buffer_size",
+    "Tasks buffered and not published yet.",
+    function=lambda: task_publisher.buffer_size,
+)
+registry.gauge(
+    "task_publisher_buffer_capacity",
+    "Tasks the publish buffer can hold.",
+    function=lambda: task_publisher.max_buffer_size,
+)
+registry.gauge(
+    "task_publisher_circuit_open",
+    "1 while the broker circuit breaker rejects tasks.",
+    function=lambda: float(task_publisher.breaker.is_open),
+)
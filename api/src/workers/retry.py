@@ -0,0 +1,12 @@
+import random
+
+
+def full_jitter_backoff(retries: int, base: float, maximum: float) -> float:
+    """
+    Delay before retry number `retries + 1`: random between 0 and the
+    exponential delay `base * 2 ** retries`, capped at `maximum`.
+
+    The randomness spreads out the retries of tasks that failed together
+    (e.g. while a server was down), instead of sending them back in lockstep.
+    """
+    return random.uniform(0, min(maximum, base * 2**retries))
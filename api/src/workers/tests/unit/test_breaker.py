@@ -0,0 +1,45 @@
+from src.workers.breaker import CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=5, clock=FakeClock())
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # resets the count
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open
+    assert breaker.retry_after() == 5
+
+
+def test_half_open_after_timeout_then_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=5, clock=clock)
+    breaker.record_failure()
+
+    clock.now = 5
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.is_open
+    assert breaker.retry_after() == 0
+
+    # a failed trial reopens for a full timeout
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.retry_after() == 5
+
+    clock.now = 10
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
@@ -0,0 +1,78 @@
+from unittest.mock import MagicMock
+
+from src.workers.brownout import Brownout, QueuePause
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_brownout_broadcasts_while_above_target():
+    clock = FakeClock()
+    broadcast = MagicMock()
+    brownout = Brownout(target=10, hold=30, broadcast=broadcast, clock=clock)
+
+    brownout.observe(5)
+    broadcast.assert_not_called()
+
+    brownout.observe(12)
+    brownout.observe(20)  # within the lease: not renewed yet
+    broadcast.assert_called_once_with(30)
+
+    clock.now = 15
+    brownout.observe(12)
+    assert broadcast.call_count == 2
+
+
+def test_brownout_survives_broadcast_errors():
+    broadcast = MagicMock(side_effect=ConnectionError("broker down"))
+    brownout = Brownout(target=10, hold=30, broadcast=broadcast)
+
+    brownout.observe(12)
+
+    broadcast.assert_called_once()
+
+
+def make_consumer(queues):
+    consumer = MagicMock()
+    consumer.task_consumer.consuming_from.side_effect = lambda queue: queue in queues
+    return consumer
+
+
+def test_queue_pause_resumes_after_last_deadline():
+    clock = FakeClock()
+    consumer = make_consumer({"email.confirmation"})
+    queue_pause = QueuePause("email.confirmation", clock=clock)
+
+    assert queue_pause.pause(consumer, 30)
+    consumer.cancel_task_queue.assert_called_once_with("email.confirmation")
+    resume, (args,) = consumer.timer.call_after.call_args.args[1:]
+    assert consumer.timer.call_after.call_args.args[0] == 30
+
+    # extended before the first deadline
+    clock.now = 20
+    queue_pause.pause(consumer, 30)
+    assert consumer.cancel_task_queue.call_count == 1
+
+    clock.now = 30
+    resume(args)
+    consumer.add_task_queue.assert_not_called()
+    assert consumer.timer.call_after.call_args.args[0] == 20
+
+    clock.now = 50
+    resume(args)
+    consumer.add_task_queue.assert_called_once_with("email.confirmation")
+    consumer.app.amqp.queues.select_add.assert_called_once()
+    assert not queue_pause.paused
+
+
+def test_queue_pause_ignored_by_other_workers():
+    consumer = make_consumer({"email.verification"})
+    queue_pause = QueuePause("email.confirmation")
+
+    assert not queue_pause.pause(consumer, 30)
+    consumer.cancel_task_queue.assert_not_called()
@@ -0,0 +1,125 @@
+import asyncio
+import contextvars
+from unittest.mock import patch
+
+import pytest
+from celery import Celery
+
+from src.workers.publisher import TaskPublisher, TaskPublisherUnavailableError
+
+request_id: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "test_request_id", default=None
+)
+
+
+@pytest.fixture
+def celery_app(monkeypatch):
+    monkeypatch.delenv("CELERY_BROKER_URL", raising=False)  # overrides `broker`
+    return Celery("test", broker="memory://")
+
+
+def read_tasks(app: Celery) -> list[tuple[str, list]]:
+    tasks = []
+    with app.connection_for_read() as connection:
+        queue = connection.SimpleQueue("celery")
+        while queue.qsize():
+            message = queue.get(timeout=1)
+            tasks.append((message.headers["task"], message.payload[0]))
+            message.ack()
+        queue.close()
+    return tasks
+
+
+async def wait_drained(publisher: TaskPublisher):
+    async with asyncio.timeout(5):
+        while publisher.buffer_size:
+            await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_publishes_buffered_tasks_in_order(celery_app):
+    publisher = TaskPublisher(get_app=lambda: celery_app)
+    await publisher.start()
+
+    publisher.publish("tasks.first", ("a@example.com", "1234"))
+    publisher.publish("tasks.second", ("b@example.com",))
+    await wait_drained(publisher)
+    await publisher.stop()
+
+    assert read_tasks(celery_app) == [
+        ("tasks.first", ["a@example.com", "1234"]),
+        ("tasks.second", ["b@example.com"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_published_in_enqueuing_context(celery_app):
+    publisher = TaskPublisher(get_app=lambda: celery_app)
+    seen = []
+    publisher._send = lambda task: seen.append(request_id.get())
+    await publisher.start()
+
+    request_id.set("request-1")
+    publisher.publish("tasks.first")
+    request_id.set("request-2")
+    publisher.publish("tasks.second")
+    await wait_drained(publisher)
+    await publisher.stop()
+
+    assert seen == ["request-1", "request-2"]
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_rejects():
+    publisher = TaskPublisher(max_buffer_size=2)  # not started: nothing drains
+
+    publisher.publish("tasks.first")
+    publisher.publish("tasks.second")
+    with pytest.raises(TaskPublisherUnavailableError):
+        publisher.publish("tasks.third")
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_on_broker_errors_then_recovers(celery_app):
+    publisher = TaskPublisher(
+        failure_threshold=2, reset_timeout=0.2, get_app=lambda: celery_app
+    )
+    sent = []
+
+    def broker_down(task):
+        raise ConnectionRefusedError("broker down")
+
+    await publisher.start()
+    with patch.object(publisher, "_send", side_effect=broker_down):
+        publisher.publish("tasks.first")
+        async with asyncio.timeout(5):
+            while not publisher.breaker.is_open:
+                await asyncio.sleep(0.01)
+
+        # fails fast while the broker is down, the buffered task is kept
+        with pytest.raises(TaskPublisherUnavailableError):
+            publisher.publish("tasks.second")
+        assert publisher.buffer_size == 1
+
+    with patch.object(publisher, "_send", side_effect=sent.append):
+        await wait_drained(publisher)
+    await publisher.stop()
+
+    assert [task.name for task in sent] == ["tasks.first"]
+    assert not publisher.breaker.is_open
+
+
+@pytest.mark.asyncio
+async def test_stop_drops_unpublished_tasks(celery_app):
+    publisher = TaskPublisher(shutdown_timeout=0.1, get_app=lambda: celery_app)
+
+    def broker_down(task):
+        raise ConnectionRefusedError("broker down")
+
+    await publisher.start()
+    with patch.object(publisher, "_send", side_effect=broker_down):
+        publisher.publish("tasks.first")
+        await publisher.stop()
+
+    assert publisher.buffer_size == 0
+    assert not publisher.running
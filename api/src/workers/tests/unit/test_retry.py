@@ -0,0 +1,20 @@
+from unittest.mock import patch
+
+from src.workers.retry import full_jitter_backoff
+
+
+def test_full_jitter_backoff_bounds():
+    with patch("src.workers.retry.random.uniform", side_effect=lambda a, b: b):
+        assert [full_jitter_backoff(n, base=2, maximum=60) for n in range(7)] == [
+            2,
+            4,
+            8,
+            16,
+            32,
+            60,
+            60,
+        ]
+
+    delays = {full_jitter_backoff(3, base=2, maximum=60) for _ in range(100)}
+    assert all(0 <= delay <= 16 for delay in delays)
+    assert len(delays) > 1  # spread, not in lockstep
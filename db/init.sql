@@ -5,30 +5,111 @@ CREATE DOMAIN code_4_digits AS TEXT CHECK (LENGTH(VALUE) = 4 AND VALUE ~ '^[0-9]
 
 CREATE TABLE IF NOT EXISTS user_data (
     id SERIAL PRIMARY KEY,
-    email email_address UNIQUE NOT NULL,
+    email email_address NOT NULL,
     password_hash TEXT NOT NULL,
-    is_active BOOLEAN DEFAULT FALSE
+    is_active BOOLEAN NOT NULL DEFAULT FALSE,
+    -- covers the login lookup by email: answered by an index-only scan
+    CONSTRAINT user_data_email_key UNIQUE (email) INCLUDE (id, password_hash, is_active)
 );
--- speeds up searches for inactive users
-CREATE INDEX idx_user_data_is_active ON user_data(is_active);
+-- speeds up searches for inactive users; only they are indexed, so the index
+-- stays as small as the backlog of pending activations
+CREATE INDEX idx_user_data_inactive ON user_data(id) WHERE is_active = FALSE;
 
+-- partitioned in short windows of created_at: expired codes are dropped with
+-- their partition instead of deleted row by row (see the maintenance below)
 CREATE TABLE IF NOT EXISTS user_verification (
-    id SERIAL PRIMARY KEY,
+    id SERIAL,
     user_id INTEGER REFERENCES user_data(id) ON DELETE CASCADE,
     code code_4_digits NOT NULL,
-    created_at TIMESTAMP DEFAULT NOW()
-);
+    created_at TIMESTAMP NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+-- catches rows outside the pre-created partitions if the maintenance falls behind
+CREATE TABLE IF NOT EXISTS user_verification_default
+    PARTITION OF user_verification DEFAULT;
  -- speeds up searches for user_id, user_id + code, user_id + code + created_at
-CREATE INDEX idx_user_verification_created_at ON user_verification(created_at);
 CREATE INDEX idx_user_verification_user_id_code_created_at ON user_verification(user_id, code, created_at);
 ALTER TABLE user_verification
     ADD CONSTRAINT chk_created_at_not_in_future CHECK (created_at <= NOW());
 
+-- Creates the partitions of the current and next `premake` windows and drops
+-- those whose window ended more than `retention` ago. Each DDL statement runs
+-- under a short lock_timeout, so a busy table only delays it to the next run.
+CREATE OR REPLACE FUNCTION maintain_user_verification_partitions(
+    partition_window INTERVAL DEFAULT '10 minutes',
+    premake INTEGER DEFAULT 6,
+    retention INTERVAL DEFAULT '2 minutes'
+) RETURNS VOID AS $$
+DECLARE
+    window_start TIMESTAMP := date_bin(partition_window, LOCALTIMESTAMP, TIMESTAMP '2000-01-01');
+    partition_name TEXT;
+    expired RECORD;
+BEGIN
+    PERFORM set_config('lock_timeout', '1s', TRUE);
+
+    FOR i IN 0..premake LOOP
+        partition_name := 'user_verification_p'
+            || to_char(window_start + i * partition_window, 'YYYYMMDD"_"HH24MI');
+        BEGIN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF user_verification FOR VALUES FROM (%L) TO (%L)',
+                partition_name,
+                window_start + i * partition_window,
+                window_start + (i + 1) * partition_window
+            );
+        -- busy table, or rows of this window already in the default partition:
+        -- they expire there and the partition is created on a later run
+        EXCEPTION WHEN lock_not_available OR check_violation THEN
+            RAISE NOTICE 'partition % not created: %', partition_name, SQLERRM;
+        END;
+    END LOOP;
+
+    FOR expired IN
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE
+            parent.relname = 'user_verification'
+            AND child.relname ~ '^user_verification_p[0-9]{8}_[0-9]{4}$'
+            AND to_timestamp(substring(child.relname FROM 20), 'YYYYMMDD_HH24MI')::TIMESTAMP
+                + partition_window < LOCALTIMESTAMP - retention
+    LOOP
+        BEGIN
+            EXECUTE format('DROP TABLE %I', expired.relname);
+        EXCEPTION WHEN lock_not_available THEN
+            RAISE NOTICE 'partition % busy, dropped on the next run', expired.relname;
+        END;
+    END LOOP;
+
+    DELETE FROM user_verification_default
+    WHERE created_at < LOCALTIMESTAMP - retention;
+END;
+$$ LANGUAGE plpgsql;
+SELECT maintain_user_verification_partitions();
+
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    task_name TEXT NOT NULL,
+    args JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    expires_at TIMESTAMP,  -- the worker discards the task after it
+    published_at TIMESTAMP
+);
+-- only holds pending tasks, so relay drains stay cheap however large the table grows
+CREATE INDEX idx_email_outbox_pending ON email_outbox(id) WHERE published_at IS NULL;
+
 CREATE EXTENSION IF NOT EXISTS pg_cron;
 SELECT cron.schedule(
     '*/5 * * * *',
     $$
-    DELETE FROM user_verification
-    WHERE created_at < NOW() - INTERVAL '2 minutes';
+    SELECT maintain_user_verification_partitions();
+    $$
+);
+SELECT cron.schedule(
+    '0 * * * *',
+    $$
+    DELETE FROM email_outbox
+    WHERE published_at < NOW() - INTERVAL '1 day';
     $$
 );
@@ -0,0 +1 @@
+ALTER TABLE user_data ALTER COLUMN is_active DROP NOT NULL;
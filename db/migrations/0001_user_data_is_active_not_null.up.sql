@@ -0,0 +1,21 @@
+-- migrate:no-transaction
+
+-- is_active has a default but accepts NULL. The NULLs are backfilled in
+-- batches, then NOT NULL is enforced through a check constraint validated
+-- without blocking writes, which lets SET NOT NULL skip its table scan.
+-- migrate:batch
+UPDATE user_data
+SET is_active = FALSE
+WHERE id IN (
+    SELECT id
+    FROM user_data
+    WHERE is_active IS NULL
+    LIMIT 1000
+);
+
+ALTER TABLE user_data DROP CONSTRAINT IF EXISTS chk_is_active_not_null;
+ALTER TABLE user_data
+    ADD CONSTRAINT chk_is_active_not_null CHECK (is_active IS NOT NULL) NOT VALID;
+ALTER TABLE user_data VALIDATE CONSTRAINT chk_is_active_not_null;
+ALTER TABLE user_data ALTER COLUMN is_active SET NOT NULL;
+ALTER TABLE user_data DROP CONSTRAINT chk_is_active_not_null;
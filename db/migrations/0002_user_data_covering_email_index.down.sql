@@ -0,0 +1,8 @@
+-- migrate:no-transaction
+
+DROP INDEX CONCURRENTLY IF EXISTS user_data_email_plain_idx;
+CREATE UNIQUE INDEX CONCURRENTLY user_data_email_plain_idx ON user_data(email);
+
+ALTER TABLE user_data
+    DROP CONSTRAINT user_data_email_key,
+    ADD CONSTRAINT user_data_email_key UNIQUE USING INDEX user_data_email_plain_idx;
@@ -0,0 +1,12 @@
+-- migrate:no-transaction
+
+-- login lookups by email answered by an index-only scan (see db/init.sql);
+-- an index left INVALID by a failed concurrent build is dropped first
+DROP INDEX CONCURRENTLY IF EXISTS user_data_email_covering_idx;
+CREATE UNIQUE INDEX CONCURRENTLY user_data_email_covering_idx
+    ON user_data(email) INCLUDE (id, password_hash, is_active);
+
+-- the constraint takes over the new index, which is renamed after it
+ALTER TABLE user_data
+    DROP CONSTRAINT user_data_email_key,
+    ADD CONSTRAINT user_data_email_key UNIQUE USING INDEX user_data_email_covering_idx;
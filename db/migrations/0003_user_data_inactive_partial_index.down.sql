@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_data_is_active ON user_data(is_active);
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_data_inactive;
@@ -0,0 +1,6 @@
+-- migrate:no-transaction
+
+-- only users waiting for activation are indexed (see db/init.sql)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_data_inactive
+    ON user_data(id) WHERE is_active = FALSE;
+DROP INDEX CONCURRENTLY IF EXISTS idx_user_data_is_active;
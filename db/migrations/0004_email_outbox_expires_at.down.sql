@@ -0,0 +1 @@
+ALTER TABLE email_outbox DROP COLUMN IF EXISTS expires_at;
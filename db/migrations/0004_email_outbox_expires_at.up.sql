@@ -0,0 +1,13 @@
+-- databases built from an init.sql older than the outbox have no table yet
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id BIGSERIAL PRIMARY KEY,
+    task_name TEXT NOT NULL,
+    args JSONB NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    published_at TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_email_outbox_pending
+    ON email_outbox(id) WHERE published_at IS NULL;
+
+-- nullable without default: a metadata-only change, no table rewrite
+ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP;